@@ -54,19 +54,37 @@ WSGI_APPLICATION = 'TechnikNet_system.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        # Django's PostgreSQL backend plus connect timing for the metrics in properties/dbmetrics.py
+        'ENGINE': 'properties.postgresql',
         'NAME': os.getenv('DB_NAME', 'portal_db'),
         'USER': os.getenv('DB_USER', 'portal_user'),
         'PASSWORD': os.getenv('DB_PASSWORD', 'sG7aJx2SAZHxB137TPI0r3Ma3R7L7a1JByXhpnwyqFvN7NCqTn'),
         'HOST': os.getenv('DB_HOST', 'localhost'),
         'PORT': os.getenv('DB_PORT', '5432'),
+        # Each worker keeps its connection for DB_CONN_MAX_AGE seconds (0 = one per request)
+        # and checks it before reuse, so a server restart costs one reconnect, not an error
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '600')),
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
         'OPTIONS': {
-            'connect_timeout': 60,
+            'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '10')),
             'options': '-c statement_timeout=60000'
         },
     }
 }
 
+# Shared by all gunicorn workers (no Redis needed) so signal-based
+# invalidation reaches every process
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / 'cache')),
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -94,6 +112,19 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploads are spooled to temp files in chunks; photos over the cap are skipped
+FILE_UPLOAD_HANDLERS = ['properties.uploads.BoundedTemporaryFileUploadHandler']
+FILE_UPLOAD_TEMP_DIR = os.getenv('FILE_UPLOAD_TEMP_DIR') or None
+MAX_IMAGE_UPLOAD_SIZE = int(os.getenv('MAX_IMAGE_UPLOAD_SIZE', str(25 * 1024 * 1024)))
+IMAGE_UPLOAD_WORKERS = int(os.getenv('IMAGE_UPLOAD_WORKERS', '4'))
+
+# Thumbnail/web-size renditions of uploaded photos are built by a thread pool
+IMAGE_RENDITIONS_ASYNC = os.getenv('IMAGE_RENDITIONS_ASYNC', 'True') == 'True'
+IMAGE_RENDITION_WORKERS = int(os.getenv('IMAGE_RENDITION_WORKERS', '2'))
+
+# Import jobs running longer than this (seconds) are taken as lost with a dead worker
+IMPORT_JOB_TIMEOUT = int(os.getenv('IMPORT_JOB_TIMEOUT', str(2 * 60 * 60)))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = '/login/'
@@ -1,9 +1,54 @@
-bind = "127.0.0.1:8000"
-workers = 3
-worker_class = "sync"
+import multiprocessing
+import os
+
+# Serving profile, started without an app argument (wsgi_app below):
+#   gthread - threaded workers (default): a slow upload or export holds one thread, not a worker
+#   sync    - one request per worker process, as before
+#   asgi    - uvicorn workers on TechnikNet_system.asgi (needs `pip install uvicorn-worker`);
+#             the export view is async and streams from the event loop
+PROFILE = os.getenv('GUNICORN_PROFILE', 'gthread')
+CPUS = multiprocessing.cpu_count()
+
+bind = os.getenv('GUNICORN_BIND', "127.0.0.1:8000")
+wsgi_app = "TechnikNet_system.wsgi:application"
+if PROFILE == 'sync':
+    worker_class = "sync"
+    workers = int(os.getenv('WEB_CONCURRENCY', 2 * CPUS + 1))
+    keepalive = 2
+elif PROFILE == 'gthread':
+    worker_class = "gthread"
+    # Threads share the GIL: one process per CPU, threads cover I/O waits
+    workers = int(os.getenv('WEB_CONCURRENCY', CPUS + 1))
+    threads = int(os.getenv('GUNICORN_THREADS', 4))
+    keepalive = 5
+elif PROFILE == 'asgi':
+    worker_class = "uvicorn_worker.UvicornWorker"
+    wsgi_app = "TechnikNet_system.asgi:application"
+    workers = int(os.getenv('WEB_CONCURRENCY', CPUS + 1))
+    keepalive = 5
+    # Connections of the per-request ASGI threads are not reused, so persistent
+    # connections would only pile up (see Django's ASGI deployment notes)
+    raw_env = [] if 'DB_CONN_MAX_AGE' in os.environ else ['DB_CONN_MAX_AGE=0']
+else:
+    raise ValueError(f"Unknown GUNICORN_PROFILE {PROFILE!r} (expected sync, gthread or asgi)")
+
 max_requests = 1000
+# Spread worker restarts so persistent DB connections are not all reopened at once
+max_requests_jitter = 100
 timeout = 30
-keepalive = 2
-accesslog = "/var/log/gunicorn/access.log"
-errorlog = "/var/log/gunicorn/error.log"
+accesslog = os.getenv('GUNICORN_ACCESSLOG', "/var/log/gunicorn/access.log") or None
+errorlog = os.getenv('GUNICORN_ERRORLOG', "/var/log/gunicorn/error.log")
 loglevel = "info"
+
+
+def worker_exit(server, worker):
+    """Log the worker's database connection counters (see properties/dbmetrics.py)"""
+    # Runs in the worker process, after the Django app has been loaded
+    from properties.dbmetrics import connection_stats
+
+    stats = connection_stats()
+    server.log.info(
+        "worker %s db connections: %d opened for %d requests, reuse %.0f%%, avg connect %.1f ms, max %.1f ms",
+        worker.pid, stats['opened'], stats['requests'], 100 * stats['reuse_ratio'],
+        stats['avg_connect_ms'], 1000 * stats['max_connect_seconds'],
+    )
@@ -1,8 +1,7 @@
+import argparse
 import os
 import sys
 import django
-import pandas as pd
-from datetime import datetime
 
 # Add project root to Python path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -10,207 +9,155 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'TechnikNet_system.settings')
 django.setup()
 
-from properties.models import Property, Team
-from django.utils import timezone
-
-def clean_str(value):
-    """Convert value to string, return empty string if None/NaN"""
-    if value is None or value == '':
-        return ''
-    if pd.isna(value):
-        return ''
-    return str(value).strip()
-
-def parse_datetime(date_str):
-    """Parse datetime, return None if invalid/empty"""
-    if date_str is None or date_str == '':
-        return None
-    if pd.isna(date_str):
-        return None
-    try:
-        if isinstance(date_str, str):
-            if not date_str.strip():
-                return None
-            dt = datetime.strptime(date_str.split()[0], '%Y-%m-%d')
-        elif hasattr(date_str, 'to_pydatetime'):
-            dt = date_str.to_pydatetime()
+from django.db import connection
+
+from properties.blobs import hash_file
+from properties.importer import import_properties, start_checkpoint
+from properties.parallel import import_parallel
+from properties.readers import ImportFileError, open_import_file
+from properties.models import Team
+
+# Width of the progress bar in characters
+BAR_WIDTH = 40
+
+
+class ProgressBar:
+    """One-line progress bar on stderr, redrawn only when the count changes"""
+
+    def __init__(self, total):
+        self.total = total
+        self.done = None
+
+    def update(self, done):
+        if done == self.done:
+            return
+        self.done = done
+        if self.total:
+            done = min(done, self.total)
+            filled = int(BAR_WIDTH * done / self.total)
+            line = f"[{'#' * filled}{'.' * (BAR_WIDTH - filled)}] {100 * done // self.total:3d}% {done}/{self.total} rows"
         else:
-            return None
-        # Make timezone aware
-        if timezone.is_naive(dt):
-            dt = timezone.make_aware(dt)
-        return dt
-    except:
-        return None
-
-def safe_get(row, column_name, df_columns, default=''):
-    """Safely get column value even if column doesn't exist"""
-    if column_name not in df_columns:
-        return default
-    value = row.get(column_name, default)
-    if pd.isna(value) or value == '':
-        return default
-    return value
-
-def safe_int(value, default=None):
-    """Safely convert to integer, return default if empty/invalid"""
-    if value is None or value == '':
-        return default
-    if pd.isna(value):
-        return default
-    try:
-        str_val = str(value).strip().lower()
-        if str_val in ['', 'nan', 'none', 'null']:
-            return default
-        return int(float(value))
-    except:
-        return default
-
-def import_excel(file_path, default_team=None):
+            line = f"{done} rows"
+        sys.stderr.write(f"\r{line}")
+        sys.stderr.flush()
+
+    def close(self):
+        sys.stderr.write("\n")
+
+
+def import_excel(file_path, default_team=None, workers=1, quiet=False):
     """Import Excel data with support for empty columns"""
+    say = (lambda *args: None) if quiet else print
+
     if not os.path.exists(file_path):
         print(f"❌ File not found: {file_path}")
         return
 
-    print(f"📂 Reading Excel file: {file_path}")
-    df = pd.read_excel(file_path)
+    say(f"📂 Reading file: {file_path}")
+    import_file = open(file_path, 'rb')
+    try:
+        reader = open_import_file(import_file, file_path)
+    except ImportFileError as e:
+        import_file.close()
+        print(f"❌ {e}")
+        return
 
-    print(f"📊 Found {len(df)} rows")
-    print(f"📊 Columns: {df.columns.tolist()}")
+    say(f"📊 Found {reader.total_rows} rows")
+    say(f"📊 Columns: {list(reader.columns)}")
 
-    # Clean data - only fill NaN values
-    df = df.fillna('')
-    
     # Get default team for assignment
     team = None
     if default_team:
         try:
             team = Team.objects.get(name=default_team)
-            print(f"✅ Will assign properties to team: {team.name}")
+            say(f"✅ Will assign properties to team: {team.name}")
         except Team.DoesNotExist:
             print(f"⚠️  Team '{default_team}' not found. Properties will be created without team assignment.")
 
-    success_count = 0
-    error_count = 0
-    df_columns = df.columns.tolist()
-
-    for idx, row in df.iterrows():
-        try:
-            # Get Number field (required - only mandatory field)
-            number = clean_str(safe_get(row, 'Number', df_columns, ''))
-            if not number:
-                print(f"❌ Row {idx+2}: Missing 'Number' field (required)")
-                error_count += 1
-                continue
-            
-            # Prepare property data - all fields are optional except Number
-            property_data = {
-                'address_id': clean_str(safe_get(row, 'Address ID', df_columns, '')),
-                'village': clean_str(safe_get(row, 'Village', df_columns, '')),
-                'street': clean_str(safe_get(row, 'Street', df_columns, '')),
-                'house_number': clean_str(safe_get(row, 'House number', df_columns, '')),
-                'house_number_affix': clean_str(safe_get(row, 'House number affix', df_columns, '')),
-                'owner_email': clean_str(safe_get(row, 'Owner email', df_columns, '')),
-                'owner_name': clean_str(safe_get(row, 'Owner name', df_columns, '')),
-                'owner_surname': clean_str(safe_get(row, 'Owner surname', df_columns, '')),
-                'owner_phone_1': clean_str(safe_get(row, 'Owner phone 1', df_columns, '')),
-                'owner_phone_2': clean_str(safe_get(row, 'Owner phone 2', df_columns, '')),
-                'pop_code': clean_str(safe_get(row, 'PoP code', df_columns, '')),
-                'gebaute_units': safe_int(safe_get(row, 'Gebaute Units', df_columns), None),
-                'hbg': clean_str(safe_get(row, 'HBG', df_columns, '')),
-                'hbg_termin': parse_datetime(safe_get(row, 'HBG Termin', df_columns)),
-                'ausbau_termin': parse_datetime(safe_get(row, 'Ausbau Termin', df_columns)),
-                'kl_15m': safe_int(safe_get(row, 'K.L 15M', df_columns), 0),
-                'kl_20m': safe_int(safe_get(row, 'K.L 20M', df_columns), 0),
-                'kl_30m': safe_int(safe_get(row, 'K.L 30M', df_columns), 0),
-                'kl_50m': safe_int(safe_get(row, 'K.L 50M', df_columns), 0),
-                'kl_80m': safe_int(safe_get(row, 'K.L 80M', df_columns), 0),
-                'kl_100m': safe_int(safe_get(row, 'K.L 100M', df_columns), 0),
-                'keller': clean_str(safe_get(row, 'keller', df_columns, '')),
-                'huep': clean_str(safe_get(row, 'HÜP', df_columns, '')),
-                'spleissen': clean_str(safe_get(row, 'spleissen', df_columns, '')),
-                'ohne_infra': safe_int(safe_get(row, 'ohne Infra', df_columns), 0),
-                'mit_infra': safe_int(safe_get(row, 'mit Infra', df_columns), 0),
-                'status': clean_str(safe_get(row, 'Status', df_columns, '')),
-                'comments': clean_str(safe_get(row, 'Comments', df_columns, '')),
-            }
-            
-            # Create or update property
-            property_obj, created = Property.objects.update_or_create(
-                number=number,
-                defaults=property_data
+    if workers > 1 and connection.vendor == 'sqlite':
+        # SQLite allows a single writer; parallel batches would only fail with "database is locked"
+        print("⚠️  --workers needs PostgreSQL, importing with a single process")
+        workers = 1
+
+    file_hash = hash_file(import_file)
+    file_name = os.path.basename(file_path)
+    bar = None if quiet else ProgressBar(reader.total_rows)
+
+    # Existing properties are always updated from the sheet
+    with import_file, reader:
+        if workers > 1:
+            say(f"⚙️  Importing with {workers} worker processes")
+            # Each worker keeps its own checkpoint for its share of the rows
+            try:
+                result = import_parallel(
+                    reader.iter_rows(), workers, force_replace=True, default_team=team,
+                    file_hash=file_hash, file_name=file_name,
+                    progress=bar and bar.update,
+                )
+            except RuntimeError as e:
+                print(f"\n❌ Import failed, re-run to resume:\n{e}")
+                sys.exit(1)
+        else:
+            # A previous run of this file that stopped halfway resumes after its last batch
+            checkpoint = start_checkpoint(file_hash, file_name, True, team)
+            if checkpoint.last_row:
+                say(f"↩️  Resuming after row {checkpoint.last_row} (rows up to it were committed by an earlier run)")
+            result = import_properties(
+                reader.iter_rows(), force_replace=True, default_team=team, checkpoint=checkpoint,
+                progress=bar and (lambda result, written: bar.update(result.processed)),
             )
+    if bar:
+        bar.close()
 
-            # Assign teams from Excel column or default team
-            team_names_str = clean_str(safe_get(row, 'Team', df_columns, ''))
-            teams_assigned = []
-            
-            if team_names_str:
-                # Clear existing teams first for updates
-                if not created:
-                    property_obj.teams.clear()
-                
-                # Split by comma and find teams
-                team_names = [name.strip() for name in team_names_str.split(',') if name.strip()]
-                for team_name in team_names:
-                    try:
-                        team_obj = Team.objects.get(name=team_name)
-                        property_obj.teams.add(team_obj)
-                        teams_assigned.append(team_name)
-                    except Team.DoesNotExist:
-                        print(f"  ⚠️  Team '{team_name}' not found")
-            
-            elif team and created:
-                # Use default team only for new properties
-                property_obj.teams.add(team)
-                teams_assigned.append(team.name)
-
-            # Success message
-            action = "Created" if created else "Updated"
-            team_info = f" → Teams: {', '.join(teams_assigned)}" if teams_assigned else ""
-            print(f"✅ Row {idx+2}: {action} property '{number}'{team_info}")
-            success_count += 1
-
-        except Exception as e:
-            print(f"❌ Error at row {idx+2} (Number: {number if 'number' in locals() else 'Unknown'}): {str(e)}")
-            error_count += 1
-            import traceback
-            traceback.print_exc()
+    if not quiet:
+        for error in result.errors:
+            print(error)
 
     print(f"\n{'='*50}")
-    print(f"✅ Successfully imported: {success_count}")
-    print(f"❌ Errors: {error_count}")
+    print(f"✅ Successfully imported: {result.created + result.updated} "
+          f"({result.created} created, {result.updated} updated, {result.unchanged} unchanged)")
+    print(f"❌ Errors: {result.error_count}")
     print(f"{'='*50}")
 
+def print_usage():
+    print("╔════════════════════════════════════════════════════╗")
+    print("║        TechnikNet Excel Import Tool               ║")
+    print("╚════════════════════════════════════════════════════╝")
+    print()
+    print("Usage: python import_excel.py <file.xlsx|.xls|.csv|.parquet> [team_name] [--workers N] [--quiet]")
+    print()
+    print("Examples:")
+    print("  python import_excel.py data.xlsx")
+    print("  python import_excel.py data.xlsx 'Team Alpha'")
+    print("  python import_excel.py data.csv --workers 4 --quiet")
+    print()
+    print("📋 Available teams:")
+    teams = Team.objects.all()
+    if teams.exists():
+        for team in teams:
+            print(f"  • {team.name}")
+    else:
+        print("  (No teams available)")
+    print()
+    print("📌 Notes:")
+    print("  • Only 'Number' column is required")
+    print("  • All other columns are optional (can be empty)")
+    print("  • Column order doesn't matter - system reads by column name")
+    print("  • Use 'Team' column in Excel to assign teams (comma-separated)")
+    print("  • --workers N splits rows by Number across N processes (use with PostgreSQL)")
+    print("  • --quiet prints only the final summary instead of the progress bar and errors")
+    print()
+
 if __name__ == '__main__':
     if len(sys.argv) < 2:
-        print("╔════════════════════════════════════════════════════╗")
-        print("║        TechnikNet Excel Import Tool               ║")
-        print("╚════════════════════════════════════════════════════╝")
-        print()
-        print("Usage: python import_excel.py <excel_file.xlsx> [team_name]")
-        print()
-        print("Examples:")
-        print("  python import_excel.py data.xlsx")
-        print("  python import_excel.py data.xlsx 'Team Alpha'")
-        print()
-        print("📋 Available teams:")
-        teams = Team.objects.all()
-        if teams.exists():
-            for team in teams:
-                print(f"  • {team.name}")
-        else:
-            print("  (No teams available)")
-        print()
-        print("📌 Notes:")
-        print("  • Only 'Number' column is required")
-        print("  • All other columns are optional (can be empty)")
-        print("  • Column order doesn't matter - system reads by column name")
-        print("  • Use 'Team' column in Excel to assign teams (comma-separated)")
-        print()
+        print_usage()
         sys.exit(1)
 
-    file_path = sys.argv[1]
-    team_name = sys.argv[2] if len(sys.argv) > 2 else None
+    parser = argparse.ArgumentParser(description='Import properties from an Excel/CSV/Parquet file')
+    parser.add_argument('file_path')
+    parser.add_argument('team_name', nargs='?', help='Default team for new properties')
+    parser.add_argument('--workers', type=int, default=1, help='Parallel import processes')
+    parser.add_argument('--quiet', action='store_true', help='Only print the final summary')
+    args = parser.parse_args()
 
-    import_excel(file_path, team_name)
+    import_excel(args.file_path, args.team_name, workers=max(args.workers, 1), quiet=args.quiet)
@@ -0,0 +1,74 @@
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+
+from .counters import CacheCounters
+from .models import Property, Team, TeamMember
+
+PropertyTeam = Property.teams.through
+
+# Seconds a cached team-ID set lives; signals invalidate it on any change
+TEAM_CACHE_TIMEOUT = 60 * 60 * 24
+
+team_cache_counters = CacheCounters('Team memberships')
+
+
+def _team_cache_key(user_id):
+    return f'access:user_teams:{user_id}'
+
+
+def get_user_team_ids(user):
+    """
+    Return the set of team IDs the user belongs to.
+
+    Served from the cache in the steady state; entries are dropped by the
+    TeamMember/Team signal handlers in properties/signals.py.
+    """
+    key = _team_cache_key(user.pk)
+    team_ids = cache.get(key)
+    if team_ids is not None:
+        team_cache_counters.count('hits')
+        return team_ids
+    team_cache_counters.count('misses')
+    team_ids = frozenset(TeamMember.objects.filter(user_id=user.pk).values_list('team_id', flat=True))
+    cache.set(key, team_ids, TEAM_CACHE_TIMEOUT)
+    return team_ids
+
+
+def invalidate_user_teams(*user_ids):
+    """Drop cached team-ID sets for the given users"""
+    cache.delete_many([_team_cache_key(user_id) for user_id in user_ids])
+
+
+def get_user_teams(user):
+    """Get all teams the user belongs to"""
+    if user.is_superuser:
+        return Team.objects.all()
+    return Team.objects.filter(id__in=get_user_team_ids(user))
+
+
+def get_user_properties(user):
+    """
+    Get all properties accessible by the user.
+
+    Visibility is a correlated EXISTS on the Property.teams through table,
+    so each property appears once and no DISTINCT is needed.
+    """
+    if user.is_superuser:
+        return Property.objects.all()
+    team_ids = get_user_team_ids(user)
+    if not team_ids:
+        return Property.objects.none()
+    return Property.objects.filter(
+        Exists(PropertyTeam.objects.filter(property_id=OuterRef('pk'), team_id__in=team_ids))
+    )
+
+
+def can_access_property(user, property_obj):
+    """Check whether the user may see/edit the given property (or property id)"""
+    if user.is_superuser:
+        return True
+    team_ids = get_user_team_ids(user)
+    if not team_ids:
+        return False
+    property_id = getattr(property_obj, 'pk', property_obj)
+    return PropertyTeam.objects.filter(property_id=property_id, team_id__in=team_ids).exists()
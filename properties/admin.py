@@ -1,5 +1,22 @@
 from django.contrib import admin
-from .models import Team, TeamMember, Property, PropertyImage
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.html import format_html
+from .models import Team, TeamMember, Property, PropertyImage, ImportJob, ImportCheckpoint, PropertyStats
+from .bulk import assign_team, remove_team
+from .stats import track_stats
+
+# Properties listed on the bulk action confirmation pages
+ACTION_SAMPLE_SIZE = 20
+
+def count_subquery(model, field):
+    """COUNT of `model` rows whose `field` points at the outer row, 0 when there are none"""
+    counts = (
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by().values(field).annotate(count=Count('pk')).values('count')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
 
 @admin.register(Team)
 class TeamAdmin(admin.ModelAdmin):
@@ -7,13 +24,23 @@ class TeamAdmin(admin.ModelAdmin):
     search_fields = ('name', 'description')
     ordering = ('name',)
 
+    def get_queryset(self, request):
+        # One correlated subquery per count; joining both relations would multiply members by properties
+        qs = super().get_queryset(request)
+        return qs.annotate(
+            member_count=count_subquery(TeamMember, 'team'),
+            property_count=count_subquery(Property.teams.through, 'team'),
+        )
+
     def member_count(self, obj):
-        return obj.members.count()
+        return obj.member_count
     member_count.short_description = 'Members'
+    member_count.admin_order_field = 'member_count'
 
     def property_count(self, obj):
-        return obj.properties.count()
+        return obj.property_count
     property_count.short_description = 'Properties'
+    property_count.admin_order_field = 'property_count'
 
 @admin.register(TeamMember)
 class TeamMemberAdmin(admin.ModelAdmin):
@@ -60,10 +87,29 @@ class PropertyAdmin(admin.ModelAdmin):
         return super().changelist_view(request, extra_context=extra_context)
     actions = ['bulk_change_status', 'bulk_assign_team', 'bulk_remove_team']
 
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        return qs.prefetch_related('teams')
+
     def get_teams(self, obj):
         return obj.get_team_names() or '-'
     get_teams.short_description = 'Teams'
 
+    def selection_context(self, request, queryset):
+        """
+        Context of the bulk action confirmation pages: the selection is
+        posted back as submitted (IDs or select_across), and only a count
+        and a short sample of the properties are rendered.
+        """
+        count = queryset.count()
+        return {
+            'property_count': count,
+            'sample_properties': queryset[:ACTION_SAMPLE_SIZE],
+            'more_count': max(count - ACTION_SAMPLE_SIZE, 0),
+            'selected_ids': request.POST.getlist(ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', '0'),
+        }
+
     @admin.action(description='Change status for selected properties')
     def bulk_change_status(self, request, queryset):
         from django import forms
@@ -80,7 +126,8 @@ class PropertyAdmin(admin.ModelAdmin):
             form = StatusForm(request.POST)
             if form.is_valid():
                 status = form.cleaned_data['status']
-                count = queryset.update(status=status)
+                with track_stats(queryset.values_list('pk', flat=True)):
+                    count = queryset.update(status=status)
                 self.message_user(request, f'Successfully updated status for {count} properties to "{dict(Property.STATUS_CHOICES).get(status)}"')
                 return
         else:
@@ -88,7 +135,7 @@ class PropertyAdmin(admin.ModelAdmin):
         
         return render(request, 'admin/bulk_change_status.html', {
             'form': form,
-            'properties': queryset,
+            **self.selection_context(request, queryset),
             'title': 'Change Status'
         })
     
@@ -114,21 +161,20 @@ class PropertyAdmin(admin.ModelAdmin):
             form = TeamForm(request.POST)
             if form.is_valid():
                 team = form.cleaned_data['team']
-                clear_existing = form.cleaned_data['clear_existing']
-                
-                for prop in queryset:
-                    if clear_existing:
-                        prop.teams.clear()
-                    prop.teams.add(team)
-                
-                self.message_user(request, f'Successfully assigned team "{team.name}" to {queryset.count()} properties')
+                added, removed = assign_team(
+                    queryset.values_list('pk', flat=True), team, form.cleaned_data['clear_existing'],
+                )
+                message = f'Successfully assigned team "{team.name}" to {added} properties'
+                if removed:
+                    message += f' (removed {removed} other team assignments)'
+                self.message_user(request, message)
                 return
         else:
             form = TeamForm()
         
         return render(request, 'admin/bulk_assign_team.html', {
             'form': form,
-            'properties': queryset,
+            **self.selection_context(request, queryset),
             'title': 'Assign Team'
         })
     
@@ -148,18 +194,15 @@ class PropertyAdmin(admin.ModelAdmin):
             form = TeamRemoveForm(request.POST)
             if form.is_valid():
                 team = form.cleaned_data['team']
-                
-                for prop in queryset:
-                    prop.teams.remove(team)
-                
-                self.message_user(request, f'Successfully removed team "{team.name}" from {queryset.count()} properties')
+                removed = remove_team(queryset.values_list('pk', flat=True), team)
+                self.message_user(request, f'Successfully removed team "{team.name}" from {removed} properties')
                 return
         else:
             form = TeamRemoveForm()
         
         return render(request, 'admin/bulk_remove_team.html', {
             'form': form,
-            'properties': queryset,
+            **self.selection_context(request, queryset),
             'title': 'Remove Team'
         })
 
@@ -186,6 +229,40 @@ class PropertyAdmin(admin.ModelAdmin):
 
 @admin.register(PropertyImage)
 class PropertyImageAdmin(admin.ModelAdmin):
-    list_display = ('property', 'uploaded_by', 'uploaded_at')
+    list_display = ('preview', 'property', 'uploaded_by', 'uploaded_at')
     list_filter = ('uploaded_at',)
     search_fields = ('property__number',)
+    list_select_related = ('property', 'uploaded_by')
+    readonly_fields = ('preview',)
+
+    def preview(self, obj):
+        if not obj.image:
+            return '-'
+        return format_html('<img src="{}" style="max-height: 60px;" loading="lazy">', obj.thumbnail_url())
+    preview.short_description = 'Preview'
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ('original_name', 'status', 'dry_run', 'processed_rows', 'total_rows', 'created_count',
+                    'updated_count', 'unchanged_count', 'skipped_count', 'error_count', 'created_by', 'created_at')
+    list_filter = ('status', 'dry_run')
+    readonly_fields = ('started_at', 'finished_at')
+
+@admin.register(ImportCheckpoint)
+class ImportCheckpointAdmin(admin.ModelAdmin):
+    """Unfinished imports; delete a checkpoint to make the next run start over"""
+    list_display = ('file_name', 'last_row', 'force_replace', 'default_team', 'updated_at')
+    readonly_fields = ('file_hash', 'last_row', 'state', 'created_at', 'updated_at')
+
+@admin.register(PropertyStats)
+class PropertyStatsAdmin(admin.ModelAdmin):
+    """Summary rows kept by properties/stats.py; run reconcile_property_stats to rebuild"""
+    list_display = ('team', 'status', 'property_count', 'ohne_infra', 'mit_infra', 'updated_at')
+    list_filter = ('status',)
+    list_select_related = ('team',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
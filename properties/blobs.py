@@ -0,0 +1,57 @@
+import hashlib
+import logging
+import os
+
+from django.db.models import ProtectedError
+
+from .models import ImageBlob, PropertyImage
+
+logger = logging.getLogger(__name__)
+
+BLOB_DIR = 'property_images/blobs'
+
+
+def hash_file(f):
+    """SHA-256 hex digest of a file, read in chunks; the position is reset afterwards"""
+    digest = hashlib.sha256()
+    f.seek(0)
+    for chunk in f.chunks() if hasattr(f, 'chunks') else iter(lambda: f.read(1024 * 1024), b''):
+        digest.update(chunk)
+    f.seek(0)
+    return digest.hexdigest()
+
+
+def blob_name(sha256, original_name):
+    """Storage path of a blob: fanned out by the first two hex digits, original extension kept"""
+    ext = os.path.splitext(original_name)[1].lower()
+    return f'{BLOB_DIR}/{sha256[:2]}/{sha256}{ext}'
+
+
+def release_blob(blob_id, rendition_names=()):
+    """
+    Delete a blob, its file and renditions once no PropertyImage references it.
+
+    Called after a PropertyImage is deleted (image_delete or a property's
+    cascade). The reference count is the number of PropertyImage rows on the
+    indexed blob FK; blob.images uses PROTECT, so an upload that reuses the
+    blob concurrently makes the delete fail and the blob is kept.
+    """
+    if PropertyImage.objects.filter(blob_id=blob_id).exists():
+        return False
+    blob = ImageBlob.objects.filter(pk=blob_id).first()
+    if blob is None:
+        return False
+    try:
+        blob.delete()
+    except ProtectedError:
+        return False
+
+    storage = blob.file.storage
+    for name in (blob.file.name, *rendition_names):
+        if not name:
+            continue
+        try:
+            storage.delete(name)
+        except OSError:
+            logger.warning('Could not delete orphaned image file %s', name)
+    return True
@@ -0,0 +1,41 @@
+from .importer import BATCH_SIZE
+from .models import Property
+from .stats import track_stats
+
+PropertyTeam = Property.teams.through
+
+
+def assign_team(property_ids, team, clear_existing=False):
+    """
+    Link `team` to the given properties with set-based writes on the
+    Property.teams through table: one DELETE for the other teams (with
+    clear_existing) and one bulk INSERT of the missing links, in one
+    transaction. Returns (added, removed) link counts; links that already
+    existed are not counted as added.
+
+    Through-table writes send no m2m_changed, so PropertyStats is kept
+    current with track_stats(), which also provides the transaction.
+    """
+    property_ids = list(property_ids)
+    with track_stats(property_ids):
+        removed = 0
+        if clear_existing:
+            removed, _ = PropertyTeam.objects.filter(property_id__in=property_ids).exclude(team=team).delete()
+        linked = set(
+            PropertyTeam.objects.filter(property_id__in=property_ids, team=team).values_list('property_id', flat=True)
+        )
+        missing = [PropertyTeam(property_id=property_id, team=team)
+                   for property_id in property_ids if property_id not in linked]
+        # ignore_conflicts covers links added concurrently since the SELECT above;
+        # skipped rows are not reported, so count the links actually added
+        PropertyTeam.objects.bulk_create(missing, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        added = PropertyTeam.objects.filter(property_id__in=property_ids, team=team).count() - len(linked)
+    return added, removed
+
+
+def remove_team(property_ids, team):
+    """Unlink `team` from the given properties with one DELETE; returns the number of links removed"""
+    property_ids = list(property_ids)
+    with track_stats(property_ids):
+        removed, _ = PropertyTeam.objects.filter(property_id__in=property_ids, team=team).delete()
+    return removed
@@ -0,0 +1,35 @@
+import threading
+
+# Every CacheCounters created, in creation order (listed on the cache statistics page)
+_registry = []
+
+
+class CacheCounters:
+    """
+    Hit/miss counters of one cache in this process, safe to update from threads.
+
+    `extra` names further counters, e.g. invalidations. Instances register
+    themselves for all_cache_counters().
+    """
+
+    def __init__(self, label, *extra):
+        self.label = label
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(('hits', 'misses', *extra), 0)
+        _registry.append(self)
+
+    def count(self, stat, n=1):
+        with self._lock:
+            self._counts[stat] += n
+
+    def stats(self):
+        """The counters plus hit_rate (0.0 before the first lookup)"""
+        with self._lock:
+            stats = dict(self._counts)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+
+def all_cache_counters():
+    return list(_registry)
@@ -0,0 +1,38 @@
+import os
+import threading
+
+from django.db import connection
+
+_stats_lock = threading.Lock()
+_stats = {'requests': 0, 'reused': 0, 'opened': 0, 'connect_seconds': 0.0, 'max_connect_seconds': 0.0}
+
+
+def record_request():
+    """Count a request; it reuses the connection if one is still open after close_old_connections()"""
+    reused = connection.connection is not None
+    with _stats_lock:
+        _stats['requests'] += 1
+        _stats['reused'] += reused
+
+
+def record_opened():
+    """Count a new database connection (connection_created, any backend)"""
+    with _stats_lock:
+        _stats['opened'] += 1
+
+
+def record_connect(seconds):
+    """Time spent waiting for a new connection (timed by properties.postgresql)"""
+    with _stats_lock:
+        _stats['connect_seconds'] += seconds
+        _stats['max_connect_seconds'] = max(_stats['max_connect_seconds'], seconds)
+
+
+def connection_stats():
+    """Connection counters of this worker process"""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['pid'] = os.getpid()
+    stats['reuse_ratio'] = stats['reused'] / stats['requests'] if stats['requests'] else 0.0
+    stats['avg_connect_ms'] = 1000 * stats['connect_seconds'] / stats['opened'] if stats['opened'] else 0.0
+    return stats
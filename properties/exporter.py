@@ -0,0 +1,193 @@
+import csv
+import importlib.util
+import tempfile
+from itertools import islice
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+# Rows fetched per database round trip while streaming an export
+CHUNK_SIZE = 2000
+
+# Rows inspected to estimate column widths
+WIDTH_SAMPLE_ROWS = 200
+
+# ?format= value -> (file extension, content type)
+EXPORT_FORMATS = {
+    'xlsx': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'csv': ('csv', 'text/csv; charset=utf-8'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+
+HEADERS = [
+    'Number', 'Team', 'Address ID', 'Village', 'Street', 'House number', 'House number affix',
+    'Owner email', 'Owner name', 'Owner surname', 'Owner phone 1', 'Owner phone 2',
+    'PoP code', 'Gebaute Units', 'HBG', 'HBG Termin', 'Ausbau Termin',
+    'K.L 15M', 'K.L 20M', 'K.L 30M', 'K.L 50M', 'K.L 80M', 'K.L 100M',
+    'keller', 'HÜP', 'spleissen', 'ohne Infra', 'mit Infra', 'Status', 'Comments'
+]
+
+# Typed Parquet columns; every other header is a string column
+PARQUET_INT_HEADERS = (
+    'Gebaute Units', 'K.L 15M', 'K.L 20M', 'K.L 30M', 'K.L 50M', 'K.L 80M', 'K.L 100M',
+    'ohne Infra', 'mit Infra',
+)
+PARQUET_DATETIME_HEADERS = ('HBG Termin', 'Ausbau Termin')
+
+
+def format_datetime(value):
+    return value.strftime('%Y-%m-%d %H:%M') if value else ''
+
+
+def export_row(prop, format_date=format_datetime):
+    """Return the export values for a property, in HEADERS order"""
+    return (
+        prop.number,
+        prop.get_team_names(),
+        prop.address_id,
+        prop.village,
+        prop.street,
+        prop.house_number,
+        prop.house_number_affix,
+        prop.owner_email,
+        prop.owner_name,
+        prop.owner_surname,
+        prop.owner_phone_1,
+        prop.owner_phone_2,
+        prop.pop_code,
+        prop.gebaute_units,
+        prop.hbg,
+        format_date(prop.hbg_termin),
+        format_date(prop.ausbau_termin),
+        prop.kl_15m,
+        prop.kl_20m,
+        prop.kl_30m,
+        prop.kl_50m,
+        prop.kl_80m,
+        prop.kl_100m,
+        prop.keller,
+        prop.huep,
+        prop.spleissen,
+        prop.ohne_infra,
+        prop.mit_infra,
+        prop.get_status_display(),
+        prop.comments,
+    )
+
+
+def iter_export_rows(queryset, chunk_size=CHUNK_SIZE, format_date=format_datetime):
+    """Yield export rows without caching the queryset"""
+    # Teams are prefetched once per chunk instead of once per property
+    for prop in queryset.prefetch_related('teams').iterator(chunk_size=chunk_size):
+        yield export_row(prop, format_date)
+
+
+def estimate_column_widths(sample_rows):
+    """Estimate column widths from the header and a sample of rows"""
+    widths = [len(header) for header in HEADERS]
+    for row in sample_rows:
+        for i, value in enumerate(row):
+            if value is not None:
+                widths[i] = max(widths[i], len(str(value)))
+    return [min(width + 2, 50) for width in widths]
+
+
+def write_xlsx(rows, sample_rows=()):
+    """
+    Write rows to a temporary .xlsx file using a write-only workbook.
+
+    Rows are flushed to disk as they are appended, so memory use does not
+    grow with the number of exported properties. Returns the open file,
+    positioned at the start.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Properties")
+
+    for i, width in enumerate(estimate_column_widths(sample_rows), 1):
+        ws.column_dimensions[get_column_letter(i)].width = width
+
+    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+    header_font = Font(color="FFFFFF", bold=True)
+    header_alignment = Alignment(horizontal='center', vertical='center')
+    header_row = []
+    for header in HEADERS:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = header_alignment
+        header_row.append(cell)
+    ws.append(header_row)
+
+    for row in rows:
+        ws.append(row)
+
+    output = tempfile.TemporaryFile()
+    wb.save(output)
+    output.seek(0)
+    return output
+
+
+class Echo:
+    """File-like object that returns what is written, for streaming csv.writer output"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    """Yield CSV lines for the header and rows"""
+    writer = csv.writer(Echo())
+    # BOM so Excel opens the UTF-8 file with umlauts intact
+    yield '\ufeff' + writer.writerow(HEADERS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def sample_export_rows(queryset, size=WIDTH_SAMPLE_ROWS):
+    """Return the first rows of the export, used for column width estimation"""
+    return [export_row(prop) for prop in queryset.prefetch_related('teams')[:size]]
+
+
+def parquet_available():
+    """Parquet support needs the optional pyarrow package"""
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def parquet_schema():
+    import pyarrow as pa
+
+    def column_type(header):
+        if header in PARQUET_INT_HEADERS:
+            return pa.int64()
+        if header in PARQUET_DATETIME_HEADERS:
+            return pa.timestamp('us', tz='UTC')
+        return pa.string()
+
+    return pa.schema([(header, column_type(header)) for header in HEADERS])
+
+
+def write_parquet(rows, chunk_size=CHUNK_SIZE):
+    """
+    Write rows (with datetime values, see export_row) to a temporary Parquet file.
+
+    Columns use the HEADERS names with typed integer/timestamp columns, and
+    rows are written one row group per chunk so memory stays bounded.
+    Returns the open file, positioned at the start.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = parquet_schema()
+    output = tempfile.TemporaryFile()
+    rows = iter(rows)
+    with pq.ParquetWriter(output, schema) as writer:
+        for chunk in iter(lambda: list(islice(rows, chunk_size)), []):
+            columns = zip(*chunk)
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            ))
+    output.seek(0)
+    return output
@@ -0,0 +1,62 @@
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .access import get_user_properties
+from .counters import CacheCounters
+from .fragments import fragment_key
+from .models import COMPLETED_STATUSES, Property
+
+# Seconds facet counts live; writes also drop them through the team versions
+FACET_CACHE_TIMEOUT = 60
+
+facet_cache_counters = CacheCounters('Status/team facets')
+
+
+def compute_facets(user, team_ids, completed=False):
+    """
+    Status and team counts of the user's active (or completed) properties.
+
+    One grouped query: a row per status with its property count and one
+    conditional count per team. Properties linked to several teams count
+    once per status and once in each of their teams.
+    """
+    properties = get_user_properties(user)
+    if completed:
+        properties = properties.filter(status__in=COMPLETED_STATUSES)
+    else:
+        properties = properties.exclude(status__in=COMPLETED_STATUSES)
+    team_counts = {f'team_{team_id}': Count('id', filter=Q(teams=team_id), distinct=True) for team_id in team_ids}
+    statuses = {}
+    teams = dict.fromkeys(team_ids, 0)
+    for row in properties.order_by().values('status').annotate(
+            property_count=Count('id', distinct=True), **team_counts):
+        statuses[row['status']] = row['property_count']
+        for team_id in team_ids:
+            teams[team_id] += row[f'team_{team_id}']
+    return {'statuses': statuses, 'teams': teams, 'total': sum(statuses.values())}
+
+
+def property_facets(user, teams, completed=False):
+    """
+    Cached compute_facets() for the user's scope and the given teams.
+
+    Returns (statuses, teams, total) ready for the filter dropdowns:
+    (value, label, count) per selectable status of the list, and
+    (team, count) per team.
+    """
+    teams = list(teams)
+    team_ids = sorted(team.pk for team in teams)
+    key = fragment_key('facets', user, {'completed': completed, 'teams': ','.join(map(str, team_ids))})
+    facets = cache.get(key)
+    if facets is None:
+        facet_cache_counters.count('misses')
+        facets = compute_facets(user, team_ids, completed)
+        cache.set(key, facets, FACET_CACHE_TIMEOUT)
+    else:
+        facet_cache_counters.count('hits')
+    statuses = [
+        (value, label, facets['statuses'].get(value, 0))
+        for value, label in Property.STATUS_CHOICES
+        if value and (value in COMPLETED_STATUSES) == completed
+    ]
+    return statuses, [(team, facets['teams'].get(team.pk, 0)) for team in teams], facets['total']
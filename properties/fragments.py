@@ -0,0 +1,97 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils.translation import get_language
+
+from .access import get_user_team_ids
+from .counters import CacheCounters
+from .models import Property
+
+PropertyTeam = Property.teams.through
+
+# Seconds a rendered fragment lives; version bumps make it unreachable earlier
+FRAGMENT_CACHE_TIMEOUT = 60 * 60
+# Version of the superuser scope, which sees every property
+ALL_SCOPE = 'all'
+
+fragment_cache_counters = CacheCounters('Property list fragments', 'bumps')
+
+
+def _version_key(scope):
+    return f'fragments:version:{scope}'
+
+
+def _versions(scopes):
+    keys = [_version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Start from the clock, not 1: a counter lost to eviction must not
+            # come back with a value that old fragments were stored under
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def fragment_key(name, user, params):
+    """
+    Cache key of a fragment rendered for a user.
+
+    Superusers share the ALL_SCOPE version; other users are keyed on the
+    versions of their teams, so a change in one team leaves the fragments
+    of other teams valid. `params` are the request parameters the fragment
+    depends on.
+    """
+    scopes = [ALL_SCOPE] if user.is_superuser else sorted(get_user_team_ids(user))
+    parts = [name, get_language() or '', ','.join(map(str, scopes)),
+             ','.join(map(str, _versions(scopes))), *(f'{k}={v}' for k, v in sorted(params.items()))]
+    return f'fragments:{name}:' + hashlib.md5('\n'.join(parts).encode()).hexdigest()
+
+
+def get_fragment(key):
+    fragment = cache.get(key)
+    fragment_cache_counters.count('misses' if fragment is None else 'hits')
+    return fragment
+
+
+def set_fragment(key, fragment):
+    cache.set(key, fragment, FRAGMENT_CACHE_TIMEOUT)
+
+
+def _bump(scopes):
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+    fragment_cache_counters.count('bumps', len(scopes))
+
+
+def invalidate_teams(team_ids):
+    """
+    Bump the versions of the given teams and of the superuser scope.
+
+    Inside a transaction the bump is repeated on commit, so a fragment
+    rendered from the old rows in the meantime is not served afterwards.
+    """
+    scopes = [ALL_SCOPE, *sorted(set(team_ids))]
+    _bump(scopes)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _bump(scopes))
+
+
+def invalidate_properties(property_ids, team_ids=()):
+    """Invalidate the fragments showing the given properties (and of extra teams, e.g. unlinked ones)"""
+    property_ids = list(property_ids)
+    current = PropertyTeam.objects.filter(property_id__in=property_ids).values_list('team_id', flat=True) \
+        if property_ids else []
+    invalidate_teams({*team_ids, *current})
+
+
+def invalidate_snapshots(*snapshots):
+    """Invalidate the fragments of every team in stats snapshots (see stats.snapshot)"""
+    invalidate_teams({team_id for entries in snapshots for _, _, team_ids in entries.values()
+                      for team_id in team_ids})
@@ -0,0 +1,110 @@
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, connection, transaction
+from PIL import Image, ImageOps, features
+
+from .models import ImageBlob, PropertyImage
+
+logger = logging.getLogger(__name__)
+
+# field name -> bounding box of the rendition
+RENDITION_SIZES = {
+    'thumbnail': (320, 320),
+    'web_image': (1600, 1600),
+}
+
+RENDITION_FORMAT, RENDITION_EXT = ('WEBP', 'webp') if features.check('webp') else ('JPEG', 'jpg')
+RENDITION_QUALITY = 80
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'IMAGE_RENDITION_WORKERS', 2),
+                thread_name_prefix='image-renditions',
+            )
+        return _executor
+
+
+def build_renditions(image, rebuild=False):
+    """
+    Create the thumbnail and web-size renditions of a PropertyImage.
+
+    Builds of the same content are serialized on the ImageBlob row (and of
+    the same image on its own row), so two images uploaded concurrently
+    with one blob share one set of files instead of each writing its own,
+    and an image built twice keeps the files of the first build unless
+    `rebuild` is set.
+    """
+    with transaction.atomic():
+        if image.blob_id:
+            list(ImageBlob.objects.select_for_update().filter(pk=image.blob_id).values_list('pk'))
+        current = PropertyImage.objects.select_for_update().filter(pk=image.pk).values(*RENDITION_SIZES).first()
+        if current is None:
+            return  # deleted meanwhile
+        if current['thumbnail'] and not rebuild:
+            return  # built by a concurrent run
+        if image.blob_id:
+            # Another image with the same content already has renditions: share them
+            sibling = (PropertyImage.objects.filter(blob_id=image.blob_id).exclude(pk=image.pk)
+                       .exclude(thumbnail='').values(*RENDITION_SIZES).first())
+            if sibling:
+                for field in RENDITION_SIZES:
+                    setattr(image, field, sibling[field])
+                image.save(update_fields=list(RENDITION_SIZES))
+                return
+        with image.image.open('rb') as f:
+            with Image.open(f) as original:
+                # Phone photos are stored sideways with an EXIF rotation flag
+                source = ImageOps.exif_transpose(original)
+                if source.mode not in ('RGB', 'L'):
+                    source = source.convert('RGB')
+                base_name = os.path.splitext(os.path.basename(image.image.name))[0]
+                for field, size in RENDITION_SIZES.items():
+                    rendition = source.copy()
+                    rendition.thumbnail(size, Image.LANCZOS)
+                    buffer = io.BytesIO()
+                    rendition.save(buffer, RENDITION_FORMAT, quality=RENDITION_QUALITY)
+                    # The storage picks a free name, so an existing file is never overwritten
+                    getattr(image, field).save(
+                        f'{base_name}.{RENDITION_EXT}', ContentFile(buffer.getvalue()), save=False,
+                    )
+        image.save(update_fields=list(RENDITION_SIZES))
+
+
+def build_renditions_by_id(image_id, rebuild=False):
+    """Thread-pool entry point: build renditions, log failures, release the connection"""
+    close_old_connections()
+    try:
+        image = PropertyImage.objects.filter(pk=image_id).first()
+        if image is not None:
+            build_renditions(image, rebuild)
+    except Exception:
+        logger.exception('Building renditions for PropertyImage %s failed', image_id)
+    finally:
+        # Worker threads get their own connection; do not leave it open
+        connection.close()
+
+
+def schedule_renditions(image_id):
+    """
+    Build renditions for an image once the current transaction commits.
+
+    Runs on a background thread pool so uploads return immediately; set
+    IMAGE_RENDITIONS_ASYNC = False to build inline (tests, management commands).
+    """
+    if getattr(settings, 'IMAGE_RENDITIONS_ASYNC', True):
+        transaction.on_commit(lambda: _get_executor().submit(build_renditions_by_id, image_id))
+    else:
+        transaction.on_commit(lambda: build_renditions(PropertyImage.objects.get(pk=image_id)))
@@ -0,0 +1,522 @@
+from collections import Counter, defaultdict
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from .fragments import invalidate_snapshots
+from .models import ImportCheckpoint, Property, Team
+from .stats import apply_changes, snapshot
+
+# Number of rows written per bulk statement / transaction
+BATCH_SIZE = 500
+
+# Excel column -> Property field, with the value parser for each column
+TEXT_COLUMNS = {
+    'address_id': 'Address ID',
+    'village': 'Village',
+    'street': 'Street',
+    'house_number': 'House number',
+    'house_number_affix': 'House number affix',
+    'owner_email': 'Owner email',
+    'owner_name': 'Owner name',
+    'owner_surname': 'Owner surname',
+    'owner_phone_1': 'Owner phone 1',
+    'owner_phone_2': 'Owner phone 2',
+    'pop_code': 'PoP code',
+    'hbg': 'HBG',
+    'keller': 'keller',
+    'huep': 'HÜP',
+    'spleissen': 'spleissen',
+    'status': 'Status',
+    'comments': 'Comments',
+}
+
+# Alternative sheet headers accepted for a column (older web import template)
+COLUMN_ALIASES = {
+    'HNA': 'House number affix',
+}
+
+# Integer columns with the default used when the cell is empty
+INT_COLUMNS = {
+    'gebaute_units': ('Gebaute Units', None),
+    'kl_15m': ('K.L 15M', 0),
+    'kl_20m': ('K.L 20M', 0),
+    'kl_30m': ('K.L 30M', 0),
+    'kl_50m': ('K.L 50M', 0),
+    'kl_80m': ('K.L 80M', 0),
+    'kl_100m': ('K.L 100M', 0),
+    'ohne_infra': ('ohne Infra', 0),
+    'mit_infra': ('mit Infra', 0),
+}
+
+DATETIME_COLUMNS = {
+    'hbg_termin': 'HBG Termin',
+    'ausbau_termin': 'Ausbau Termin',
+}
+
+# Fields written on create/update (everything except the `number` key)
+PROPERTY_FIELDS = list(TEXT_COLUMNS) + list(INT_COLUMNS) + list(DATETIME_COLUMNS)
+
+# Changed rows kept with their field values in a dry-run plan
+PLAN_SAMPLE_SIZE = 200
+
+PropertyTeam = Property.teams.through
+
+
+def _present(column):
+    """Mask of cells that hold a value (not NaN/None and not an empty string)"""
+    return column.notna() & (column.astype(object) != '')
+
+
+def _text_column(column):
+    """
+    Strip a column to text; empty cells become ''.
+
+    Whole numbers in float columns (integer columns with blank cells, as
+    pandas reads them from .xls/.csv) are written without ".0", so a
+    number reads the same wherever it comes from.
+    """
+    present = _present(column)
+    if pd.api.types.is_float_dtype(column):
+        whole = present & np.isfinite(column) & (column % 1 == 0)
+        text = column.astype(object).where(~whole, column.where(whole, 0).astype('int64'))
+        return text.where(present, '').astype(str).str.strip()
+    return column.where(present, '').astype(str).str.strip()
+
+
+def _int_column(column, default):
+    """
+    Convert a column to Python ints, truncating decimals.
+
+    Cells that are empty or not numeric get `default`.
+    """
+    if not pd.api.types.is_numeric_dtype(column):
+        column = column.astype(str).str.strip()
+    numeric = pd.to_numeric(column, errors='coerce').astype(float)
+    valid = np.isfinite(numeric)
+    values = numeric.where(valid, 0).astype('int64')
+    if default is not None:
+        return values.where(valid, default)
+    return values.astype(object).where(valid, None)
+
+
+def _datetime_column(column):
+    """
+    Convert a column to aware datetimes (current timezone for naive values).
+
+    Datetime cells are kept as they are, text cells are read as YYYY-MM-DD
+    (anything after the first space is ignored); everything else is None.
+    """
+    if pd.api.types.is_datetime64_any_dtype(column):
+        parsed = column
+    else:
+        column = column.astype(object)
+        kinds = column.map(type)
+        is_stamp = kinds.isin([datetime, pd.Timestamp])
+        is_text = kinds.isin([str])
+        text = column.where(is_text, '').astype(str).str.strip().str.split(n=1).str[0]
+        parsed = pd.to_datetime(text.where(is_text), format='%Y-%m-%d', errors='coerce')
+        if is_stamp.any():
+            stamps = pd.to_datetime(column.where(is_stamp), errors='coerce')
+            parsed = stamps.where(is_stamp, parsed)
+    if parsed.dt.tz is None:
+        parsed = parsed.dt.tz_localize(timezone.get_current_timezone(),
+                                       ambiguous='NaT', nonexistent='shift_forward')
+    values = pd.Series(list(parsed.dt.to_pydatetime()), index=parsed.index, dtype=object)
+    return values.where(parsed.notna(), None)
+
+
+def normalize_columns(df):
+    """
+    Normalise a sheet to one column per Property field, whole columns at a time.
+
+    Returns a dict of Series: `row_number`, `number`, `team` and the
+    PROPERTY_FIELDS columns, holding plain Python values ready for the
+    model. Missing sheet columns get the field's empty value.
+    """
+    df = df.rename(columns={alias: column for alias, column in COLUMN_ALIASES.items()
+                            if column not in df.columns})
+    empty = pd.Series([None] * len(df), index=df.index, dtype=object)
+
+    def column(name):
+        return df[name] if name in df.columns else empty
+
+    columns = {
+        'row_number': pd.Series(df.index + 2, index=df.index),  # header is row 1
+        'number': _text_column(column('Number')),
+        'team': _text_column(column('Team')),
+    }
+    for field, name in TEXT_COLUMNS.items():
+        columns[field] = _text_column(column(name))
+    for field, (name, default) in INT_COLUMNS.items():
+        columns[field] = _int_column(column(name), default)
+    for field, name in DATETIME_COLUMNS.items():
+        columns[field] = _datetime_column(column(name))
+    return columns
+
+
+def iter_dataframe_rows(df):
+    """Yield (row_number, number, property_data, team_names) for each sheet row"""
+    columns = normalize_columns(df)
+    # Zipping the column lists is the itertuples() loop without building a frame
+    rows = zip(*(series.tolist() for series in columns.values()))
+    for row_number, number, team, *values in rows:
+        yield row_number, number, dict(zip(PROPERTY_FIELDS, values)), team
+
+
+class ImportResult:
+    """Counters, error messages and the change plan collected during an import"""
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.skipped = 0
+        self.error_count = 0
+        self.errors = []
+        # Existing rows whose sheet values differ (including skipped ones)
+        self.changed_rows = 0
+        self.field_changes = Counter()
+        self.changes = []
+
+    @property
+    def processed(self):
+        return self.created + self.updated + self.unchanged + self.skipped + self.error_count
+
+    def add_error(self, message, count=True):
+        """Record an error message; warnings are recorded without counting"""
+        if count:
+            self.error_count += 1
+        self.errors.append(message)
+
+    def add_change(self, row_number, number, diff):
+        """Record the field differences of an existing property"""
+        self.changed_rows += 1
+        self.field_changes.update(diff.keys())
+        if len(self.changes) < PLAN_SAMPLE_SIZE:
+            self.changes.append({
+                'row': row_number,
+                'number': number,
+                'fields': {field: [_plan_value(old), _plan_value(new)] for field, (old, new) in diff.items()},
+            })
+
+    def to_state(self):
+        """Counters and errors as stored on an ImportCheckpoint"""
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'skipped': self.skipped,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        result = cls()
+        for key, value in state.items():
+            setattr(result, key, value)
+        return result
+
+    def plan(self):
+        """JSON-serialisable summary of the changes, stored on dry-run jobs"""
+        return {
+            'changed_rows': self.changed_rows,
+            'field_changes': dict(self.field_changes.most_common()),
+            'changes': self.changes,
+        }
+
+
+def _plan_value(value):
+    if isinstance(value, datetime):
+        return timezone.localtime(value).strftime('%Y-%m-%d %H:%M')
+    if isinstance(value, (set, frozenset)):
+        return ', '.join(sorted(value))
+    return value
+
+
+def start_checkpoint(file_hash, file_name='', force_replace=False, default_team=None):
+    """
+    Return the checkpoint of an import of the file with this SHA-256.
+
+    An unfinished checkpoint left by an earlier run with the same options is
+    returned as is, so import_properties resumes after its last_row; with
+    different options the import starts over.
+    """
+    team_id = default_team.id if default_team else None
+    checkpoint, created = ImportCheckpoint.objects.get_or_create(
+        file_hash=file_hash,
+        defaults={'file_name': file_name, 'force_replace': force_replace, 'default_team_id': team_id},
+    )
+    if not created and (checkpoint.force_replace, checkpoint.default_team_id) != (force_replace, team_id):
+        checkpoint.force_replace = force_replace
+        checkpoint.default_team_id = team_id
+        checkpoint.last_row = 0
+        checkpoint.state = {}
+        checkpoint.save()
+    return checkpoint
+
+
+def import_properties(rows, force_replace=False, default_team=None, batch_size=BATCH_SIZE,
+                      progress=None, dry_run=False, checkpoint=None):
+    """
+    Create/update properties from parsed sheet rows using set-based writes.
+
+    Existing numbers and team names are loaded with one query each, new
+    properties are written with bulk_create and team links with a bulk
+    insert into the Property.teams through table.
+
+    Rows for existing properties are compared field by field (and by team
+    set) against the database, loaded with one query per batch. With
+    force_replace only rows that differ are written with bulk_update;
+    identical rows are counted as unchanged and keep their updated_at.
+
+    With dry_run nothing is written: the result holds the counts the import
+    would produce plus the per-field changes (see ImportResult.plan), also
+    for rows that are skipped because force_replace is off.
+
+    Rows are consumed as a stream and handled every `batch_size` pending
+    properties, so only one batch of row data is held at a time.
+
+    Each batch (creates, updates, team links) is written in one
+    transaction, with row-level fallbacks in savepoints. If a `checkpoint`
+    (see start_checkpoint) is given, its row position and the counters are
+    saved in the same transaction; rows up to checkpoint.last_row are
+    skipped, and the checkpoint is deleted once all rows are written.
+
+    `progress`, if given, is called as progress(result, written) after each
+    batch, where `written` is the number of rows handled so far.
+    """
+    resume_after = checkpoint.last_row if checkpoint is not None else 0
+    result = ImportResult.from_state(checkpoint.state) if resume_after else ImportResult()
+    report = _progress_reporter(result, progress)
+    existing_ids = dict(Property.objects.values_list('number', 'id'))
+    team_ids = dict(Team.objects.values_list('name', 'id'))
+    sheet_numbers = set()  # numbers created by this sheet, including written batches
+    compare_existing = force_replace or dry_run
+
+    to_create = {}   # number -> (row_number, data)
+    to_compare = {}  # number -> (row_number, data), existing properties
+    team_links = {}  # number -> set of team ids (replaces current teams)
+
+    last_row = resume_after
+
+    def flush():
+        if not (to_create or to_compare):
+            return
+        with transaction.atomic():
+            to_update = _diff_existing(to_compare, team_links, existing_ids, team_ids, result, force_replace)
+            if dry_run:
+                report(len(to_create) + len(to_compare))
+            else:
+                # Bulk writes send no signals; move PropertyStats and drop the list
+                # fragments by the batch's before/after
+                touched = {*to_update, *team_links}
+                stats_before = snapshot(existing_ids[number] for number in touched if number in existing_ids)
+                _write_creates(to_create, existing_ids, result, batch_size, report)
+                _write_updates(to_update, existing_ids, result, batch_size, report)
+                report(len(to_compare) - len(to_update))
+                _write_team_links(team_links, existing_ids, batch_size)
+                touched.update(to_create)
+                stats_after = snapshot(existing_ids[number] for number in touched if number in existing_ids)
+                apply_changes(stats_before, stats_after)
+                invalidate_snapshots(stats_before, stats_after)
+                if checkpoint is not None:
+                    checkpoint.last_row = last_row
+                    checkpoint.state = result.to_state()
+                    checkpoint.save(update_fields=['last_row', 'state', 'updated_at'])
+        to_create.clear()
+        to_compare.clear()
+        team_links.clear()
+
+    report(0)
+    for row_number, number, data, team_names_str in rows:
+        if row_number <= resume_after:
+            continue
+        last_row = row_number
+        if not number:
+            result.add_error(f"Row {row_number}: ❌ Missing 'Number' field (required)")
+            continue
+
+        created = number not in existing_ids and number not in sheet_numbers
+        if not created and not compare_existing:
+            result.skipped += 1
+            continue
+
+        if created:
+            to_create[number] = (row_number, data)
+            sheet_numbers.add(number)
+            result.created += 1
+        elif number in to_create or number not in existing_ids:
+            # Repeated row for a property created by this sheet: last row wins.
+            # The first row may sit in an earlier batch that was not written
+            # (dry run) or whose insert failed, so the number is not stored.
+            if not force_replace:
+                result.skipped += 1
+                continue
+            to_create[number] = (row_number, data)
+            result.updated += 1
+        else:
+            if number in to_compare:
+                # Repeated row for an existing property: the earlier row is superseded
+                result.skipped += 1
+            to_compare[number] = (row_number, data)
+
+        if team_names_str:
+            resolved = set()
+            for team_name in (name.strip() for name in team_names_str.split(',')):
+                if not team_name:
+                    continue
+                if team_name in team_ids:
+                    resolved.add(team_ids[team_name])
+                else:
+                    result.add_error(
+                        f"Row {row_number}: ⚠️ Team '{team_name}' not found for property {number}",
+                        count=False,
+                    )
+            team_links[number] = resolved
+        elif default_team and created:
+            # Use default team only for new properties
+            team_links[number] = {default_team.id}
+
+        if len(to_create) + len(to_compare) >= batch_size:
+            flush()
+
+    flush()
+    if checkpoint is not None and not dry_run:
+        checkpoint.delete()
+    return result
+
+
+def _diff_existing(to_compare, team_links, existing_ids, team_ids, result, force_replace):
+    """
+    Compare sheet rows of existing properties with the database.
+
+    Returns {number: (row_number, data, changed_fields)} for rows to write.
+    Team links of existing properties whose team set did not change are
+    dropped from `team_links`, so only real changes are rewritten.
+    """
+    if not to_compare:
+        return {}
+    ids = {existing_ids[number]: number for number in to_compare}
+    current = {row.pop('id'): row for row in Property.objects.filter(id__in=ids).values('id', *PROPERTY_FIELDS)}
+    current_teams = defaultdict(set)
+    for property_id, team_id in PropertyTeam.objects.filter(property_id__in=ids).values_list('property_id', 'team_id'):
+        current_teams[property_id].add(team_id)
+    team_names = {team_id: name for name, team_id in team_ids.items()}
+
+    to_update = {}
+    for number, (row_number, data) in to_compare.items():
+        property_id = existing_ids[number]
+        old = current.get(property_id, {})
+        diff = {field: (old.get(field), value) for field, value in data.items() if old.get(field) != value}
+        changed_fields = list(diff)
+        if number in team_links:
+            if team_links[number] == current_teams[property_id]:
+                del team_links[number]
+            else:
+                diff['teams'] = (
+                    {team_names.get(team_id, str(team_id)) for team_id in current_teams[property_id]},
+                    {team_names.get(team_id, str(team_id)) for team_id in team_links[number]},
+                )
+        if not force_replace:
+            team_links.pop(number, None)
+            result.skipped += 1
+        elif diff:
+            to_update[number] = (row_number, data, changed_fields)
+            result.updated += 1
+        else:
+            result.unchanged += 1
+        if diff:
+            result.add_change(row_number, number, diff)
+    return to_update
+
+
+def _progress_reporter(result, progress):
+    written = 0
+
+    def report(count):
+        nonlocal written
+        written += count
+        if progress is not None:
+            progress(result, written)
+    return report
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _write_creates(to_create, existing_ids, result, batch_size, report):
+    for batch in _chunks(list(to_create.items()), batch_size):
+        objs = [Property(number=number, **data) for number, (_, data) in batch]
+        try:
+            with transaction.atomic():
+                Property.objects.bulk_create(objs, batch_size=batch_size)
+        except DatabaseError:
+            # Fall back to row-by-row inserts to report the failing rows
+            objs = []
+            for number, (row_number, data) in batch:
+                obj = Property(number=number, **data)
+                try:
+                    with transaction.atomic():
+                        Property.objects.bulk_create([obj])
+                    objs.append(obj)
+                except DatabaseError as e:
+                    result.created -= 1
+                    result.add_error(f"Row {row_number} (Number: {number}): ❌ {e}")
+
+        if objs and objs[0].pk is None:
+            # Backend did not return primary keys from the bulk insert
+            numbers = [obj.number for obj in objs]
+            existing_ids.update(Property.objects.filter(number__in=numbers).values_list('number', 'id'))
+        else:
+            existing_ids.update((obj.number, obj.pk) for obj in objs)
+        report(len(batch))
+
+
+def _write_updates(to_update, existing_ids, result, batch_size, report):
+    now = timezone.now()
+    for batch in _chunks(list(to_update.items()), batch_size):
+        # Only the fields that differ in this batch are written
+        fields = sorted({field for _, (_, _, changed) in batch for field in changed}) + ['updated_at']
+        objs = [
+            Property(id=existing_ids[number], number=number, updated_at=now, **data)
+            for number, (_, data, _) in batch
+        ]
+        try:
+            with transaction.atomic():
+                Property.objects.bulk_update(objs, fields, batch_size=batch_size)
+        except DatabaseError:
+            for obj, (number, (row_number, _, _)) in zip(objs, batch):
+                try:
+                    with transaction.atomic():
+                        Property.objects.bulk_update([obj], fields)
+                except DatabaseError as e:
+                    result.updated -= 1
+                    result.add_error(f"Row {row_number} (Number: {number}): ❌ {e}")
+        report(len(batch))
+
+
+def _write_team_links(team_links, existing_ids, batch_size):
+    links = [
+        (existing_ids[number], team_set)
+        for number, team_set in team_links.items()
+        if number in existing_ids
+    ]
+    with transaction.atomic():
+        for batch in _chunks([prop_id for prop_id, _ in links], batch_size):
+            PropertyTeam.objects.filter(property_id__in=batch).delete()
+        PropertyTeam.objects.bulk_create(
+            [
+                PropertyTeam(property_id=prop_id, team_id=team_id)
+                for prop_id, team_set in links
+                for team_id in team_set
+            ],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
@@ -0,0 +1,112 @@
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .blobs import hash_file
+from .importer import import_properties, start_checkpoint
+from .models import ImportJob
+from .readers import open_import_file
+
+# Minimum number of rows between two progress writes to the job row
+PROGRESS_EVERY = 500
+
+
+def fail_stale_jobs():
+    """
+    Mark jobs running for longer than IMPORT_JOB_TIMEOUT as failed.
+
+    Their worker died (killed, server restart) without recording an
+    outcome. They are not requeued, so a file that kills the worker cannot
+    loop; uploading it again resumes after the last written batch from its
+    checkpoint. A slow job that is in fact still running overwrites the
+    status when it finishes. Returns the number of jobs marked failed.
+    """
+    timeout = getattr(settings, 'IMPORT_JOB_TIMEOUT', 2 * 60 * 60)
+    return ImportJob.objects.filter(
+        status=ImportJob.STATUS_RUNNING,
+        started_at__lt=timezone.now() - timedelta(seconds=timeout),
+    ).update(
+        status=ImportJob.STATUS_FAILED,
+        finished_at=timezone.now(),
+        message=f'Import worker stopped before finishing (no result after {timeout // 60} minutes). '
+                'Upload the file again to resume after the last written batch.',
+    )
+
+
+def claim_next_job():
+    """Atomically move the oldest pending job to running and return it"""
+    fail_stale_jobs()
+    for job in ImportJob.objects.filter(status=ImportJob.STATUS_PENDING).order_by('created_at', 'pk'):
+        claimed = ImportJob.objects.filter(pk=job.pk, status=ImportJob.STATUS_PENDING).update(
+            status=ImportJob.STATUS_RUNNING,
+            started_at=timezone.now(),
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def _store_result(job, result):
+    job.created_count = result.created
+    job.updated_count = result.updated
+    job.unchanged_count = result.unchanged
+    job.skipped_count = result.skipped
+    job.error_count = result.error_count
+    job.errors = result.errors
+    job.plan = result.plan()
+
+
+def process_import_job(job):
+    """Run the import for a claimed job, saving progress as batches are written"""
+    progress_fields = [
+        'processed_rows', 'created_count', 'updated_count', 'unchanged_count',
+        'skipped_count', 'error_count', 'errors', 'plan',
+    ]
+    last_saved = 0
+
+    def progress(result, written):
+        nonlocal last_saved
+        processed = result.processed
+        if processed - last_saved < PROGRESS_EVERY and processed < job.total_rows:
+            return
+        last_saved = processed
+        job.processed_rows = processed
+        _store_result(job, result)
+        job.save(update_fields=progress_fields)
+
+    try:
+        with job.file.open('rb') as excel_file:
+            checkpoint = None
+            if not job.dry_run:
+                # An earlier run of the same file that died resumes after its last batch
+                checkpoint = start_checkpoint(
+                    hash_file(excel_file), job.original_name, job.force_replace, job.default_team,
+                )
+                job.resumed_from_row = checkpoint.last_row
+            with open_import_file(excel_file, job.file.name) as reader:
+                job.total_rows = reader.total_rows or 0
+                job.save(update_fields=['total_rows', 'resumed_from_row'])
+
+                result = import_properties(
+                    reader.iter_rows(),
+                    force_replace=job.force_replace,
+                    default_team=job.default_team,
+                    progress=progress,
+                    dry_run=job.dry_run,
+                    checkpoint=checkpoint,
+                )
+        job.processed_rows = result.processed
+        job.total_rows = max(job.total_rows, job.processed_rows)
+        _store_result(job, result)
+        job.status = ImportJob.STATUS_DONE
+    except Exception as e:
+        traceback.print_exc()
+        job.status = ImportJob.STATUS_FAILED
+        job.message = f'Import failed: {e}'
+
+    job.finished_at = timezone.now()
+    job.save()
+    return job
@@ -0,0 +1,98 @@
+import os
+import tempfile
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from properties.exporter import iter_csv, iter_export_rows, parquet_available, write_parquet, write_xlsx
+from properties.models import Property
+from properties.readers import open_import_file
+
+
+def export_xlsx(queryset):
+    return write_xlsx(iter_export_rows(queryset))
+
+
+def export_csv(queryset):
+    # The view streams these lines to the client; a temp file stands in for the socket
+    output = tempfile.TemporaryFile()
+    for line in iter_csv(iter_export_rows(queryset)):
+        output.write(line.encode('utf-8'))
+    return output
+
+
+def export_parquet(queryset):
+    return write_parquet(iter_export_rows(queryset, format_date=lambda value: value))
+
+
+class Command(BaseCommand):
+    help = ('Compare wall time and peak Python memory of exporting and parsing XLSX, CSV '
+            'and Parquet files (seeded properties are rolled back)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', default='10000,100000', help='Comma-separated row counts')
+        parser.add_argument('--skip-memory', action='store_true',
+                            help='Only time the runs (memory tracing slows XLSX down a lot)')
+
+    def handle(self, *args, **options):
+        self.skip_memory = options['skip_memory']
+        formats = {'xlsx': export_xlsx, 'csv': export_csv}
+        if parquet_available():
+            formats['parquet'] = export_parquet
+        else:
+            self.stdout.write('⚠️  pyarrow not installed, skipping Parquet')
+
+        for rows in (int(value) for value in options['rows'].split(',')):
+            with transaction.atomic():
+                self.seed(rows)
+                queryset = Property.objects.order_by('pk')
+                self.stdout.write(f"\n{rows} rows\n{'Format':<10}{'export s':>10}{'export MB':>11}"
+                                  f"{'file MB':>9}{'import s':>10}{'import MB':>11}")
+                for name, export in formats.items():
+                    self.run_format(name, export, queryset)
+                transaction.set_rollback(True)
+
+    def seed(self, rows):
+        Property.objects.bulk_create(
+            (Property(number=f'BENCH-{i}', village=f'Dorf {i % 500}', street='Hauptstraße',
+                      owner_name='Muster', kl_15m=i % 7, comments='Kommentar ' * 3)
+             for i in range(rows)),
+            batch_size=5000,
+        )
+
+    def run_format(self, name, export, queryset):
+        export_time, export_mb, output = self.measure(lambda: export(queryset))
+        output.seek(0, os.SEEK_END)
+        file_mb = output.tell() / 1024 / 1024
+
+        def parse():
+            output.seek(0)
+            with open_import_file(output, f'bench.{name}') as reader:
+                return sum(1 for _ in reader.iter_rows())
+
+        import_time, import_mb, _ = self.measure(parse)
+        output.close()
+        self.stdout.write(f'{name:<10}{export_time:>10.2f}{self.format_mb(export_mb)}{file_mb:>9.1f}'
+                          f'{import_time:>10.2f}{self.format_mb(import_mb)}')
+
+    def measure(self, run):
+        """Time one untraced run, then trace a second run for peak memory"""
+        start = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - start
+        if self.skip_memory:
+            return elapsed, None, result
+        if hasattr(result, 'close'):
+            result.close()
+        tracemalloc.start()
+        try:
+            result = run()
+            peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        finally:
+            tracemalloc.stop()
+        return elapsed, peak, result
+
+    def format_mb(self, value):
+        return f'{value:>11.1f}' if value is not None else f"{'-':>11}"
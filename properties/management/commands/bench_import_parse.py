@@ -0,0 +1,88 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from properties.importer import DATETIME_COLUMNS, INT_COLUMNS, TEXT_COLUMNS, iter_dataframe_rows
+
+
+def _cell(value, default=''):
+    if value is None or value == '' or pd.isna(value):
+        return default
+    return value
+
+
+def _legacy_str(value):
+    value = _cell(value)
+    return str(value).strip() if value != '' else ''
+
+
+def _legacy_int(value, default):
+    value = _cell(value, None)
+    if value is None:
+        return default
+    try:
+        return int(float(value))
+    except (ValueError, TypeError, OverflowError):
+        return default
+
+
+def _legacy_datetime(value):
+    value = _cell(value, None)
+    try:
+        if isinstance(value, str):
+            dt = datetime.strptime(value.split()[0], '%Y-%m-%d')
+        elif hasattr(value, 'to_pydatetime'):
+            dt = value.to_pydatetime()
+        else:
+            return None
+        return timezone.make_aware(dt) if timezone.is_naive(dt) else dt
+    except (ValueError, TypeError, OverflowError, IndexError):
+        return None
+
+
+def legacy_rows(df):
+    """The former cell-by-cell parser over iterrows(), kept as the baseline"""
+    for idx, row in df.iterrows():
+        data = {field: _legacy_str(row.get(column)) for field, column in TEXT_COLUMNS.items()}
+        for field, (column, default) in INT_COLUMNS.items():
+            data[field] = _legacy_int(row.get(column), default)
+        for field, column in DATETIME_COLUMNS.items():
+            data[field] = _legacy_datetime(row.get(column))
+        yield idx + 2, _legacy_str(row.get('Number')), data, _legacy_str(row.get('Team'))
+
+
+class Command(BaseCommand):
+    help = 'Time the parse stage of the Excel import: cell-by-cell iterrows vs column-wise normalisation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50000, help='Sheet rows to generate')
+
+    def handle(self, *args, **options):
+        df = self.build_sheet(options['rows'])
+        self.stdout.write(f'Parsing {len(df)} rows x {len(df.columns)} columns')
+
+        timings = {}
+        for name, parse in (('iterrows (legacy)', legacy_rows), ('column-wise', iter_dataframe_rows)):
+            start = time.perf_counter()
+            rows = sum(1 for _ in parse(df))
+            timings[name] = (time.perf_counter() - start) * 1000
+            self.stdout.write(f'{name:<20}{timings[name]:>12.1f} ms  ({rows} rows)')
+
+        speedup = timings['iterrows (legacy)'] / timings['column-wise'] if timings['column-wise'] else 0
+        self.stdout.write(f'✅ Column-wise parsing is {speedup:.1f}x faster')
+
+    def build_sheet(self, rows):
+        start = datetime(2024, 1, 1)
+        data = {'Number': [f'BENCH-{i}' for i in range(rows)], 'Team': ['Team A'] * rows}
+        for column in TEXT_COLUMNS.values():
+            data[column] = [random.choice(['', 'text', ' padded ', None]) for _ in range(rows)]
+        for column, _ in INT_COLUMNS.values():
+            data[column] = [random.choice([None, 1, 2.0, 15]) for _ in range(rows)]
+        for column in DATETIME_COLUMNS.values():
+            data[column] = [start + timedelta(days=random.randint(0, 365)) if random.random() < 0.7 else None
+                            for _ in range(rows)]
+        return pd.DataFrame(data)
@@ -0,0 +1,126 @@
+import random
+import statistics
+import sys
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from properties.models import COMPLETED_STATUSES, Property, hbg_priority_expression
+
+STATUSES = [value for value, _ in Property.STATUS_CHOICES]
+
+
+class Command(BaseCommand):
+    help = ('Seed properties inside a rolled-back transaction and time the list/completed queries '
+            'with EXPLAIN plans. With --drop-indexes the Property indexes are dropped for a '
+            '"before" run and re-created: on PostgreSQL this holds an ACCESS EXCLUSIVE lock on the '
+            'property table until the run ends, blocking every request that reads it. Only use it '
+            'on a copy of the database, never on production.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Properties to seed')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query')
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--drop-indexes', action='store_true',
+                            help='Also measure without the Property indexes (locks the table, see above)')
+        parser.add_argument('--yes', action='store_true',
+                            help='Do not ask for confirmation before locking a PostgreSQL table')
+
+    def confirm_lock(self, options):
+        """Dropping indexes locks the live table on PostgreSQL; SQLite copies are local"""
+        if connection.vendor == 'sqlite' or options['yes']:
+            return
+        database = connection.settings_dict['NAME']
+        if not sys.stdin.isatty():
+            raise CommandError(f'--drop-indexes locks {Property._meta.db_table} on {database}; '
+                               'pass --yes to confirm this is not a production database')
+        answer = input(f'This locks {Property._meta.db_table} on database "{database}" for the whole run. '
+                       'Type "yes" to continue: ')
+        if answer != 'yes':
+            raise CommandError('Cancelled.')
+
+    def handle(self, *args, **options):
+        drop_indexes = options['drop_indexes']
+        if drop_indexes:
+            self.confirm_lock(options)
+        self.repeat = options['repeat']
+        page_size = options['page_size']
+        queries = {
+            'list first page': lambda: Property.objects.exclude(status__in=COMPLETED_STATUSES)
+                .annotate(hbg_priority=hbg_priority_expression())
+                .order_by('hbg_priority', 'ausbau_termin', 'id')[:page_size],
+            'completed first page': lambda: Property.objects.filter(status__in=COMPLETED_STATUSES)
+                .order_by('-updated_at', '-id')[:page_size],
+            'completed by status': lambda: Property.objects.filter(status='bezahlt')
+                .order_by('-updated_at')[:page_size],
+        }
+
+        # SQLite can only run schema changes in a transaction with FK checks off
+        connection.disable_constraint_checking()
+        try:
+            with transaction.atomic():
+                self.seed(options['rows'])
+                indexes = Property._meta.indexes
+
+                before = {}
+                if drop_indexes:
+                    with connection.schema_editor(atomic=False) as editor:
+                        for index in indexes:
+                            editor.remove_index(Property, index)
+                    self.analyze()
+                    before = {name: self.measure(build) for name, build in queries.items()}
+
+                    with connection.schema_editor(atomic=False) as editor:
+                        for index in indexes:
+                            editor.add_index(Property, index)
+                self.analyze()
+                after = {name: self.measure(build) for name, build in queries.items()}
+
+                transaction.set_rollback(True)
+        finally:
+            connection.enable_constraint_checking()
+
+        self.stdout.write(f"\n{'Query':<24}{'before ms':>12}{'after ms':>12}")
+        for name in queries:
+            before_ms = f'{before[name][0]:.2f}' if name in before else '-'
+            self.stdout.write(f"{name:<24}{before_ms:>12}{after[name][0]:>12.2f}")
+        for name in queries:
+            if name in before:
+                self.stdout.write(f"\n=== {name}: plan before ===\n{before[name][1]}")
+            self.stdout.write(f"=== {name}: plan after ===\n{after[name][1]}")
+
+    def seed(self, rows):
+        self.stdout.write(f'Seeding {rows} properties...')
+        now = timezone.now()
+        objs = []
+        for i in range(rows):
+            objs.append(Property(
+                number=f'BENCH-{i}',
+                village=f'Dorf {i % 500}',
+                hbg=random.choice(['Ja', 'Nein', '']),
+                status=random.choice(STATUSES),
+                ausbau_termin=now + timedelta(days=random.randint(-200, 200)) if random.random() < 0.8 else None,
+            ))
+            if len(objs) == 5000:
+                Property.objects.bulk_create(objs)
+                objs = []
+        Property.objects.bulk_create(objs)
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Property._meta.db_table}')
+
+    def measure(self, build):
+        timings = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            list(build())
+            timings.append((time.perf_counter() - start) * 1000)
+        if connection.vendor == 'postgresql':
+            plan = build().explain(analyze=True, buffers=True)
+        else:
+            plan = build().explain()
+        return statistics.median(timings), plan
@@ -0,0 +1,86 @@
+import statistics
+import threading
+import time
+import urllib.request
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from properties.dbmetrics import connection_stats
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = ('Load-test property_list over HTTP against an in-process WSGI server, once opening '
+            'a database connection per request and once with persistent connections')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Timed requests per mode')
+        parser.add_argument('--user', help='Username to request the page as (default: first superuser)')
+        parser.add_argument('--max-age', type=int, default=600, help='CONN_MAX_AGE of the persistent run')
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(username=options['user']) if options['user'] else \
+            User.objects.filter(is_superuser=True).order_by('pk')
+        user = users.first()
+        if user is None:
+            raise CommandError('No user to log in as; pass --user')
+        # Only used to create a session; its requests bypass connection handling
+        client = Client()
+        client.force_login(user)
+        self.headers = {
+            'Cookie': f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}',
+            # The production host list and HTTPS redirect apply, as behind nginx
+            'Host': settings.ALLOWED_HOSTS[0].lstrip('.').replace('*', 'localhost'),
+            'X-Forwarded-Proto': 'https',
+        }
+
+        # Single-threaded server: one request handler thread, one database connection
+        server = make_server('127.0.0.1', 0, get_wsgi_application(), handler_class=QuietHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_port}{reverse("property_list")}'
+
+        settings_dict = connection.settings_dict  # shared with the server thread's connection
+        original_max_age = settings_dict['CONN_MAX_AGE']
+        self.stdout.write(f"{'Mode':<14}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}{'opened':>8}{'reuse':>8}")
+        try:
+            # Per-request connections first: each is closed after its request, so the
+            # persistent run starts by opening a connection with the new max age
+            for mode, max_age in (('per request', 0), ('persistent', options['max_age'])):
+                settings_dict['CONN_MAX_AGE'] = max_age
+                self.run_mode(url, mode, options['requests'])
+        finally:
+            server.shutdown()
+            settings_dict['CONN_MAX_AGE'] = original_max_age
+
+    def get(self, url):
+        with urllib.request.urlopen(urllib.request.Request(url, headers=self.headers)) as response:
+            response.read()
+            if response.status != 200 or response.url != url:
+                raise CommandError(f'{url} returned {response.status} ({response.url})')
+
+    def run_mode(self, url, mode, requests):
+        self.get(url)  # warm-up: opens the connection of the persistent run
+        before = connection_stats()
+        timings = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            self.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+        after = connection_stats()
+
+        percentiles = statistics.quantiles(timings, n=100)
+        opened = after['opened'] - before['opened']
+        reused = (after['reused'] - before['reused']) / (after['requests'] - before['requests'])
+        self.stdout.write(f'{mode:<14}{percentiles[49]:>10.2f}{percentiles[94]:>10.2f}'
+                          f'{statistics.mean(timings):>10.2f}{opened:>8}{reused:>8.0%}')
@@ -0,0 +1,190 @@
+import io
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+from PIL import Image
+
+from properties.models import Property
+from properties.uploads import IMAGE_FIELD
+
+# Request mix of the scenario: (kind, weight)
+SCENARIO = (('list', 50), ('detail', 30), ('upload', 10), ('export', 10))
+PROFILES = ('sync', 'gthread', 'asgi')
+
+
+def _photo():
+    """A small JPEG with random content, so uploads are never deduplicated"""
+    buffer = io.BytesIO()
+    Image.new('RGB', (640, 480), tuple(random.randrange(256) for _ in range(3))).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+def _multipart(field, filename, content):
+    boundary = uuid.uuid4().hex
+    body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f'Content-Type: image/jpeg\r\n\r\n'
+    ).encode() + content + f'\r\n--{boundary}--\r\n'.encode()
+    return body, f'multipart/form-data; boundary={boundary}'
+
+
+class Command(BaseCommand):
+    help = ('Start gunicorn with each serving profile (sync, gthread, asgi) and run a list/detail/'
+            'upload/export request mix against it; reports throughput and tail latency per profile')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', default=','.join(PROFILES), help='Comma-separated profiles')
+        parser.add_argument('--concurrency', type=int, default=16, help='Parallel clients')
+        parser.add_argument('--duration', type=float, default=20, help='Seconds of load per profile')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--user', help='Username to request the pages as (default: first superuser)')
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(username=options['user']) if options['user'] else \
+            User.objects.filter(is_superuser=True).order_by('pk')
+        user = users.first()
+        if user is None:
+            raise CommandError('No user to log in as; pass --user')
+        client = Client()
+        client.force_login(user)
+        self.host = settings.ALLOWED_HOSTS[0].lstrip('.').replace('*', 'localhost')
+        self.base = f"http://127.0.0.1:{options['port']}"
+        self.cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+
+        # Uploads go to a throw-away property, removed with its images at the end
+        prop = Property.objects.create(number=f'BENCH-SERVING-{uuid.uuid4().hex[:8]}')
+        detail = Property.objects.exclude(pk=prop.pk).order_by('pk').first() or prop
+        self.urls = {
+            'list': reverse('property_list'),
+            'detail': reverse('property_detail', args=[detail.pk]),
+            'upload': reverse('property_upload_image', args=[prop.pk]) + '?next=detail',
+            # Full CSV export: the long-running download of the mix
+            'export': reverse('excel_export') + '?format=csv',
+        }
+
+        self.stdout.write(f"{'Profile':<10}{'req/s':>8}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}   "
+                          + '  '.join(f'{kind} p95' for kind, _ in SCENARIO))
+        try:
+            for profile in options['profiles'].split(','):
+                with self.server(profile, options['port']):
+                    self.csrf = self.fetch_csrf_token()
+                    results, elapsed = self.run_load(options['concurrency'], options['duration'])
+                self.report(profile, results, elapsed)
+            self.stdout.write(f'{prop.images.count()} images uploaded')
+        finally:
+            prop.delete()
+
+    @contextmanager
+    def server(self, profile, port):
+        """Run gunicorn with gunicorn_config.py and the given profile while the block runs"""
+        env = dict(os.environ, GUNICORN_PROFILE=profile, GUNICORN_BIND=f'127.0.0.1:{port}',
+                   GUNICORN_ACCESSLOG='', GUNICORN_ERRORLOG='-')
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', str(settings.BASE_DIR / 'gunicorn_config.py')],
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            self.wait_for_port(port, process)
+            yield
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+    def wait_for_port(self, port, process, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f'gunicorn exited with {process.returncode} (is the worker class installed?)')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f'gunicorn did not listen on port {port} within {timeout} s')
+
+    def request(self, path, data=None, content_type=None):
+        headers = {'Cookie': self.cookie, 'Host': self.host, 'X-Forwarded-Proto': 'https'}
+        if data is not None:
+            headers.update({
+                'Content-Type': content_type,
+                'Cookie': f'{self.cookie}; {settings.CSRF_COOKIE_NAME}={self.csrf}',
+                'X-CSRFToken': self.csrf,
+                'Referer': f'https://{self.host}/',
+            })
+        request = urllib.request.Request(self.base + path, data=data, headers=headers)
+        with urllib.request.urlopen(request, timeout=60) as response:
+            body = response.read()
+            return response, body
+
+    def fetch_csrf_token(self):
+        response, _ = self.request(self.urls['upload'])
+        for header in response.headers.get_all('Set-Cookie') or ():
+            name, _, rest = header.partition('=')
+            if name == settings.CSRF_COOKIE_NAME:
+                return rest.split(';')[0]
+        raise CommandError('The upload page did not set a CSRF cookie')
+
+    def run_once(self, kind):
+        if kind == 'upload':
+            body, content_type = _multipart(IMAGE_FIELD, 'bench.jpg', _photo())
+            self.request(self.urls[kind], body, content_type)
+        else:
+            self.request(self.urls[kind])
+
+    def run_load(self, concurrency, duration):
+        kinds, weights = zip(*SCENARIO)
+        results = defaultdict(list)  # kind -> latencies in ms, None for errors
+        lock = threading.Lock()
+        deadline = time.monotonic() + duration
+
+        def client():
+            while time.monotonic() < deadline:
+                kind = random.choices(kinds, weights)[0]
+                start = time.perf_counter()
+                try:
+                    self.run_once(kind)
+                    latency = (time.perf_counter() - start) * 1000
+                except (urllib.error.URLError, OSError):
+                    latency = None
+                with lock:
+                    results[kind].append(latency)
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for _ in range(concurrency):
+                pool.submit(client)
+        return results, time.monotonic() - start
+
+    def report(self, profile, results, elapsed):
+        def p95(values):
+            return f'{statistics.quantiles(values, n=100)[94]:.0f}' if len(values) > 1 else '-'
+
+        latencies = [latency for values in results.values() for latency in values if latency is not None]
+        errors = sum(latency is None for values in results.values() for latency in values)
+        if len(latencies) < 2:
+            self.stdout.write(f'{profile:<10}{"no successful requests":>30}')
+            return
+        percentiles = statistics.quantiles(latencies, n=100)
+        per_kind = '  '.join(
+            f"{p95([latency for latency in results[kind] if latency is not None]):>{len(kind) + 4}}"
+            for kind, _ in SCENARIO
+        )
+        self.stdout.write(f'{profile:<10}{len(latencies) / elapsed:>8.1f}{errors:>8}{percentiles[49]:>9.0f}'
+                          f'{percentiles[94]:>9.0f}{percentiles[98]:>9.0f}   {per_kind}')
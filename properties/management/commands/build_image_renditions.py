@@ -0,0 +1,45 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.core.management.base import BaseCommand
+
+from properties.images import build_renditions, build_renditions_by_id
+from properties.models import PropertyImage
+
+
+class Command(BaseCommand):
+    help = 'Build thumbnail/web-size renditions for existing property images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Rebuild renditions for every image, not only missing ones')
+        parser.add_argument('--workers', type=int, default=4, help='Parallel image workers')
+
+    def handle(self, *args, **options):
+        images = PropertyImage.objects.exclude(image='')
+        if not options['all']:
+            images = images.filter(thumbnail='')
+        image_ids = list(images.values_list('pk', flat=True))
+        self.rebuild = options['all']
+        self.stdout.write(f'Building renditions for {len(image_ids)} images...')
+
+        if options['workers'] > 1:
+            pool = ThreadPoolExecutor(max_workers=options['workers'])
+            results = pool.map(partial(build_renditions_by_id, rebuild=self.rebuild), image_ids)
+        else:
+            pool = None
+            results = map(self.build_inline, image_ids)
+        for done, _ in enumerate(results, 1):
+            if done % 100 == 0:
+                self.stdout.write(f'  {done}/{len(image_ids)}')
+        if pool is not None:
+            pool.shutdown()
+
+        missing = PropertyImage.objects.filter(pk__in=image_ids, thumbnail='').count()
+        self.stdout.write(f'✅ Done ({missing} images could not be processed)')
+
+    def build_inline(self, image_id):
+        try:
+            build_renditions(PropertyImage.objects.get(pk=image_id), self.rebuild)
+        except Exception as e:
+            self.stderr.write(f'❌ Image {image_id}: {e}')
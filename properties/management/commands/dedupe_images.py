@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from properties.blobs import hash_file
+from properties.models import ImageBlob, PropertyImage
+
+
+class Command(BaseCommand):
+    help = ('Attach existing property images to content-addressed blobs; images with '
+            'identical content share the first copy and redundant files are deleted')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report savings without changing anything')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        images = PropertyImage.objects.filter(blob__isnull=True).exclude(image='').order_by('pk')
+        blobs = dict(ImageBlob.objects.values_list('sha256', 'pk'))
+        linked = duplicates = saved = 0
+
+        for image in images.iterator(chunk_size=500):
+            storage = image.image.storage
+            try:
+                with image.image.open('rb') as f:
+                    sha256 = hash_file(f)
+            except OSError as e:
+                self.stderr.write(f'❌ Image {image.pk}: {e}')
+                continue
+            linked += 1
+            if dry_run:
+                if sha256 in blobs:
+                    duplicates += 1
+                    saved += image.image.size
+                else:
+                    blobs[sha256] = None
+                continue
+
+            old_name = image.image.name
+            with transaction.atomic():
+                if sha256 in blobs:
+                    blob = ImageBlob.objects.get(pk=blobs[sha256])
+                else:
+                    # The first copy becomes the blob in place; no file is moved
+                    blob = ImageBlob.objects.create(sha256=sha256, file=old_name, size=image.image.size)
+                    blobs[sha256] = blob.pk
+                PropertyImage.objects.filter(pk=image.pk).update(blob=blob, image=blob.file.name)
+
+            if old_name != blob.file.name:
+                duplicates += 1
+                if not PropertyImage.objects.filter(image=old_name).exists():
+                    saved += storage.size(old_name)
+                    storage.delete(old_name)
+
+        verb = 'would be' if dry_run else 'were'
+        self.stdout.write(
+            f'✅ {linked} images checked, {duplicates} duplicates {verb} merged, '
+            f'{saved / 1024 / 1024:.1f} MB {verb} freed'
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from properties.models import Team
+from properties.stats import reconcile_stats
+
+
+class Command(BaseCommand):
+    help = ('Rebuild the PropertyStats summary table from the property tables and report rows '
+            'that had drifted; meant to run periodically (e.g. nightly from cron)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without rewriting the table')
+
+    def handle(self, *args, **options):
+        drift = reconcile_stats(dry_run=options['dry_run'])
+        if not drift:
+            self.stdout.write('✅ Property stats are up to date')
+            return
+        teams = dict(Team.objects.values_list('id', 'name'))
+        for team_id, status in drift:
+            team = teams.get(team_id, f'#{team_id}') if team_id else 'All properties'
+            self.stdout.write(f"⚠️  {team} / {status or '-'}")
+        verb = 'would be rebuilt' if options['dry_run'] else 'rebuilt'
+        self.stdout.write(f'{len(drift)} drifted rows {verb}')
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from properties.jobs import claim_next_job, process_import_job
+
+
+class Command(BaseCommand):
+    help = 'Process queued Excel import jobs (run under supervisor next to gunicorn)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Process all pending jobs and exit instead of polling')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds to sleep between polls when the queue is empty')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Import worker started')
+        while True:
+            close_old_connections()
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+                continue
+
+            self.stdout.write(f'▶️  Job {job.pk}: {job.original_name}')
+            job = process_import_job(job)
+            self.stdout.write(
+                f'{"✅" if job.status == job.STATUS_DONE else "❌"} Job {job.pk} {job.status}: '
+                f'{job.created_count} created, {job.updated_count} updated, '
+                f'{job.skipped_count} skipped, {job.error_count} errors'
+            )
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+# Fields indexed at the time of this migration (properties.search.TRIGRAM_INDEXED_FIELDS)
+TRIGRAM_INDEXED_FIELDS = ('number', 'address_id', 'village', 'owner_name', 'owner_surname', 'pop_code')
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """GIN trigram indexes on UPPER(column::text), the expression Postgres icontains compares"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return  # SQLite (tests) keeps plain LIKE scans
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for field in TRIGRAM_INDEXED_FIELDS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS properties_property_{field}_trgm '
+            f'ON properties_property USING gin (UPPER({field}::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in TRIGRAM_INDEXED_FIELDS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS properties_property_{field}_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0005_importjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
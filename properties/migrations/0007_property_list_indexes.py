@@ -0,0 +1,25 @@
+# Generated by Django 4.2 on 2026-10-16 22:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0006_property_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(models.Case(models.When(hbg='Ja', then=models.Value(0)), default=models.Value(1), output_field=models.IntegerField()), models.F('ausbau_termin'), models.F('id'), condition=models.Q(('status__in', ['ausbau_abgeschlossen', 'bezahlt']), _negated=True), name='property_active_priority_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(models.OrderBy(models.F('updated_at'), descending=True), models.OrderBy(models.F('id'), descending=True), condition=models.Q(('status__in', ['ausbau_abgeschlossen', 'bezahlt'])), name='property_completed_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(models.F('status'), models.OrderBy(models.F('updated_at'), descending=True), name='property_status_updated_idx'),
+        ),
+    ]
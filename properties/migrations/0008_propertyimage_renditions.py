@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-16 22:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0007_property_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertyimage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, upload_to='property_images/thumbs/'),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='web_image',
+            field=models.ImageField(blank=True, upload_to='property_images/web/'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2 on 2026-10-16 22:59
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+import django.db.models.deletion
+
+STAT_FIELDS = ('kl_15m', 'kl_20m', 'kl_30m', 'kl_50m', 'kl_80m', 'kl_100m', 'ohne_infra', 'mit_infra')
+
+
+def build_stats(apps, schema_editor):
+    """Initial summary rows (same grouping as properties.stats.compute_stats)"""
+    Property = apps.get_model('properties', 'Property')
+    PropertyStats = apps.get_model('properties', 'PropertyStats')
+    PropertyTeam = Property.teams.through
+    counters = ('property_count', *STAT_FIELDS)
+    rows = []
+    for row in Property.objects.order_by().values('status').annotate(
+            property_count=Count('id'), **{field: Sum(field) for field in STAT_FIELDS}):
+        rows.append(PropertyStats(status=row['status'], **{field: row[field] or 0 for field in counters}))
+    for row in PropertyTeam.objects.order_by().values('team_id', 'property__status').annotate(
+            property_count=Count('property_id'), **{field: Sum(f'property__{field}') for field in STAT_FIELDS}):
+        rows.append(PropertyStats(
+            team_id=row['team_id'], status=row['property__status'],
+            **{field: row[field] or 0 for field in counters},
+        ))
+    PropertyStats.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0011_importcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(blank=True, max_length=50)),
+                ('property_count', models.IntegerField(default=0)),
+                ('kl_15m', models.IntegerField(default=0)),
+                ('kl_20m', models.IntegerField(default=0)),
+                ('kl_30m', models.IntegerField(default=0)),
+                ('kl_50m', models.IntegerField(default=0)),
+                ('kl_80m', models.IntegerField(default=0)),
+                ('kl_100m', models.IntegerField(default=0)),
+                ('ohne_infra', models.IntegerField(default=0)),
+                ('mit_infra', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('team', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='properties.team')),
+            ],
+            options={
+                'verbose_name_plural': 'Property stats',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='propertystats',
+            constraint=models.UniqueConstraint(fields=('team', 'status'), name='propertystats_team_status_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='propertystats',
+            constraint=models.UniqueConstraint(condition=models.Q(('team', None)), fields=('status',), name='propertystats_all_status_uniq'),
+        ),
+        migrations.RunPython(build_stats, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,19 @@
 from django.db import models
+from django.db.models import Case, F, IntegerField, Q, Value, When
 from django.contrib.auth.models import User
 
+# Statuses shown on the "completed" page instead of the main list
+COMPLETED_STATUSES = ['ausbau_abgeschlossen', 'bezahlt']
+
+
+def hbg_priority_expression():
+    """Sort key of the main list: HBG=Ja first (0), everything else after (1)"""
+    return Case(
+        When(hbg='Ja', then=Value(0)),
+        default=Value(1),
+        output_field=IntegerField(),
+    )
+
 class Team(models.Model):
     """Teams for organizing users and properties"""
     name = models.CharField(max_length=100, unique=True)
@@ -89,25 +102,98 @@ class Property(models.Model):
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = 'Properties'
+        indexes = [
+            # Main list: NOT completed, ORDER BY hbg priority, ausbau_termin, id
+            models.Index(
+                hbg_priority_expression(), F('ausbau_termin'), F('id'),
+                name='property_active_priority_idx',
+                condition=~Q(status__in=COMPLETED_STATUSES),
+            ),
+            # Completed list: status IN completed, ORDER BY updated_at DESC, id DESC
+            models.Index(
+                F('updated_at').desc(), F('id').desc(),
+                name='property_completed_recent_idx',
+                condition=Q(status__in=COMPLETED_STATUSES),
+            ),
+            # Status filter on either list, newest first
+            models.Index(
+                F('status'), F('updated_at').desc(),
+                name='property_status_updated_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.number} - {self.village}"
     
     def get_team_names(self):
-        """Return comma-separated team names"""
+        """Return comma-separated team names (uses prefetch_related('teams') when present)"""
         return ", ".join([team.name for team in self.teams.all()])
     
     def is_completed(self):
         """Check if property is in completed status"""
-        return self.status in ['ausbau_abgeschlossen', 'bezahlt']
+        return self.status in COMPLETED_STATUSES
     
     def can_user_edit(self):
         """Check if regular users can edit this property"""
-        return self.status not in ['ausbau_abgeschlossen', 'bezahlt']
+        return self.status not in COMPLETED_STATUSES
+
+# Property number fields summed per team and status in PropertyStats
+STAT_FIELDS = ('kl_15m', 'kl_20m', 'kl_30m', 'kl_50m', 'kl_80m', 'kl_100m', 'ohne_infra', 'mit_infra')
+
+class PropertyStats(models.Model):
+    """
+    Property counts and sums per team and status (see properties/stats.py).
+
+    Rows with a team cover the properties linked to it, so a property in two
+    teams is counted in both; rows without a team cover every property once.
+    Maintained incrementally on writes and rebuilt by reconcile_property_stats.
+    """
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, null=True, blank=True, related_name='stats')
+    status = models.CharField(max_length=50, blank=True)
+    property_count = models.IntegerField(default=0)
+    kl_15m = models.IntegerField(default=0)
+    kl_20m = models.IntegerField(default=0)
+    kl_30m = models.IntegerField(default=0)
+    kl_50m = models.IntegerField(default=0)
+    kl_80m = models.IntegerField(default=0)
+    kl_100m = models.IntegerField(default=0)
+    ohne_infra = models.IntegerField(default=0)
+    mit_infra = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Property stats'
+        constraints = [
+            models.UniqueConstraint(fields=['team', 'status'], name='propertystats_team_status_uniq'),
+            # NULLs are distinct in the constraint above
+            models.UniqueConstraint(fields=['status'], condition=Q(team=None), name='propertystats_all_status_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.team or 'All'} / {self.status or '-'}: {self.property_count}"
+
+    def kl_meters(self):
+        """Total cable length in metres over all K.L fields"""
+        return sum(int(field[3:-1]) * getattr(self, field) for field in STAT_FIELDS if field.startswith('kl_'))
+
+class ImageBlob(models.Model):
+    """Image file content stored once, keyed by its SHA-256 (see properties/blobs.py)"""
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to='property_images/blobs/', max_length=255)
+    size = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return self.sha256
 
 class PropertyImage(models.Model):
     property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='images')
-    image = models.ImageField(upload_to='property_images/')
+    image = models.ImageField(upload_to='property_images/', max_length=255)
+    # Shared content; several PropertyImage rows may point at the same blob
+    blob = models.ForeignKey(ImageBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='images')
+    # Downscaled renditions built in the background (see properties/images.py)
+    thumbnail = models.ImageField(upload_to='property_images/thumbs/', blank=True)
+    web_image = models.ImageField(upload_to='property_images/web/', blank=True)
     uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
@@ -116,3 +202,104 @@ class PropertyImage(models.Model):
     
     def __str__(self):
         return f"Image for {self.property.number}"
+    
+    def thumbnail_url(self):
+        """Thumbnail URL, falling back to the original until it is built"""
+        return self.thumbnail.url if self.thumbnail else self.image.url
+    
+    def web_url(self):
+        """Web-size URL, falling back to the original until it is built"""
+        return self.web_image.url if self.web_image else self.image.url
+
+class ImportCheckpoint(models.Model):
+    """
+    Position of an unfinished import, committed together with each batch.
+
+    Keyed by the SHA-256 of the file so that importing the same file again
+    resumes after the last committed row; removed once an import completes.
+    """
+    file_hash = models.CharField(max_length=64, unique=True)
+    file_name = models.CharField(max_length=255, blank=True)
+    force_replace = models.BooleanField(default=False)
+    default_team = models.ForeignKey(Team, on_delete=models.SET_NULL, null=True, blank=True)
+    last_row = models.IntegerField(default=0)
+    # ImportResult counters and errors up to last_row
+    state = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.file_name or self.file_hash[:12]} (row {self.last_row})"
+
+class ImportJob(models.Model):
+    """Excel import queued from the web UI and processed by the import worker"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    file = models.FileField(upload_to='import_jobs/')
+    original_name = models.CharField(max_length=255, blank=True)
+    force_replace = models.BooleanField(default=False)
+    # Compute the change plan only; nothing is written
+    dry_run = models.BooleanField(default=False)
+    default_team = models.ForeignKey(Team, on_delete=models.SET_NULL, null=True, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
+
+    total_rows = models.IntegerField(default=0)
+    processed_rows = models.IntegerField(default=0)
+    created_count = models.IntegerField(default=0)
+    updated_count = models.IntegerField(default=0)
+    unchanged_count = models.IntegerField(default=0)
+    # Row after which a checkpoint of an earlier run of the same file was resumed
+    resumed_from_row = models.IntegerField(default=0)
+    skipped_count = models.IntegerField(default=0)
+    error_count = models.IntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    # Per-field change counts and sample diffs, see ImportResult.plan()
+    plan = models.JSONField(default=dict, blank=True)
+    message = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Import {self.original_name} ({self.get_status_display()})"
+
+    def is_finished(self):
+        """Check if the worker is done with this job"""
+        return self.status in [self.STATUS_DONE, self.STATUS_FAILED]
+
+    def to_status_dict(self):
+        """Progress snapshot returned by the status endpoint"""
+        return {
+            'id': self.pk,
+            'file': self.original_name,
+            'status': self.status,
+            'status_display': self.get_status_display(),
+            'finished': self.is_finished(),
+            'total_rows': self.total_rows,
+            'processed_rows': self.processed_rows,
+            'created': self.created_count,
+            'updated': self.updated_count,
+            'unchanged': self.unchanged_count,
+            'skipped': self.skipped_count,
+            'dry_run': self.dry_run,
+            'resumed_from_row': self.resumed_from_row,
+            'changed_rows': self.plan.get('changed_rows', 0),
+            'error_count': self.error_count,
+            'errors': self.errors[:10],
+            'more_errors': max(len(self.errors) - 10, 0),
+            'message': self.message,
+        }
@@ -0,0 +1,192 @@
+import base64
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+
+
+def approximate_count(queryset):
+    """
+    Return the planner's row estimate for the queryset (Postgres only).
+
+    Runs EXPLAIN on the filtered query instead of COUNT(*), so filters,
+    search and team scoping are reflected in the estimate; returns None on
+    other backends.
+    """
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    try:
+        return int(plan[0]['Plan']['Plan Rows'])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def encode_cursor(values, direction):
+    """Encode key values and direction ('n'ext/'p'revious) as an opaque token"""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps({'v': payload, 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, size):
+    """Decode a cursor token, return (values, direction) or None if invalid"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values, direction = data['v'], data['d']
+    except (ValueError, TypeError, KeyError):
+        return None
+    if direction not in ('n', 'p') or not isinstance(values, list) or len(values) != size:
+        return None
+    if not all(v is None or isinstance(v, (str, int, float)) for v in values):
+        return None
+    try:
+        values = [parse_datetime(v) or v if isinstance(v, str) else v for v in values]
+    except ValueError:
+        # Well-formed but impossible datetime, e.g. month 13
+        return None
+    return values, direction
+
+
+class KeysetPage:
+    """A page of results from KeysetPaginator, iterable like a Paginator page"""
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return ''
+        return encode_cursor(self.paginator.key_values(self.object_list[-1]), 'n')
+
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return ''
+        return encode_cursor(self.paginator.key_values(self.object_list[0]), 'p')
+
+
+class KeysetPaginator:
+    """
+    Seek-based paginator: each page filters on the key values of the last
+    row of the previous page instead of using OFFSET, and never counts the
+    full result unless asked to.
+
+    `keys` is a list of (field, descending) pairs that must end in a unique
+    field (usually id). NULLs sort last in the forward direction.
+    """
+
+    def __init__(self, queryset, keys, per_page, count_mode='approximate'):
+        self.queryset = queryset
+        self.keys = keys
+        self.per_page = per_page
+        self.count_mode = count_mode
+
+    def key_values(self, obj):
+        return [getattr(obj, field) for field, _ in self.keys]
+
+    @property
+    def count(self):
+        """Exact count when count_mode is 'exact', else the planner's estimate (or None)"""
+        if not hasattr(self, '_count'):
+            if self.count_mode == 'exact':
+                self._count = self.queryset.count()
+            else:
+                self._count = approximate_count(self.queryset)
+        return self._count
+
+    @property
+    def count_is_estimate(self):
+        return self.count_mode != 'exact'
+
+    def _ordering(self, forward):
+        nulls = {'nulls_last': True} if forward else {'nulls_first': True}
+        ordering = []
+        for field, descending in self.keys:
+            if descending == forward:
+                ordering.append(F(field).desc(**nulls))
+            else:
+                ordering.append(F(field).asc(**nulls))
+        return ordering
+
+    @staticmethod
+    def _equal(field, value):
+        if value is None:
+            return Q(**{f'{field}__isnull': True})
+        return Q(**{field: value})
+
+    @staticmethod
+    def _after(field, value, descending):
+        """Rows strictly after `value` in forward order (NULLs last)"""
+        if value is None:
+            return None
+        lookup = 'lt' if descending else 'gt'
+        return Q(**{f'{field}__{lookup}': value}) | Q(**{f'{field}__isnull': True})
+
+    @staticmethod
+    def _before(field, value, descending):
+        """Rows strictly before `value` in forward order (NULLs last)"""
+        if value is None:
+            return Q(**{f'{field}__isnull': False})
+        lookup = 'gt' if descending else 'lt'
+        return Q(**{f'{field}__{lookup}': value})
+
+    def _seek(self, values, forward):
+        condition = Q(pk__in=[])
+        prefix = Q()
+        for (field, descending), value in zip(self.keys, values):
+            step = self._after if forward else self._before
+            term = step(field, value, descending)
+            if term is not None:
+                condition |= prefix & term
+            prefix &= self._equal(field, value)
+        return condition
+
+    def get_page(self, cursor=None):
+        decoded = decode_cursor(cursor, len(self.keys)) if cursor else None
+        forward = decoded is None or decoded[1] == 'n'
+
+        queryset = self.queryset.order_by(*self._ordering(forward))
+        if decoded is not None:
+            try:
+                queryset = queryset.filter(self._seek(decoded[0], forward))
+            except (ValidationError, ValueError, TypeError):
+                # Tampered cursor whose values do not fit the key fields: first page
+                decoded, forward = None, True
+                queryset = self.queryset.order_by(*self._ordering(forward))
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if forward:
+            return KeysetPage(rows, self, has_next=has_more, has_previous=decoded is not None)
+        rows.reverse()
+        return KeysetPage(rows, self, has_next=True, has_previous=has_more)
@@ -0,0 +1,188 @@
+import hashlib
+import multiprocessing
+import queue
+import traceback
+import zlib
+
+from django.db import connection, connections
+
+from .importer import BATCH_SIZE, ImportResult, import_properties, start_checkpoint
+
+# Row chunks buffered per worker before the reader waits (bounds parent memory)
+QUEUE_CHUNKS = 4
+# Seconds between liveness checks of the workers while waiting on a queue
+POLL_SECONDS = 1
+
+
+def partition_for(number, workers):
+    """Worker index for a property number; stable across processes and runs"""
+    return zlib.crc32(number.encode('utf-8')) % workers
+
+
+def partition_hash(file_hash, index, workers):
+    """Checkpoint key of one worker's partition of a file"""
+    return hashlib.sha256(f'{file_hash}:{index}/{workers}'.encode('utf-8')).hexdigest()
+
+
+def merge_results(results):
+    """Sum the counters of several ImportResults; errors are ordered by row"""
+    merged = ImportResult()
+    for result in results:
+        merged.created += result.created
+        merged.updated += result.updated
+        merged.unchanged += result.unchanged
+        merged.skipped += result.skipped
+        merged.error_count += result.error_count
+        merged.errors.extend(result.errors)
+    merged.errors.sort(key=_error_row)
+    return merged
+
+
+def _error_row(message):
+    # Messages start with "Row <n>"
+    try:
+        return int(message.split()[1].rstrip(':'))
+    except (IndexError, ValueError):
+        return 0
+
+
+def _worker(index, workers, rows_queue, events, options):
+    """Process entry point: import the rows of one partition with its own connection"""
+    def rows():
+        while True:
+            chunk = rows_queue.get()
+            if chunk is None:
+                return
+            yield from chunk
+
+    try:
+        checkpoint = None
+        if options['file_hash']:
+            checkpoint = start_checkpoint(
+                partition_hash(options['file_hash'], index, workers), options['file_name'],
+                options['force_replace'], options['default_team'],
+            )
+        result = import_properties(
+            rows(),
+            force_replace=options['force_replace'],
+            default_team=options['default_team'],
+            batch_size=options['batch_size'],
+            checkpoint=checkpoint,
+            progress=lambda result, written: events.put(('progress', index, result.processed)),
+        )
+        events.put(('done', index, result.to_state()))
+    except Exception:
+        events.put(('failed', index, traceback.format_exc()))
+        # Keep consuming so the reader never blocks on a full queue
+        for _ in rows():
+            pass
+    finally:
+        connection.close()
+
+
+def import_parallel(rows, workers, force_replace=False, default_team=None, batch_size=BATCH_SIZE,
+                    file_hash='', file_name='', progress=None):
+    """
+    Import parsed rows with a pool of `workers` processes.
+
+    Rows are partitioned by a hash of their number, so all rows of one
+    property go to the same worker and batches of different workers never
+    touch the same property. Each worker runs import_properties with its own
+    database connection (and, with `file_hash`, its own checkpoint). The
+    per-worker results are merged; `progress`, if given, is called with the
+    number of rows handled so far. Raises RuntimeError if a worker fails or
+    dies; the other workers are then terminated.
+    """
+    # Forked workers must not share the parent's database connection
+    connections.close_all()
+    # Workers use the Django setup inherited from this process, so they must be
+    # forked whatever the platform's default start method is (spawn/forkserver)
+    context = multiprocessing.get_context('fork')
+    events = context.Queue()
+    queues = [context.Queue(maxsize=QUEUE_CHUNKS) for _ in range(workers)]
+    options = {
+        'force_replace': force_replace,
+        'default_team': default_team,
+        'batch_size': batch_size,
+        'file_hash': file_hash,
+        'file_name': file_name,
+    }
+    processes = [
+        context.Process(target=_worker, args=(index, workers, queues[index], events, options), daemon=True)
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    handled = [0] * workers
+    states = {}
+    failures = {}
+
+    def handle(event):
+        kind, index, payload = event
+        if kind == 'progress':
+            handled[index] = payload
+            if progress is not None:
+                progress(sum(handled))
+        elif kind == 'done':
+            states[index] = payload
+        else:
+            failures[index] = f'Worker {index}:\n{payload}'
+
+    def drain():
+        while True:
+            try:
+                handle(events.get_nowait())
+            except queue.Empty:
+                return
+
+    def check_workers():
+        """Fail if a worker exited without reporting (killed, e.g. by the OOM killer)"""
+        drain()
+        for index, process in enumerate(processes):
+            if process.exitcode is not None and index not in states and index not in failures:
+                drain()  # its last events may have arrived meanwhile
+                if index not in states and index not in failures:
+                    raise RuntimeError(f'Worker {index} exited with code {process.exitcode} before finishing')
+
+    def put(index, chunk):
+        # A worker that died never drains its queue: poll instead of blocking
+        while True:
+            try:
+                queues[index].put(chunk, timeout=POLL_SECONDS)
+                return
+            except queue.Full:
+                check_workers()
+
+    try:
+        buffers = [[] for _ in range(workers)]
+        for row in rows:
+            index = partition_for(row[1], workers)
+            buffers[index].append(row)
+            if len(buffers[index]) >= batch_size:
+                put(index, buffers[index])
+                buffers[index] = []
+                drain()
+        for index, buffer in enumerate(buffers):
+            if buffer:
+                put(index, buffer)
+            put(index, None)
+
+        while len(states) + len(failures) < workers:
+            try:
+                handle(events.get(timeout=POLL_SECONDS))
+            except queue.Empty:
+                check_workers()
+    except BaseException:
+        # Stop the remaining workers; their batches are committed with checkpoints
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        raise
+    finally:
+        for process in processes:
+            process.join()
+
+    if failures:
+        raise RuntimeError('\n'.join(failures[index] for index in sorted(failures)))
+    return merge_results(ImportResult.from_state(states[index]) for index in range(workers))
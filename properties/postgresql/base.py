@@ -0,0 +1,16 @@
+import time
+
+from django.db.backends.postgresql import base
+
+from ..dbmetrics import record_connect
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL backend that times new connections for properties.dbmetrics"""
+
+    def get_new_connection(self, conn_params):
+        start = time.perf_counter()
+        try:
+            return super().get_new_connection(conn_params)
+        finally:
+            record_connect(time.perf_counter() - start)
@@ -0,0 +1,221 @@
+import csv
+import os
+import zipfile
+from functools import cached_property
+
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+
+from .importer import BATCH_SIZE, iter_dataframe_rows
+
+# Column every import file must have
+REQUIRED_COLUMNS = ('Number',)
+
+
+class ImportFileError(ValueError):
+    """The uploaded file cannot be imported (unreadable or missing columns)"""
+
+
+def check_columns(columns):
+    """Raise ImportFileError unless all REQUIRED_COLUMNS are present"""
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise ImportFileError(f"Missing required column(s): {', '.join(missing)}")
+
+
+class ChunkReader:
+    """
+    Base class of the import readers.
+
+    Subclasses validate the header on construction, set `columns` and
+    `total_rows` (None if unknown) and implement iter_chunks(), yielding
+    DataFrames indexed so that index + 2 is the row number shown to users.
+    """
+    chunk_size = BATCH_SIZE
+    total_rows = None
+
+    def iter_chunks(self):
+        raise NotImplementedError
+
+    def iter_rows(self):
+        """Parsed (row_number, number, data, team_names) rows for import_properties"""
+        for chunk in self.iter_chunks():
+            yield from iter_dataframe_rows(chunk)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SheetReader(ChunkReader):
+    """
+    Stream the first worksheet of an .xlsx file in fixed-size chunks.
+
+    The workbook is opened in openpyxl read_only mode, so cells are parsed
+    from the XML as rows are requested and memory stays bounded by the
+    chunk size. The header row is read and validated on open; a file that
+    is not a workbook or lacks a required column raises ImportFileError
+    before any data row is touched.
+    """
+
+    def __init__(self, file, chunk_size=BATCH_SIZE):
+        self.chunk_size = chunk_size
+        try:
+            self.workbook = load_workbook(file, read_only=True, data_only=True)
+        except (InvalidFileException, zipfile.BadZipFile, KeyError, OSError) as e:
+            raise ImportFileError(f'Not a readable .xlsx workbook: {e}') from e
+        self.sheet = self.workbook.worksheets[0]
+        self._rows = self.sheet.iter_rows(values_only=True)
+        header = next(self._rows, None)
+        self.columns = []
+        for i, value in enumerate(header or ()):
+            column = str(value).strip() if value is not None else f'Unnamed: {i}'
+            # Repeated headers get a suffix, as pandas.read_excel does
+            duplicates = self.columns.count(column)
+            self.columns.append(f'{column}.{duplicates}' if duplicates else column)
+        try:
+            check_columns(self.columns)
+        except ImportFileError:
+            self.close()
+            raise
+
+    @property
+    def total_rows(self):
+        """Data rows according to the sheet's dimension record (may be None)"""
+        max_row = self.sheet.max_row
+        return max_row - 1 if max_row else None
+
+    def iter_chunks(self):
+        """
+        Yield DataFrames of up to chunk_size rows, indexed so index + 2 is the Excel row.
+
+        Cells keep the Python types openpyxl read (dtype=object): inferring
+        dtypes per chunk would turn an integer column into floats only in
+        the chunks that happen to contain a blank cell.
+        """
+        width = len(self.columns)
+        index, chunk = [], []
+        for excel_row, values in enumerate(self._rows, start=2):
+            if not any(value is not None and value != '' for value in values):
+                continue
+            values = tuple(values[:width]) + (None,) * (width - len(values))
+            index.append(excel_row - 2)
+            chunk.append(values)
+            if len(chunk) >= self.chunk_size:
+                yield pd.DataFrame(chunk, columns=self.columns, index=index, dtype=object)
+                index, chunk = [], []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=self.columns, index=index, dtype=object)
+
+    def close(self):
+        self.workbook.close()
+
+
+class DataFrameReader(ChunkReader):
+    """Reader for formats pandas loads in one go (.xls)"""
+
+    def __init__(self, df, chunk_size=BATCH_SIZE):
+        check_columns(df.columns)
+        self.df = df
+        self.columns = list(df.columns)
+        self.chunk_size = chunk_size
+        self.total_rows = len(df)
+
+    def iter_chunks(self):
+        for start in range(0, len(self.df), self.chunk_size):
+            yield self.df.iloc[start:start + self.chunk_size]
+
+
+class CsvReader(ChunkReader):
+    """
+    Stream a CSV file with pandas.read_csv(chunksize=...).
+
+    The delimiter (comma, semicolon or tab) is sniffed from the header
+    line, a UTF-8 BOM (as written by our CSV export) is ignored, and all
+    cells are read as text so numbers keep leading zeros.
+    """
+
+    def __init__(self, file, chunk_size=BATCH_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        file.seek(0)
+        head = file.read(64 * 1024)
+        file.seek(0)
+        try:
+            first_line = head.decode('utf-8-sig').splitlines()[0]
+        except (UnicodeDecodeError, IndexError) as e:
+            raise ImportFileError(f'Not a readable UTF-8 CSV file: {e}') from e
+        self.delimiter = max(',;\t', key=first_line.count)
+        self.columns = [column.strip() for column in next(csv.reader([first_line], delimiter=self.delimiter))]
+        check_columns(self.columns)
+
+    @cached_property
+    def total_rows(self):
+        """Line count of the file (counts quoted line breaks too, so it is an upper bound)"""
+        self.file.seek(0)
+        lines = sum(block.count(b'\n') for block in iter(lambda: self.file.read(1024 * 1024), b''))
+        self.file.seek(0)
+        return max(lines - 1, 0)
+
+    def iter_chunks(self):
+        self.file.seek(0)
+        yield from pd.read_csv(
+            self.file, sep=self.delimiter, encoding='utf-8-sig', dtype=str,
+            keep_default_na=False, chunksize=self.chunk_size, skipinitialspace=True,
+        )
+
+
+class ParquetReader(ChunkReader):
+    """Stream a Parquet file (pyarrow) one record batch at a time"""
+
+    def __init__(self, file, chunk_size=BATCH_SIZE):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportFileError('Parquet import needs the pyarrow package') from e
+        self.chunk_size = chunk_size
+        try:
+            self.parquet = pq.ParquetFile(file)
+        except Exception as e:
+            raise ImportFileError(f'Not a readable Parquet file: {e}') from e
+        self.columns = self.parquet.schema_arrow.names
+        check_columns(self.columns)
+        self.total_rows = self.parquet.metadata.num_rows
+
+    def iter_chunks(self):
+        start = 0
+        for batch in self.parquet.iter_batches(batch_size=self.chunk_size):
+            df = batch.to_pandas()
+            df.index = range(start, start + len(df))
+            start += len(df)
+            yield df
+
+    def close(self):
+        self.parquet.close()
+
+
+# File extension -> reader class; anything else goes through pandas.read_excel
+READERS = {
+    '.xlsx': SheetReader,
+    '.csv': CsvReader,
+    '.parquet': ParquetReader,
+}
+IMPORT_EXTENSIONS = (*READERS, '.xls')
+
+
+def open_import_file(file, name, chunk_size=BATCH_SIZE):
+    """Open an uploaded import file by extension; raises ImportFileError if unusable"""
+    reader_class = READERS.get(os.path.splitext(name.lower())[1])
+    if reader_class is not None:
+        return reader_class(file, chunk_size)
+    try:
+        df = pd.read_excel(file)
+    except Exception as e:
+        raise ImportFileError(f'Could not read {name}: {e}') from e
+    return DataFrameReader(df, chunk_size)
@@ -0,0 +1,39 @@
+from functools import reduce
+from operator import or_
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.functions import Greatest
+
+# Columns matched by the search box of each page. Every column listed here
+# has a pg_trgm GIN index on UPPER(column) (migration 0006), which is the
+# expression Postgres compares for icontains, so substring search uses a
+# bitmap index scan instead of a sequential scan.
+LIST_SEARCH_FIELDS = ('address_id', 'village', 'owner_name', 'owner_surname', 'pop_code')
+COMPLETED_SEARCH_FIELDS = ('number', 'village', 'owner_name', 'owner_surname')
+EXPORT_SEARCH_FIELDS = COMPLETED_SEARCH_FIELDS
+
+TRIGRAM_INDEXED_FIELDS = ('number', 'address_id', 'village', 'owner_name', 'owner_surname', 'pop_code')
+
+
+def supports_ranking():
+    """Trigram ranking needs Postgres with pg_trgm; other backends only filter"""
+    return connection.vendor == 'postgresql'
+
+
+def search_properties(queryset, term, fields, rank=False):
+    """
+    Filter properties whose `fields` contain `term` (case-insensitive).
+
+    With rank=True on Postgres the queryset is annotated with `search_rank`,
+    the best trigram word similarity of the term across the fields.
+    """
+    queryset = queryset.filter(reduce(or_, (Q(**{f'{field}__icontains': term}) for field in fields)))
+    if rank and supports_ranking():
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        similarities = [TrigramWordSimilarity(term, field) for field in fields]
+        queryset = queryset.annotate(
+            search_rank=Greatest(*similarities) if len(similarities) > 1 else similarities[0]
+        )
+    return queryset
@@ -0,0 +1,134 @@
+from django.core.signals import request_started
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .access import invalidate_user_teams
+from .blobs import release_blob
+from .dbmetrics import record_opened, record_request
+from .fragments import invalidate_properties, invalidate_snapshots
+from .images import schedule_renditions
+from .models import STAT_FIELDS, Property, PropertyImage, Team, TeamMember
+from .stats import apply_changes, apply_links, instance_snapshot, snapshot
+
+
+@receiver(request_started)
+def request_started_metrics(sender, **kwargs):
+    # Connected after Django's close_old_connections, so an open connection here is reused
+    record_request()
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    if connection.alias == 'default':
+        record_opened()
+
+
+@receiver(pre_save, sender=TeamMember)
+def teammember_moving(sender, instance, **kwargs):
+    """Membership reassigned to another user: drop the previous user's entry too"""
+    if instance.pk:
+        old_user_id = TeamMember.objects.filter(pk=instance.pk).values_list('user_id', flat=True).first()
+        if old_user_id is not None and old_user_id != instance.user_id:
+            invalidate_user_teams(old_user_id)
+
+
+@receiver([post_save, post_delete], sender=TeamMember)
+def teammember_changed(sender, instance, **kwargs):
+    """Membership added/removed/moved: drop the user's cached team IDs"""
+    invalidate_user_teams(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Team)
+def team_changed(sender, instance, **kwargs):
+    """Team changed: drop cached team IDs of its members"""
+    invalidate_user_teams(*TeamMember.objects.filter(team_id=instance.pk).values_list('user_id', flat=True))
+
+
+@receiver([post_save, pre_delete], sender=Team)
+def team_renamed_or_deleting(sender, instance, **kwargs):
+    """Team badges are part of the list fragments of every team its properties are in"""
+    invalidate_properties(instance.properties.values_list('pk', flat=True), [instance.pk])
+
+
+@receiver(post_save, sender=PropertyImage)
+def property_image_uploaded(sender, instance, created, **kwargs):
+    """Build thumbnail/web renditions in the background for new uploads"""
+    if created and instance.image:
+        schedule_renditions(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=PropertyImage)
+def property_image_changed(sender, instance, **kwargs):
+    """The list shows image counts: drop the fragments of the property's teams"""
+    invalidate_properties([instance.property_id])
+
+
+@receiver(post_delete, sender=PropertyImage)
+def property_image_deleted(sender, instance, **kwargs):
+    """Last reference to a blob gone: remove the blob and its files after commit"""
+    if instance.blob_id:
+        blob_id = instance.blob_id
+        renditions = (instance.thumbnail.name, instance.web_image.name)
+        transaction.on_commit(lambda: release_blob(blob_id, renditions))
+
+
+@receiver(pre_save, sender=Property)
+def property_saving(sender, instance, update_fields=None, **kwargs):
+    """Remember the stored status/sums, so post_save can move them in PropertyStats"""
+    if update_fields is not None and not {'status', *STAT_FIELDS} & set(update_fields):
+        instance._stats_before = None
+    else:
+        instance._stats_before = snapshot([instance.pk]) if instance.pk else {}
+
+
+@receiver(post_save, sender=Property)
+def property_saved(sender, instance, **kwargs):
+    # Any field may be shown in the list, not only the stats fields
+    invalidate_properties([instance.pk])
+    before = getattr(instance, '_stats_before', None)
+    if before is None:
+        return
+    old = before.get(instance.pk)
+    apply_changes(before, instance_snapshot(instance, old[2] if old else ()))
+    instance._stats_before = None
+
+
+@receiver(pre_delete, sender=Property)
+def property_deleting(sender, instance, **kwargs):
+    # Team links are gone by post_delete
+    instance._stats_before = snapshot([instance.pk])
+
+
+@receiver(post_delete, sender=Property)
+def property_deleted(sender, instance, **kwargs):
+    before = getattr(instance, '_stats_before', None) or {}
+    apply_changes(before, {})
+    invalidate_snapshots(before)
+
+
+@receiver(m2m_changed, sender=Property.teams.through)
+def property_teams_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Team links added/removed/cleared from either side: move the team rows of
+    PropertyStats and drop the list fragments showing the properties
+    """
+    if action in ('pre_remove', 'pre_clear'):
+        # pk_set of remove() may name unlinked objects; keep only the links that exist
+        links = sender.objects.filter(**{'team_id' if reverse else 'property_id': instance.pk})
+        if action == 'pre_remove':
+            links = links.filter(**{'property_id__in' if reverse else 'team_id__in': pk_set})
+        instance._stats_links = list(links.values_list('property_id', 'team_id'))
+        return
+    if action in ('post_remove', 'post_clear'):
+        links = getattr(instance, '_stats_links', ())
+        apply_links(links, -1)
+        instance._stats_links = ()
+    elif action == 'post_add' and pk_set:
+        links = [(pk, instance.pk) if reverse else (instance.pk, pk) for pk in pk_set]
+        apply_links(links, 1)
+    else:
+        return
+    # The properties' rows change in the lists of all their teams, including unlinked ones
+    invalidate_properties({property_id for property_id, _ in links}, {team_id for _, team_id in links})
@@ -0,0 +1,193 @@
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Sum
+
+from .fragments import invalidate_snapshots
+from .models import STAT_FIELDS, Property, PropertyStats
+
+PropertyTeam = Property.teams.through
+
+# PropertyStats columns changed by a property: its count plus the summed fields
+COUNTERS = ('property_count', *STAT_FIELDS)
+KL_FIELDS = [field for field in STAT_FIELDS if field.startswith('kl_')]
+
+
+def snapshot(property_ids):
+    """{property_id: (status, counter values, team ids)} of properties as stored now"""
+    property_ids = list(property_ids)
+    if not property_ids:
+        return {}
+    teams = defaultdict(set)
+    for property_id, team_id in PropertyTeam.objects.filter(property_id__in=property_ids).values_list(
+            'property_id', 'team_id'):
+        teams[property_id].add(team_id)
+    return {
+        row[0]: (row[1], _counters(row[2:]), frozenset(teams[row[0]]))
+        for row in Property.objects.filter(id__in=property_ids).values_list('id', 'status', *STAT_FIELDS)
+    }
+
+
+def instance_snapshot(instance, team_ids):
+    """snapshot() entry of a Property instance, without querying"""
+    values = [getattr(instance, field) for field in STAT_FIELDS]
+    return {instance.pk: (instance.status or '', _counters(values), frozenset(team_ids))}
+
+
+def _counters(values):
+    return (1, *(value or 0 for value in values))
+
+
+def _add(deltas, key, counters, sign):
+    delta = deltas[key]
+    for i, value in enumerate(counters):
+        delta[i] += sign * value
+
+
+def _contribute(deltas, entries, sign):
+    for status, counters, team_ids in entries:
+        _add(deltas, (None, status), counters, sign)
+        for team_id in team_ids:
+            _add(deltas, (team_id, status), counters, sign)
+
+
+def apply_changes(before, after):
+    """Update PropertyStats by the difference between two snapshots"""
+    deltas = defaultdict(lambda: [0] * len(COUNTERS))
+    for property_id in before.keys() | after.keys():
+        old, new = before.get(property_id), after.get(property_id)
+        if old != new:
+            _contribute(deltas, [old] if old else [], -1)
+            _contribute(deltas, [new] if new else [], 1)
+    _write(deltas)
+
+
+def apply_links(links, sign):
+    """Update PropertyStats for (property_id, team_id) links added (sign 1) or removed (sign -1)"""
+    links = list(links)
+    if not links:
+        return
+    current = {
+        row[0]: (row[1], _counters(row[2:]))
+        for row in Property.objects.filter(id__in={property_id for property_id, _ in links}).values_list(
+            'id', 'status', *STAT_FIELDS)
+    }
+    deltas = defaultdict(lambda: [0] * len(COUNTERS))
+    for property_id, team_id in links:
+        if property_id in current:
+            status, counters = current[property_id]
+            _add(deltas, (team_id, status), counters, sign)
+    _write(deltas)
+
+
+def _write(deltas):
+    # Fixed key order, so concurrent writers lock the rows in the same order
+    for (team_id, status), delta in sorted(deltas.items(), key=lambda item: (item[0][0] or 0, item[0][1])):
+        changes = {field: value for field, value in zip(COUNTERS, delta) if value}
+        if not changes:
+            continue
+        rows = PropertyStats.objects.filter(team_id=team_id, status=status)
+        if rows.update(**{field: F(field) + value for field, value in changes.items()}):
+            continue
+        try:
+            with transaction.atomic():
+                PropertyStats.objects.create(team_id=team_id, status=status, **changes)
+        except IntegrityError:
+            # Created concurrently
+            rows.update(**{field: F(field) + value for field, value in changes.items()})
+
+
+@contextmanager
+def track_stats(property_ids):
+    """
+    Keep PropertyStats in step with bulk writes that bypass model signals
+    (queryset.update(), bulk_update(), through-table inserts), and drop the
+    cached list fragments of the teams involved before and after.
+
+        with track_stats(ids):
+            Property.objects.filter(id__in=ids).update(status='bezahlt')
+    """
+    property_ids = list(property_ids)
+    with transaction.atomic():
+        before = snapshot(property_ids)
+        yield
+        after = snapshot(property_ids)
+        apply_changes(before, after)
+        invalidate_snapshots(before, after)
+
+
+def compute_stats():
+    """{(team_id, status): counters} recomputed from the property tables with two grouped queries"""
+    sums = {field: Sum(field) for field in STAT_FIELDS}
+    expected = {}
+    for row in Property.objects.order_by().values('status').annotate(property_count=Count('id'), **sums):
+        expected[(None, row['status'])] = tuple(row[field] or 0 for field in COUNTERS)
+    team_sums = {field: Sum(f'property__{field}') for field in STAT_FIELDS}
+    for row in PropertyTeam.objects.order_by().values('team_id', 'property__status').annotate(
+            property_count=Count('property_id'), **team_sums):
+        expected[(row['team_id'], row['property__status'])] = tuple(row[field] or 0 for field in COUNTERS)
+    return expected
+
+
+def reconcile_stats(dry_run=False):
+    """
+    Rebuild PropertyStats from the property tables.
+
+    Returns the (team_id, status) keys whose stored counters were wrong.
+    On PostgreSQL the stats table is locked for the rebuild, so incremental
+    updates of concurrent writes wait and apply on top of the fresh rows.
+    """
+    with transaction.atomic():
+        if connection.vendor == 'postgresql' and not dry_run:
+            with connection.cursor() as cursor:
+                cursor.execute(f'LOCK TABLE {PropertyStats._meta.db_table} IN EXCLUSIVE MODE')
+        expected = compute_stats()
+        stored = {
+            (row[0], row[1]): tuple(row[2:])
+            for row in PropertyStats.objects.values_list('team_id', 'status', *COUNTERS)
+        }
+        drift = sorted(
+            (key for key in expected.keys() | stored.keys()
+             if expected.get(key, (0,) * len(COUNTERS)) != stored.get(key, (0,) * len(COUNTERS))),
+            key=lambda key: (key[0] or 0, key[1]),
+        )
+        if drift and not dry_run:
+            PropertyStats.objects.all().delete()
+            PropertyStats.objects.bulk_create(
+                PropertyStats(team_id=team_id, status=status, **dict(zip(COUNTERS, counters)))
+                for (team_id, status), counters in expected.items()
+            )
+    return drift
+
+
+def total_properties():
+    """Number of properties, read from the summary table"""
+    return PropertyStats.objects.filter(team=None).aggregate(total=Sum('property_count'))['total'] or 0
+
+
+def summary_table():
+    """
+    Dashboard rows read from PropertyStats only: all properties first, then
+    one row per team, each with its counts per status (in STATUS_CHOICES
+    order; property_count is the total) and summed fields.
+    """
+    statuses = [value for value, _ in Property.STATUS_CHOICES]
+    scopes = {}
+    for stats in PropertyStats.objects.filter(property_count__gt=0).select_related('team'):
+        scope = scopes.setdefault(stats.team_id, {
+            'team': stats.team,
+            'counts': dict.fromkeys(statuses, 0),
+            **dict.fromkeys(COUNTERS, 0),
+            'kl_meters': 0,
+        })
+        if stats.status in scope['counts']:
+            scope['counts'][stats.status] += stats.property_count
+        for field in COUNTERS:
+            scope[field] += getattr(stats, field)
+        scope['kl_meters'] += stats.kl_meters()
+    rows = sorted(scopes.values(), key=lambda scope: (scope['team'] is not None, scope['team'] and scope['team'].name))
+    for scope in rows:
+        scope['counts'] = list(scope['counts'].values())
+        scope['kl'] = [scope[field] for field in KL_FIELDS]
+    return rows
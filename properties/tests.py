@@ -1,3 +1,986 @@
-from django.test import TestCase
+import io
+import os
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+import pandas as pd
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.core.cache import cache
+from django.test import TestCase as DjangoTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from .access import (
+    can_access_property, get_user_properties, get_user_team_ids, get_user_teams, team_cache_counters,
+)
+from .bulk import assign_team
+from .dbmetrics import connection_stats, record_connect
+from .facets import compute_facets, facet_cache_counters, property_facets
+from .fragments import fragment_cache_counters
+from .images import build_renditions
+from .importer import ImportResult, import_properties, iter_dataframe_rows, start_checkpoint
+from .models import (
+    ImageBlob, ImportCheckpoint, ImportJob, Property, PropertyImage, PropertyStats, Team, TeamMember,
+)
+from .pagination import encode_cursor
+from .parallel import import_parallel, merge_results, partition_for
+from .readers import SheetReader
+from .stats import compute_stats, reconcile_stats, track_stats
+from .search import COMPLETED_SEARCH_FIELDS, LIST_SEARCH_FIELDS, search_properties
+
+
+class TestCase(DjangoTestCase):
+    """Test case that starts every test with an empty cache"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+
+def _killed_worker(*args):
+    """Worker stand-in that dies like an OOM-killed process, without reporting"""
+    os._exit(9)
+
+
+def sheet_row(row_number, number, team='', **data):
+    """Build a parsed import row as produced by the importer's row parser"""
+    return row_number, number, data, team
+
+
+class ImportPropertiesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.team_a = Team.objects.create(name='Team A')
+        cls.team_b = Team.objects.create(name='Team B')
+
+    def test_creates_and_skips_existing(self):
+        Property.objects.create(number='P1', village='Old')
+        result = import_properties([
+            sheet_row(2, 'P1', village='New'),
+            sheet_row(3, 'P2', village='Fresh'),
+            sheet_row(4, ''),
+        ])
+        self.assertEqual((result.created, result.updated, result.skipped, result.error_count), (1, 0, 1, 1))
+        self.assertEqual(Property.objects.get(number='P1').village, 'Old')
+        self.assertEqual(Property.objects.get(number='P2').village, 'Fresh')
+
+    def test_force_replace_updates_and_replaces_teams(self):
+        prop = Property.objects.create(number='P1', village='Old')
+        prop.teams.add(self.team_a)
+        result = import_properties(
+            [sheet_row(2, 'P1', team='Team B, Missing', village='New')],
+            force_replace=True,
+        )
+        self.assertEqual((result.created, result.updated, result.error_count), (0, 1, 0))
+        self.assertEqual(len(result.errors), 1)
+        prop.refresh_from_db()
+        self.assertEqual(prop.village, 'New')
+        self.assertEqual(prop.get_team_names(), 'Team B')
+
+    def test_default_team_only_for_new_properties(self):
+        Property.objects.create(number='P1')
+        import_properties(
+            [sheet_row(2, 'P1'), sheet_row(3, 'P2')],
+            force_replace=True,
+            default_team=self.team_a,
+        )
+        self.assertEqual(Property.objects.get(number='P1').get_team_names(), '')
+        self.assertEqual(Property.objects.get(number='P2').get_team_names(), 'Team A')
+
+    def test_force_replace_writes_only_changed_rows(self):
+        old = timezone.now() - timedelta(days=3)
+        for number in ('P1', 'P2'):
+            prop = Property.objects.create(number=number, village='Dorf')
+            prop.teams.add(self.team_a)
+        Property.objects.update(updated_at=old)
+        result = import_properties(
+            [sheet_row(2, 'P1', team='Team A', village='Dorf'), sheet_row(3, 'P2', team='Team B', village='Neu')],
+            force_replace=True,
+        )
+        self.assertEqual((result.updated, result.unchanged), (1, 1))
+        self.assertEqual(Property.objects.get(number='P1').updated_at, old)
+        p2 = Property.objects.get(number='P2')
+        self.assertEqual((p2.village, p2.get_team_names()), ('Neu', 'Team B'))
+        self.assertEqual(dict(result.field_changes), {'village': 1, 'teams': 1})
+
+    def test_dry_run_reports_plan_without_writing(self):
+        Property.objects.create(number='P1', village='Dorf')
+        result = import_properties(
+            [sheet_row(2, 'P1', village='Neu'), sheet_row(3, 'P2')],
+            dry_run=True,
+        )
+        self.assertEqual((result.created, result.skipped, result.changed_rows), (1, 1, 1))
+        self.assertEqual(result.plan()['changes'][0]['fields'], {'village': ['Dorf', 'Neu']})
+        self.assertEqual(Property.objects.get().village, 'Dorf')
+
+    def test_dry_run_repeated_new_number_across_batches(self):
+        rows = [sheet_row(2, 'NEW1'), sheet_row(3, 'X1'), sheet_row(4, 'NEW1', village='Letzte')]
+        result = import_properties(rows, dry_run=True, batch_size=2)
+        self.assertEqual((result.created, result.updated, result.skipped), (2, 0, 1))
+        result = import_properties(rows, dry_run=True, batch_size=2, force_replace=True)
+        self.assertEqual((result.created, result.updated, result.skipped), (2, 1, 0))
+        self.assertFalse(Property.objects.exists())
+
+    def test_interrupted_import_resumes_from_checkpoint(self):
+        rows = [sheet_row(i + 2, f'P{i}') for i in range(10)]
+
+        def dies_after_row_6():
+            for row in rows:
+                if row[0] > 6:
+                    raise RuntimeError('worker killed')
+                yield row
+
+        checkpoint = start_checkpoint('a' * 64, 'sheet.xlsx')
+        with self.assertRaises(RuntimeError):
+            import_properties(dies_after_row_6(), batch_size=2, checkpoint=checkpoint)
+        checkpoint.refresh_from_db()
+        self.assertEqual((checkpoint.last_row, checkpoint.state['created']), (5, 4))
+        self.assertEqual(Property.objects.count(), 4)
+
+        checkpoint = start_checkpoint('a' * 64, 'sheet.xlsx')
+        with CaptureQueriesContext(connection) as ctx:
+            result = import_properties(rows, batch_size=2, checkpoint=checkpoint)
+        self.assertEqual((result.created, result.skipped), (10, 0))
+        self.assertEqual(Property.objects.count(), 10)
+        self.assertFalse(ImportCheckpoint.objects.exists())
+        inserted = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "properties_property"')]
+        self.assertEqual(len(inserted), 3)
+
+    def test_writes_are_batched(self):
+        rows = [sheet_row(i + 2, f'P{i}', team='Team A') for i in range(200)]
+        with CaptureQueriesContext(connection) as ctx:
+            result = import_properties(rows, batch_size=500)
+        # The row-by-row importer issued ~5 queries per row
+        self.assertLess(len(ctx.captured_queries), 30)
+        self.assertEqual(result.created, 200)
+        self.assertEqual(self.team_a.properties.count(), 200)
+
+
+class NormalizeColumnsTests(TestCase):
+    def test_columns_are_normalised(self):
+        df = pd.DataFrame({
+            'Number': [' P1 ', None],
+            'HNA': ['a', None],
+            'K.L 15M': [' 4.7 ', 'x'],
+            'Gebaute Units': [2.0, None],
+            'HBG Termin': ['2024-01-02 10:00', 'bad'],
+        })
+        rows = list(iter_dataframe_rows(df))
+        (row_number, number, data, team), second = rows
+        self.assertEqual((row_number, number, team), (2, 'P1', ''))
+        self.assertEqual(data['house_number_affix'], 'a')
+        self.assertEqual((data['kl_15m'], data['kl_20m'], data['gebaute_units']), (4, 0, 2))
+        self.assertEqual(data['hbg_termin'], timezone.make_aware(datetime(2024, 1, 2)))
+        self.assertEqual(type(data['kl_15m']), int)
+        self.assertEqual((second[1], second[2]['kl_15m'], second[2]['gebaute_units']), ('', 0, None))
+        self.assertIsNone(second[2]['hbg_termin'])
+
+
+class ParallelImportTests(TestCase):
+    def test_partitions_are_stable(self):
+        numbers = [f'P{i}' for i in range(100)]
+        partitions = [partition_for(number, 4) for number in numbers]
+        self.assertEqual(partitions, [partition_for(number, 4) for number in numbers])
+        self.assertEqual(set(partitions), {0, 1, 2, 3})
+
+    def test_results_are_merged(self):
+        first, second = ImportResult(), ImportResult()
+        first.created, first.error_count, first.errors = 2, 1, ['Row 10: bad']
+        second.updated, second.unchanged, second.error_count, second.errors = 1, 3, 1, ['Row 4: bad']
+        merged = merge_results([first, second])
+        self.assertEqual((merged.created, merged.updated, merged.unchanged, merged.processed), (2, 1, 3, 8))
+        self.assertEqual(merged.errors, ['Row 4: bad', 'Row 10: bad'])
+
+    def test_killed_worker_fails_the_import(self):
+        rows = [sheet_row(i + 2, f'P{i}') for i in range(200)]
+        with mock.patch('properties.parallel._worker', _killed_worker), \
+                mock.patch('properties.parallel.POLL_SECONDS', 0.1):
+            with self.assertRaisesMessage(RuntimeError, 'exited with code 9'):
+                import_parallel(rows, 2, batch_size=10)
+
+
+class ImportJobTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(self.admin)
+
+    def upload(self, df, name='sheet.xlsx'):
+        buffer = io.BytesIO()
+        df.to_excel(buffer, index=False)
+        return SimpleUploadedFile(name, buffer.getvalue())
+
+    def test_upload_is_queued_and_processed_by_worker(self):
+        df = pd.DataFrame({'Number': ['P1', 'P2', None], 'Village': ['A', 'B', 'C']})
+        response = self.client.post(reverse('excel_import'), {'excel_file': self.upload(df)})
+        job = ImportJob.objects.get()
+        self.assertRedirects(response, f"{reverse('excel_import_export')}?job={job.pk}")
+        self.assertEqual(job.status, ImportJob.STATUS_PENDING)
+        self.assertFalse(Property.objects.exists())
+
+        call_command('run_import_worker', '--once', stdout=io.StringIO())
+
+        status = self.client.get(reverse('import_job_status', args=[job.pk])).json()
+        self.assertEqual(status['status'], ImportJob.STATUS_DONE)
+        self.assertEqual((status['total_rows'], status['processed_rows']), (3, 3))
+        self.assertEqual((status['created'], status['error_count']), (2, 1))
+        self.assertEqual(len(status['errors']), 1)
+        self.assertEqual(Property.objects.count(), 2)
+
+    def test_stale_running_job_is_marked_failed(self):
+        started = timezone.now() - timedelta(hours=3)
+        stale = ImportJob.objects.create(file='import_jobs/a.xlsx', status=ImportJob.STATUS_RUNNING, started_at=started)
+        live = ImportJob.objects.create(
+            file='import_jobs/b.xlsx', status=ImportJob.STATUS_RUNNING, started_at=timezone.now(),
+        )
+        with override_settings(IMPORT_JOB_TIMEOUT=2 * 60 * 60):
+            call_command('run_import_worker', '--once', stdout=io.StringIO())
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, ImportJob.STATUS_FAILED)
+        self.assertIn('Upload the file again', stale.message)
+        self.assertIsNotNone(stale.finished_at)
+        live.refresh_from_db()
+        self.assertEqual(live.status, ImportJob.STATUS_RUNNING)
+
+    def test_csv_upload_is_imported(self):
+        content = '\ufeffNumber;Village;K.L 15M\n007;Dorf;3\n;Leer;\n'.encode('utf-8')
+        self.client.post(reverse('excel_import'), {'excel_file': SimpleUploadedFile('dump.csv', content)})
+        call_command('run_import_worker', '--once', stdout=io.StringIO())
+        job = ImportJob.objects.get()
+        self.assertEqual((job.status, job.created_count, job.error_count), (ImportJob.STATUS_DONE, 1, 1))
+        self.assertEqual(job.errors, ["Row 3: ❌ Missing 'Number' field (required)"])
+        prop = Property.objects.get()
+        self.assertEqual((prop.number, prop.village, prop.kl_15m), ('007', 'Dorf', 3))
+
+    def test_preview_job_is_applied_from_preview_page(self):
+        Property.objects.create(number='P1', village='Alt')
+        df = pd.DataFrame({'Number': ['P1', 'P2'], 'Village': ['Neu', 'B']})
+        self.client.post(reverse('excel_import'), {
+            'excel_file': self.upload(df), 'force_replace': 'on', 'preview': 'on',
+        })
+        call_command('run_import_worker', '--once', stdout=io.StringIO())
+        preview = ImportJob.objects.get()
+        self.assertEqual((preview.created_count, preview.updated_count), (1, 1))
+        self.assertEqual(Property.objects.count(), 1)
+
+        response = self.client.get(reverse('import_job_preview', args=[preview.pk]))
+        self.assertContains(response, 'Alt')
+        response = self.client.post(reverse('import_job_preview', args=[preview.pk]))
+        call_command('run_import_worker', '--once', stdout=io.StringIO())
+        applied = ImportJob.objects.exclude(pk=preview.pk).get()
+        self.assertRedirects(response, f"{reverse('excel_import_export')}?job={applied.pk}")
+        self.assertEqual((applied.status, applied.updated_count), (ImportJob.STATUS_DONE, 1))
+        self.assertEqual(Property.objects.get(number='P1').village, 'Neu')
+
+    def test_malformed_files_are_rejected_before_queueing(self):
+        bad = SimpleUploadedFile('broken.xlsx', b'not a workbook')
+        no_number = self.upload(pd.DataFrame({'Village': ['A']}))
+        for upload in (bad, no_number):
+            response = self.client.post(reverse('excel_import'), {'excel_file': upload}, follow=True)
+            self.assertTrue(any('❌' in str(m) for m in response.context['messages']))
+        self.assertFalse(ImportJob.objects.exists())
+
+    def test_sheet_reader_streams_chunks(self):
+        df = pd.DataFrame({'Number': [f'P{i}' for i in range(7)], 'K.L 15M': range(7)})
+        df.loc[3, :] = None  # blank row is skipped but keeps the Excel numbering
+        with SheetReader(self.upload(df), chunk_size=3) as reader:
+            self.assertEqual([len(chunk) for chunk in reader.iter_chunks()], [3, 3])
+        with SheetReader(self.upload(df), chunk_size=3) as reader:
+            rows = list(reader.iter_rows())
+        self.assertEqual([row[0] for row in rows], [2, 3, 4, 6, 7, 8])
+        self.assertEqual((rows[3][1], rows[3][2]['kl_15m']), ('P4', 4))
+
+        result = import_properties(rows + [sheet_row(9, 'P0', village='Again')], force_replace=True, batch_size=2)
+        self.assertEqual((result.created, result.updated), (6, 1))
+        self.assertEqual(Property.objects.get(number='P0').village, 'Again')
+
+
+    def test_integer_text_columns_do_not_depend_on_chunk_boundaries(self):
+        df = pd.DataFrame({'Number': [100, 101, 102, 103, None, 105],
+                           'Address ID': [5000, 5001, 5002, 5003, None, 5005]})
+        df.loc[4, 'Number'] = 104
+        with SheetReader(self.upload(df), chunk_size=3) as reader:
+            rows = list(reader.iter_rows())
+        self.assertEqual([row[1] for row in rows], ['100', '101', '102', '103', '104', '105'])
+        self.assertEqual([row[2]['address_id'] for row in rows], ['5000', '5001', '5002', '5003', '', '5005'])
+        # Float columns as pandas reads them from .xls/.csv give the same text
+        rows = list(iter_dataframe_rows(pd.DataFrame({'Number': [103.0, 104.5], 'Address ID': [5003.0, None]})))
+        self.assertEqual([(row[1], row[2]['address_id']) for row in rows], [('103', '5003'), ('104.5', '')])
+
+
+class ExcelExportTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(self.admin)
+        self.async_client.force_login(self.admin)
+        team = Team.objects.create(name='Team A')
+        for i in range(3):
+            prop = Property.objects.create(number=f'P{i}', village='Dorf', status='bezahlt')
+            prop.teams.add(team)
+
+    def test_xlsx_export_roundtrip(self):
+        response = self.client.get(reverse('excel_export'))
+        self.assertEqual(response.status_code, 200)
+        df = pd.read_excel(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(sorted(df['Number']), ['P0', 'P1', 'P2'])
+        self.assertEqual(set(df['Team']), {'Team A'})
+        self.assertEqual(set(df['Status']), {'Bezahlt'})
+
+    def test_csv_export_is_streamed(self):
+        response = self.client.get(reverse('excel_export'), {'format': 'csv', 'search': 'P1'})
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith('P1,Team A,'))
+
+    async def test_csv_export_streams_under_asgi(self):
+        response = await self.async_client.get(reverse('excel_export'), {'format': 'csv'})
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        lines = content.decode('utf-8-sig').splitlines()
+        self.assertEqual(sorted(line.split(',')[0] for line in lines[1:]), ['P0', 'P1', 'P2'])
+
+    async def test_xlsx_export_streams_under_asgi(self):
+        response = await self.async_client.get(reverse('excel_export'))
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(int(response['Content-Length']), len(content))
+        self.assertIn('attachment;', response['Content-Disposition'])
+        df = pd.read_excel(io.BytesIO(content))
+        self.assertEqual(sorted(df['Number']), ['P0', 'P1', 'P2'])
+
+    def test_async_export_requires_login(self):
+        self.client.logout()
+        url = reverse('excel_export')
+        response = self.client.get(url)
+        self.assertRedirects(response, f'{reverse("login")}?next={url}', fetch_redirect_response=False)
+
+    def test_parquet_export_roundtrip(self):
+        Property.objects.filter(number='P1').update(ausbau_termin=timezone.now(), kl_15m=4)
+        response = self.client.get(reverse('excel_export'), {'format': 'parquet'})
+        content = b''.join(response.streaming_content)
+        df = pd.read_parquet(io.BytesIO(content))
+        self.assertEqual(list(df.columns)[:2], ['Number', 'Team'])
+        self.assertEqual(sorted(df['Number']), ['P0', 'P1', 'P2'])
+
+        Property.objects.all().delete()
+        self.client.post(reverse('excel_import'), {'excel_file': SimpleUploadedFile('export.parquet', content)})
+        call_command('run_import_worker', '--once', stdout=io.StringIO())
+        self.assertEqual(ImportJob.objects.get().created_count, 3)
+        prop = Property.objects.get(number='P1')
+        self.assertEqual((prop.kl_15m, prop.get_team_names()), (4, 'Team A'))
+        self.assertIsNotNone(prop.ausbau_termin)
+
+
+class PropertyStatsTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.team_a = Team.objects.create(name='Team A')
+        self.team_b = Team.objects.create(name='Team B')
+
+    def assertStatsCurrent(self):
+        self.assertEqual(reconcile_stats(dry_run=True), [])
+
+    def stats(self, team, status):
+        return PropertyStats.objects.get(team=team, status=status)
+
+    def test_model_writes_keep_stats_current(self):
+        prop = Property.objects.create(number='P1', status='klarungen', kl_15m=2, mit_infra=1)
+        prop.teams.add(self.team_a, self.team_b)
+        self.assertEqual((self.stats(None, 'klarungen').kl_15m, self.stats(self.team_b, 'klarungen').mit_infra), (2, 1))
+
+        prop.status = 'bezahlt'
+        prop.kl_20m = 3
+        prop.save()
+        self.assertEqual(self.stats(self.team_a, 'bezahlt').kl_20m, 3)
+        self.assertEqual(self.stats(self.team_a, 'klarungen').property_count, 0)
+        self.assertStatsCurrent()
+
+        prop.teams.remove(self.team_a, self.team_a.pk + 100)
+        self.team_b.properties.clear()
+        self.team_a.properties.add(prop)
+        self.assertStatsCurrent()
+
+        prop.delete()
+        self.assertStatsCurrent()
+        self.assertEqual(self.stats(None, 'bezahlt').property_count, 0)
+
+    def test_bulk_writes_keep_stats_current(self):
+        Property.objects.create(number='P1', status='klarungen')
+        import_properties([
+            sheet_row(2, 'P1', team='Team A', status='bezahlt', kl_30m=4),
+            sheet_row(3, 'P2', team='Team A, Team B', status='bezahlt', ohne_infra=2),
+        ], force_replace=True)
+        self.assertEqual(self.stats(self.team_a, 'bezahlt').property_count, 2)
+        self.assertStatsCurrent()
+
+        properties = Property.objects.filter(number='P2')
+        with track_stats(properties.values_list('pk', flat=True)):
+            properties.update(status='storniert')
+        self.assertEqual(self.stats(self.team_b, 'storniert').ohne_infra, 2)
+        self.assertStatsCurrent()
+
+    def test_reconcile_command_repairs_drift(self):
+        prop = Property.objects.create(number='P1', status='klarungen')
+        prop.teams.add(self.team_a)
+        PropertyStats.objects.filter(team=self.team_a).update(property_count=5)
+        Property.objects.filter(pk=prop.pk).update(status='bezahlt')
+
+        out = io.StringIO()
+        call_command('reconcile_property_stats', stdout=out)
+        self.assertIn('4 drifted rows rebuilt', out.getvalue())
+        self.assertStatsCurrent()
+        self.assertEqual(len(compute_stats()), PropertyStats.objects.count())
+
+    def test_dashboard_reads_summary_table(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(admin)
+        for i in range(3):
+            Property.objects.create(number=f'P{i}', status='bezahlt', kl_15m=2).teams.add(self.team_a)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('property_stats'))
+        self.assertFalse([q for q in ctx.captured_queries if '"properties_property"' in q['sql']])
+        all_row, team_row = response.context['rows']
+        self.assertIsNone(all_row['team'])
+        self.assertEqual((team_row['team'], team_row['property_count'], team_row['kl_meters']), (self.team_a, 3, 90))
+        self.assertContains(response, 'Team A')
+
+
+class TeamAdminTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(self.admin)
+
+    def add_team(self, i):
+        team = Team.objects.create(name=f'Team {i}')
+        TeamMember.objects.create(user=User.objects.create_user(f'user{i}'), team=team)
+        for j in range(i):
+            Property.objects.create(number=f'P{i}-{j}').teams.add(team)
+        return team
+
+    def changelist(self, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('admin:properties_team_changelist'), params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_changelist_query_count_is_fixed(self):
+        self.add_team(1)
+        _, baseline = self.changelist()
+        for i in range(2, 7):
+            self.add_team(i)
+        response, queries = self.changelist()
+        self.assertEqual(queries, baseline)
+        team = next(team for team in response.context['cl'].result_list if team.name == 'Team 4')
+        self.assertEqual((team.member_count, team.property_count), (1, 4))
+
+    def test_counts_are_sortable(self):
+        for i in (2, 5, 3):
+            self.add_team(i)
+        response, _ = self.changelist(o='-4')
+        self.assertEqual([team.name for team in response.context['cl'].result_list], ['Team 5', 'Team 3', 'Team 2'])
+
+
+class BulkTeamActionTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(self.admin)
+        self.team_a = Team.objects.create(name='Team A')
+        self.team_b = Team.objects.create(name='Team B')
+
+    def create_properties(self, count, start=0):
+        return [Property.objects.create(number=f'P{i}').pk for i in range(start, start + count)]
+
+    def run_action(self, action, ids, **data):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                reverse('admin:properties_property_changelist'),
+                {'action': action, '_selected_action': ids, **data},
+                follow='apply' in data,
+            )
+        return response, len(ctx.captured_queries)
+
+    def test_assign_team_is_set_based(self):
+        ids = self.create_properties(30)
+        Property.objects.get(pk=ids[0]).teams.add(self.team_a)
+        Property.objects.get(pk=ids[1]).teams.add(self.team_b)
+
+        response, _ = self.run_action('bulk_assign_team', ids, apply='1', team=self.team_a.pk, clear_existing='on')
+        self.assertEqual(self.team_a.properties.count(), 30)
+        self.assertFalse(self.team_b.properties.exists())
+        self.assertContains(response, 'assigned team &quot;Team A&quot; to 29 properties (removed 1 other team')
+        self.assertEqual(reconcile_stats(dry_run=True), [])
+
+        # Statement count does not depend on the selection size
+        _, queries = self.run_action('bulk_assign_team', ids[:5], apply='1', team=self.team_b.pk)
+        _, more_queries = self.run_action('bulk_assign_team', ids + self.create_properties(30, start=30),
+                                          apply='1', team=self.team_b.pk)
+        self.assertEqual(more_queries, queries)
+        self.assertEqual(self.team_b.properties.count(), 60)
+
+    def test_assign_team_counts_only_new_links(self):
+        ids = self.create_properties(3)
+        self.team_a.properties.add(ids[0])
+        # A repeated id is skipped by the INSERT's conflict handling, like a concurrent add
+        self.assertEqual(assign_team(ids + [ids[1]], self.team_a), (2, 0))
+        self.assertEqual(assign_team(ids, self.team_a), (0, 0))
+
+    def test_remove_team_reports_removed_links(self):
+        ids = self.create_properties(5)
+        self.team_a.properties.add(*ids[:3])
+        response, _ = self.run_action('bulk_remove_team', ids, apply='1', team=self.team_a.pk)
+        self.assertContains(response, 'removed team &quot;Team A&quot; from 3 properties')
+        self.assertFalse(self.team_a.properties.exists())
+
+    def test_confirmation_lists_a_sample(self):
+        ids = self.create_properties(30)
+        response, _ = self.run_action('bulk_assign_team', ids)
+        self.assertContains(response, 'the following 30 properties')
+        self.assertContains(response, '... and 10 more')
+        self.assertEqual(response.content.decode().count('name="_selected_action"'), 30)
+
+
+class DbMetricsTests(TestCase):
+    def test_metrics_count_requests_and_connections(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(admin)
+        before = connection_stats()
+        record_connect(0.004)
+        stats = self.client.get(reverse('db_metrics')).json()
+        self.assertEqual(stats['requests'], before['requests'] + 1)
+        # The test database connection stays open between requests
+        self.assertEqual(stats['reused'], before['reused'] + 1)
+        self.assertGreater(stats['connect_seconds'], before['connect_seconds'])
+        self.assertIn('reuse_ratio', stats)
+
+    def test_metrics_are_admin_only(self):
+        self.client.force_login(User.objects.create_user('user', password='pw'))
+        self.assertEqual(self.client.get(reverse('db_metrics')).status_code, 403)
+
+
+class TeamNamesQueryCountTests(TestCase):
+    """Team names must be loaded in bulk, not once per property"""
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(self.admin)
+        self.teams = [Team.objects.create(name=f'Team {i}') for i in range(2)]
+        self.next_number = 0
+
+    def add_properties(self, count):
+        for _ in range(count):
+            prop = Property.objects.create(number=f'P{self.next_number}')
+            prop.teams.set(self.teams)
+            self.next_number += 1
+
+    def count_queries(self, url, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params or {})
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def assert_constant_queries(self, url, params=None):
+        self.add_properties(2)
+        few = self.count_queries(url, params)
+        self.add_properties(20)
+        self.assertEqual(self.count_queries(url, params), few)
+
+    def test_export(self):
+        self.assert_constant_queries(reverse('excel_export'), {'format': 'csv'})
+
+    def test_admin_changelist(self):
+        self.assert_constant_queries(reverse('admin:properties_property_changelist'))
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(self.admin)
+        now = timezone.now()
+        for i in range(13):
+            Property.objects.create(
+                number=f'P{i}',
+                hbg='Ja' if i % 3 == 0 else '',
+                # Some rows share a termin, some have none
+                ausbau_termin=None if i % 4 == 0 else now + timedelta(days=i % 5),
+            )
+
+    def walk(self, url, params):
+        """Follow next cursors to the end, then previous cursors back to the start"""
+        pages = []
+        cursor = ''
+        while True:
+            page = self.client.get(url, {**params, 'paging': 'keyset', 'cursor': cursor}).context['properties']
+            pages.append([p.number for p in page])
+            if not page.has_next():
+                break
+            cursor = page.next_cursor()
+        back = [pages[-1]]
+        while page.has_previous():
+            cursor = page.previous_cursor()
+            page = self.client.get(url, {**params, 'paging': 'keyset', 'cursor': cursor}).context['properties']
+            back.append([p.number for p in page])
+        self.assertEqual(back[::-1], pages)
+        return [number for page in pages for number in page]
+
+    def test_list_pages_cover_every_row_in_order(self):
+        # HBG=Ja first, then nearest ausbau_termin (empty termin last), then id
+        expected = [p.number for p in sorted(
+            Property.objects.all(),
+            key=lambda p: (p.hbg != 'Ja', p.ausbau_termin is None, p.ausbau_termin or 0, p.id),
+        )]
+        self.assertEqual(self.walk(reverse('property_list'), {'per_page': 4}), expected)
+
+    def test_completed_pages_cover_every_row_in_order(self):
+        Property.objects.filter(number__in=['P1', 'P2']).update(updated_at=timezone.now())
+        Property.objects.update(status='bezahlt')
+        expected = [p.number for p in Property.objects.order_by('-updated_at', '-id')]
+        self.assertEqual(self.walk(reverse('property_completed'), {'per_page': 5}), expected)
+
+    def test_invalid_cursor_returns_first_page(self):
+        page = self.client.get(reverse('property_list'), {'paging': 'keyset', 'cursor': 'garbage'}).context['properties']
+        self.assertFalse(page.has_previous())
+        self.assertEqual(len(page), 13)
+
+    def test_tampered_cursor_returns_first_page(self):
+        for values in (['x', '2024-13-45T00:00:00', 1], ['x', None, 1], [[1], None, 1], [0, 'not a date', 1]):
+            cursor = encode_cursor(values, 'n')
+            page = self.client.get(reverse('property_list'), {'paging': 'keyset', 'cursor': cursor}).context['properties']
+            self.assertFalse(page.has_previous())
+            self.assertEqual(len(page), 13)
+
+    def test_keyset_links_keep_sort_and_count(self):
+        response = self.client.get(reverse('property_list'), {
+            'paging': 'keyset', 'per_page': 4, 'sort': 'relevance', 'count': 'exact',
+        })
+        self.assertContains(response, '&sort=relevance&count=exact"')
+
+
+class VisibilityTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('crew', password='pw')
+        mine = Team.objects.create(name='Mine')
+        other = Team.objects.create(name='Other')
+        TeamMember.objects.create(user=self.user, team=mine)
+        self.visible = Property.objects.create(number='V1')
+        self.visible.teams.set([mine, other])
+        self.hidden = Property.objects.create(number='H1')
+        self.hidden.teams.add(other)
+
+    def test_scoping(self):
+        self.assertEqual(list(get_user_properties(self.user)), [self.visible])
+        self.assertTrue(can_access_property(self.user, self.visible))
+        self.assertFalse(can_access_property(self.user, self.hidden.pk))
+        self.assertEqual([t.name for t in get_user_teams(self.user)], ['Mine'])
+
+    def test_detail_access(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('property_detail', args=[self.visible.pk])).status_code, 200)
+        self.assertRedirects(self.client.get(reverse('property_detail', args=[self.hidden.pk])), reverse('property_list'))
+
+    def test_plan_has_no_dedup_step(self):
+        queryset = get_user_properties(self.user).order_by('ausbau_termin')
+        self.assertNotIn('DISTINCT', str(queryset.query).upper())
+        plan = queryset.explain()
+        for step in ('DISTINCT', 'HashAggregate', 'Unique'):
+            self.assertNotIn(step, plan)
+
+
+class TeamCacheTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('crew', password='pw')
+        self.team = Team.objects.create(name='Mine')
+        self.membership = TeamMember.objects.create(user=self.user, team=self.team)
+        self.prop = Property.objects.create(number='V1')
+        self.prop.teams.add(self.team)
+
+    def test_membership_lookup_is_cached(self):
+        get_user_team_ids(self.user)
+        before = team_cache_counters.stats()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_team_ids(self.user), {self.team.pk})
+        self.assertEqual(team_cache_counters.stats()['hits'], before['hits'] + 1)
+        # Only the property/team link is queried once memberships are cached
+        with self.assertNumQueries(1):
+            self.assertTrue(can_access_property(self.user, self.prop))
+
+    def test_signals_invalidate(self):
+        self.assertEqual(get_user_team_ids(self.user), {self.team.pk})
+        self.membership.delete()
+        self.assertEqual(get_user_team_ids(self.user), frozenset())
+        other = Team.objects.create(name='Other')
+        TeamMember.objects.create(user=self.user, team=other)
+        self.assertFalse(can_access_property(self.user, self.prop))
+        self.assertEqual(get_user_team_ids(self.user), {other.pk})
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('crew', password='pw')
+        self.team = Team.objects.create(name='Mine')
+        self.other_team = Team.objects.create(name='Theirs')
+        TeamMember.objects.create(user=self.user, team=self.team)
+        self.prop = Property.objects.create(number='F1', village='Altdorf', status='klarungen')
+        self.prop.teams.add(self.team)
+        self.other = Property.objects.create(number='F2', village='Neudorf', status='klarungen')
+        self.other.teams.add(self.other_team)
+        self.client.force_login(self.user)
+
+    def get_list(self, **params):
+        return self.client.get(reverse('property_list'), params).context['property_table']
+
+    def assert_cached(self, **params):
+        before = fragment_cache_counters.stats()
+        self.get_list(**params)
+        self.assertEqual(fragment_cache_counters.stats()['hits'], before['hits'] + 1)
+
+    def test_table_is_served_from_cache(self):
+        first = self.get_list()
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.get_list()
+        self.assertEqual(first, second)
+        self.assertFalse([q for q in ctx.captured_queries if '"properties_property"' in q['sql']])
+        self.assert_cached()
+        # Every parameter of the table is part of the key
+        self.assertNotIn('Altdorf', self.get_list(search='Neudorf'))
+
+    def test_writes_invalidate(self):
+        self.get_list()
+        self.prop.village = 'Umbenannt'
+        self.prop.save(update_fields=['village'])
+        self.assertIn('Umbenannt', self.get_list())
+        PropertyImage.objects.create(property=self.prop, image='x.jpg')
+        self.assertIn('bi-images"></i> 1', self.get_list())
+        self.prop.teams.add(self.other_team)
+        self.assertIn('Theirs', self.get_list())
+
+    def test_bulk_writes_invalidate(self):
+        self.get_list()
+        with track_stats([self.prop.pk]):
+            Property.objects.filter(pk=self.prop.pk).update(village='Bulk')
+        self.assertIn('Bulk', self.get_list())
+        import_properties([sheet_row(2, 'F1', village='Import')], force_replace=True)
+        self.assertIn('Import', self.get_list())
+
+    def test_other_teams_stay_cached(self):
+        self.get_list()
+        self.other.village = 'Elsewhere'
+        self.other.save()
+        self.assert_cached()
+        # Superusers see every property, so their fragments are dropped
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(admin)
+        self.assertIn('Elsewhere', self.get_list())
+        self.other.save()
+        self.assertIn('Elsewhere', self.get_list())
+        self.assertEqual(self.client.get(reverse('cache_stats')).status_code, 200)
+
+
+class FacetTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('crew', password='pw')
+        self.team = Team.objects.create(name='Mine')
+        self.second = Team.objects.create(name='Second')
+        other = Team.objects.create(name='Theirs')
+        for team in (self.team, self.second):
+            TeamMember.objects.create(user=self.user, team=team)
+        for number, status, teams in (
+                ('A1', 'klarungen', [self.team, self.second]), ('A2', 'klarungen', [self.team]),
+                ('A3', 'storniert', [self.second]), ('A4', 'bezahlt', [self.team]), ('A5', 'klarungen', [other])):
+            Property.objects.create(number=number, status=status).teams.set(teams)
+        self.client.force_login(self.user)
+
+    def test_counts_in_one_query(self):
+        get_user_team_ids(self.user)  # memberships come from their own cache
+        with self.assertNumQueries(1):
+            facets = compute_facets(self.user, [self.team.pk, self.second.pk])
+        self.assertEqual(facets['statuses'], {'klarungen': 2, 'storniert': 1})
+        self.assertEqual(facets['teams'], {self.team.pk: 2, self.second.pk: 2})
+        self.assertEqual(facets['total'], 3)
+
+        statuses, teams, total = property_facets(self.user, get_user_teams(self.user), completed=True)
+        self.assertEqual(dict((value, count) for value, _, count in statuses), {'ausbau_abgeschlossen': 0, 'bezahlt': 1})
+        self.assertEqual([(team.name, count) for team, count in teams], [('Mine', 1), ('Second', 0)])
+
+    def test_list_pages_use_cached_facets(self):
+        response = self.client.get(reverse('property_list'))
+        self.assertIn(('klarungen', 'Klarungen', 2), response.context['statuses'])
+        self.assertContains(response, 'Mine (2)')
+        before = facet_cache_counters.stats()
+        self.client.get(reverse('property_list'))
+        self.assertEqual(facet_cache_counters.stats()['hits'], before['hits'] + 1)
+
+        Property.objects.filter(number='A2').get().teams.remove(self.team)
+        self.assertContains(self.client.get(reverse('property_list')), 'Mine (1)')
+        self.assertContains(self.client.get(reverse('property_completed')), 'Bezahlt (1)')
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        Property.objects.create(number='N-100', village='Musterdorf', pop_code='POP1')
+        Property.objects.create(number='N-200', village='Beispielstadt', owner_surname='Müller')
+
+    def test_matches_any_field_case_insensitively(self):
+        found = search_properties(Property.objects.all(), 'musterDORF', LIST_SEARCH_FIELDS)
+        self.assertEqual([p.number for p in found], ['N-100'])
+        found = search_properties(Property.objects.all(), 'n-2', COMPLETED_SEARCH_FIELDS)
+        self.assertEqual([p.number for p in found], ['N-200'])
+
+    def test_relevance_sort_falls_back_without_trigram_support(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('property_list'), {'search': 'pop1', 'sort': 'relevance'})
+        self.assertEqual([p.number for p in response.context['properties']], ['N-100'])
+
+
+@override_settings(IMAGE_RENDITIONS_ASYNC=False, MEDIA_ROOT=tempfile.mkdtemp())
+class ImageRenditionTests(TestCase):
+    def photo(self, size=(2000, 1000), orientation=None):
+        image = Image.new('RGB', size, 'red')
+        exif = Image.Exif()
+        if orientation:
+            exif[0x0112] = orientation
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', exif=exif)
+        return SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_renditions_are_downscaled_and_rotated(self):
+        prop = Property.objects.create(number='P1')
+        with self.captureOnCommitCallbacks(execute=True):
+            # Orientation 6: stored landscape, displayed portrait
+            image = PropertyImage.objects.create(property=prop, image=self.photo(orientation=6))
+        image.refresh_from_db()
+        with Image.open(image.thumbnail.path) as thumb:
+            self.assertEqual(thumb.size, (160, 320))
+        with Image.open(image.web_image.path) as web:
+            self.assertEqual(web.size, (800, 1600))
+        self.assertNotEqual(image.web_url(), image.image.url)
+
+    def test_builds_of_one_blob_share_files(self):
+        blob = ImageBlob.objects.create(sha256='a' * 64, file=self.photo(size=(400, 300)), size=1)
+        first, second = (
+            PropertyImage.objects.create(property=Property.objects.create(number=number), blob=blob,
+                                         image=blob.file.name)
+            for number in ('P1', 'P2')
+        )
+        thumbs_dir = os.path.join(settings.MEDIA_ROOT, 'property_images', 'thumbs')
+        existing = set(os.listdir(thumbs_dir)) if os.path.isdir(thumbs_dir) else set()
+        build_renditions(first)
+        build_renditions(second)
+        # A second build of an image (e.g. scheduled twice) keeps the existing files
+        build_renditions(first)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertTrue(first.thumbnail)
+        self.assertEqual((first.thumbnail.name, first.web_image.name), (second.thumbnail.name, second.web_image.name))
+        self.assertEqual(set(os.listdir(thumbs_dir)) - existing, {os.path.basename(first.thumbnail.name)})
+
+    def test_backfill_command(self):
+        prop = Property.objects.create(number='P1')
+        image = PropertyImage.objects.create(property=prop, image=self.photo(size=(400, 300)))
+        self.assertEqual(image.thumbnail_url(), image.image.url)
+        call_command('build_image_renditions', '--workers', '1', stdout=io.StringIO())
+        image.refresh_from_db()
+        self.assertTrue(image.thumbnail)
+
+
+@override_settings(IMAGE_RENDITIONS_ASYNC=False, MEDIA_ROOT=tempfile.mkdtemp())
+class ImageUploadTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(self.admin)
+        self.prop = Property.objects.create(number='P1')
+
+    def photo(self, name, color='blue'):
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 48), color).save(buffer, 'JPEG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+    def upload(self, files, prop=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse('property_upload_image', args=[(prop or self.prop).pk]), {'images': files}, follow=True,
+            )
+
+    def test_upload_requires_login(self):
+        self.client.logout()
+        url = reverse('property_upload_image', args=[self.prop.pk])
+        response = self.client.post(url, {'images': [self.photo('a.jpg')]})
+        self.assertRedirects(response, f'{reverse("login")}?next={url}', fetch_redirect_response=False)
+        self.assertFalse(self.prop.images.exists())
+
+    def test_files_are_stored_with_one_insert(self):
+        files = [self.photo(f'p{i}.jpg', color) for i, color in enumerate(['red', 'green', 'blue'])]
+        files.append(SimpleUploadedFile('notes.jpg', b'not an image'))
+        response = self.upload(files)
+        self.assertEqual(self.prop.images.count(), 3)
+        self.assertTrue(all(image.thumbnail for image in self.prop.images.all()))
+        texts = [str(m) for m in response.context['messages']]
+        self.assertIn('3 image(s) uploaded successfully', texts)
+        self.assertIn('Image notes.jpg was not uploaded: not a valid image', texts)
+
+    @override_settings(MAX_IMAGE_UPLOAD_SIZE=100)
+    def test_oversized_files_are_skipped(self):
+        response = self.upload([self.photo('big.jpg')])
+        self.assertFalse(self.prop.images.exists())
+        texts = [str(m) for m in response.context['messages']]
+        self.assertIn('Image big.jpg was not uploaded: file too large', texts)
+
+    def test_identical_content_is_stored_once(self):
+        other = Property.objects.create(number='P2')
+        self.upload([self.photo('a.jpg')])
+        response = self.upload([self.photo('copy.jpg'), self.photo('again.jpg')])
+        self.upload([self.photo('b.jpg')], prop=other)
+
+        self.assertEqual(ImageBlob.objects.count(), 1)
+        blob = ImageBlob.objects.get()
+        images = PropertyImage.objects.all()
+        self.assertEqual(len(images), 2)
+        self.assertTrue(all(image.image.name == blob.file.name for image in images))
+        self.assertEqual(len({image.thumbnail.name for image in images}), 1)
+        texts = [str(m) for m in response.context['messages']]
+        self.assertIn('Image copy.jpg was not uploaded: already uploaded for this property', texts)
+
+    def test_blob_removed_with_last_reference(self):
+        other = Property.objects.create(number='P2')
+        self.upload([self.photo('a.jpg')])
+        self.upload([self.photo('a.jpg')], prop=other)
+        blob = ImageBlob.objects.get()
+        storage = blob.file.storage
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('image_delete', args=[self.prop.images.get().pk]))
+        self.assertTrue(ImageBlob.objects.exists())
+        self.assertTrue(storage.exists(blob.file.name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('property_delete', args=[other.pk]))
+        self.assertFalse(ImageBlob.objects.exists())
+        self.assertFalse(storage.exists(blob.file.name))
+
+    def test_dedupe_command_merges_existing_images(self):
+        for i in range(2):
+            PropertyImage.objects.create(property=self.prop, image=self.photo(f'legacy{i}.jpg'))
+        call_command('dedupe_images', stdout=io.StringIO())
+        names = set(PropertyImage.objects.values_list('image', flat=True))
+        self.assertEqual(names, {ImageBlob.objects.get().file.name})
@@ -0,0 +1,136 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.uploadhandler import SkipFile, TemporaryFileUploadHandler
+from PIL import Image
+
+from .blobs import blob_name, hash_file
+from .fragments import invalidate_properties
+from .images import schedule_renditions
+from .models import ImageBlob, PropertyImage
+
+# Upload form field used by every image upload view
+IMAGE_FIELD = 'images'
+
+
+class BoundedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Spool every upload to a temporary file in fixed-size chunks.
+
+    Request memory stays at one chunk per upload regardless of file size.
+    Images larger than MAX_IMAGE_UPLOAD_SIZE are skipped and their names
+    recorded on request.skipped_uploads so the view can report them.
+    """
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        super().new_file(field_name, file_name, *args, **kwargs)
+        if not hasattr(self.request, 'skipped_uploads'):
+            self.request.skipped_uploads = []
+
+    def receive_data_chunk(self, raw_data, start):
+        limit = getattr(settings, 'MAX_IMAGE_UPLOAD_SIZE', None)
+        if self.field_name == IMAGE_FIELD and limit and start + len(raw_data) > limit:
+            self.file.close()
+            self.request.skipped_uploads.append(self.file_name)
+            raise SkipFile()
+        return super().receive_data_chunk(raw_data, start)
+
+
+class UploadResult:
+    """Outcome of storing one uploaded file"""
+
+    def __init__(self, name, image=None, error=''):
+        self.name = name
+        self.image = image
+        self.error = error
+
+    @property
+    def ok(self):
+        return not self.error
+
+
+def _inspect_file(upload):
+    """Validate one upload and hash its content (runs on a worker thread)"""
+    try:
+        with Image.open(upload) as img:
+            img.verify()
+    except Exception:
+        return None
+    return hash_file(upload)
+
+
+def _store_blob(sha256, upload):
+    """Write the content of a new blob to storage (runs on a worker thread)"""
+    field = ImageBlob._meta.get_field('file')
+    # Temporary uploads are moved into place instead of copied
+    name = field.storage.save(blob_name(sha256, upload.name), upload, max_length=field.max_length)
+    return ImageBlob(sha256=sha256, file=name, size=upload.size)
+
+
+def save_uploaded_images(request, property_obj):
+    """
+    Store all files of the request's `images` field for a property.
+
+    Files are validated and hashed concurrently by a thread pool. Content
+    already stored (on any property) is reused via its ImageBlob, found with
+    one lookup on the unique sha256 index; only new content is written, again
+    concurrently. All PropertyImage rows are inserted with one bulk_create.
+    Returns one UploadResult per file, including files skipped for exceeding
+    the size cap or already attached to this property.
+    """
+    uploads = request.FILES.getlist(IMAGE_FIELD)
+    results = [
+        UploadResult(name, error='file too large')
+        for name in getattr(request, 'skipped_uploads', [])
+    ]
+    if not uploads:
+        return results
+
+    workers = min(len(uploads), getattr(settings, 'IMAGE_UPLOAD_WORKERS', 4))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        hashes = list(pool.map(_inspect_file, uploads))
+
+        blobs = {blob.sha256: blob for blob in ImageBlob.objects.filter(sha256__in=set(filter(None, hashes)))}
+        new_content = {}
+        for upload, sha256 in zip(uploads, hashes):
+            if sha256 and sha256 not in blobs:
+                new_content.setdefault(sha256, upload)
+        written = list(pool.map(_store_blob, new_content, new_content.values()))
+
+    if written:
+        ImageBlob.objects.bulk_create(written, ignore_conflicts=True)
+        blobs.update((blob.sha256, blob) for blob in ImageBlob.objects.filter(sha256__in=new_content))
+        # Lost a race against a concurrent upload of the same content: drop our copy
+        for blob in written:
+            if blobs[blob.sha256].file.name != blob.file.name:
+                blob.file.storage.delete(blob.file.name)
+
+    attached = set(
+        PropertyImage.objects.filter(property=property_obj, blob__in=blobs.values())
+        .values_list('blob_id', flat=True)
+    )
+    stored = []
+    for upload, sha256 in zip(uploads, hashes):
+        if sha256 is None:
+            stored.append(UploadResult(upload.name, error='not a valid image'))
+            continue
+        blob = blobs[sha256]
+        if blob.pk in attached:
+            stored.append(UploadResult(upload.name, error='already uploaded for this property'))
+            continue
+        attached.add(blob.pk)
+        image = PropertyImage(property=property_obj, uploaded_by=request.user, blob=blob, image=blob.file.name)
+        stored.append(UploadResult(upload.name, image=image))
+
+    created = PropertyImage.objects.bulk_create([r.image for r in stored if r.ok])
+    # bulk_create does not send post_save, so schedule renditions and drop
+    # the list fragments here; images of already-known content reuse the
+    # existing renditions
+    if created and created[0].pk is None:
+        created = PropertyImage.objects.filter(property=property_obj, blob__in=[i.blob for i in created])
+    for image in created:
+        schedule_renditions(image.pk)
+    if created:
+        invalidate_properties([property_obj.pk])
+
+    return stored + results
@@ -5,8 +5,13 @@ urlpatterns = [
     path('', views.property_list, name='property_list'),
     path('completed/', views.property_completed, name='property_completed'),
     path('completed/<int:pk>/edit/', views.property_completed_edit, name='property_completed_edit'),
+    path('stats/', views.property_stats, name='property_stats'),
+    path('stats/db/', views.db_metrics, name='db_metrics'),
+    path('stats/cache/', views.cache_stats, name='cache_stats'),
     path('excel/', views.excel_import_export, name='excel_import_export'),
     path('excel/import/', views.excel_import, name='excel_import'),
+    path('excel/import/jobs/<int:pk>/', views.import_job_status, name='import_job_status'),
+    path('excel/import/jobs/<int:pk>/preview/', views.import_job_preview, name='import_job_preview'),
     path('excel/export/', views.excel_export, name='excel_export'),
     path('<int:pk>/', views.property_detail, name='property_detail'),
     path('create/', views.property_create, name='property_create'),
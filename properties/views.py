@@ -1,30 +1,72 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from asgiref.sync import sync_to_async
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
-from .models import Property, Team, TeamMember, PropertyImage
+from .models import Property, Team, TeamMember, PropertyImage, ImportJob, COMPLETED_STATUSES, hbg_priority_expression
 from django.core.paginator import Paginator
+from .pagination import KeysetPaginator
+from .access import can_access_property, get_user_properties, get_user_teams
+from .counters import all_cache_counters
+from .readers import IMPORT_EXTENSIONS, ImportFileError, open_import_file
+from .streaming import async_login_required, file_download_response, streaming_text_response
+from .uploads import save_uploaded_images
+from .dbmetrics import connection_stats
+from .facets import property_facets
+from .fragments import fragment_key, get_fragment, set_fragment
+from .stats import KL_FIELDS, summary_table, total_properties
+from .search import (
+    COMPLETED_SEARCH_FIELDS, EXPORT_SEARCH_FIELDS, LIST_SEARCH_FIELDS, search_properties, supports_ranking,
+)
 from django.utils import timezone
 from datetime import datetime
+import os
+
+# Page size used for per_page=all in keyset mode (no up-front COUNT)
+KEYSET_MAX_PER_PAGE = 1000
+# Request parameters the cached property_list table depends on
+LIST_FRAGMENT_PARAMS = ('search', 'status', 'team', 'per_page', 'paging', 'sort', 'page', 'cursor', 'count')
+
+def report_failed_uploads(request, results):
+    """Add an error message for every image that could not be stored"""
+    for result in results:
+        if not result.ok:
+            messages.error(request, f'Image {result.name} was not uploaded: {result.error}')
 
-def get_user_teams(user):
-    """Get all teams the user belongs to"""
-    if user.is_superuser:
-        return Team.objects.all()
-    return Team.objects.filter(members__user=user)
-
-def get_user_properties(user):
-    """Get all properties accessible by the user"""
-    if user.is_superuser:
-        return Property.objects.all()
-    user_teams = get_user_teams(user)
-    return Property.objects.filter(teams__in=user_teams).distinct()
 @login_required
 def property_list(request):
+    # The table is served from the fragment cache; the queries below only
+    # run on a miss, i.e. after a write to one of the user's teams
+    key = fragment_key('property_list', request.user,
+                       {name: request.GET.get(name, '') for name in LIST_FRAGMENT_PARAMS})
+    property_table = get_fragment(key)
+    if property_table is None:
+        property_table = render_to_string('properties/_property_table.html', property_table_context(request), request)
+        set_fragment(key, property_table)
+    
+    # Dropdown counts, cached per scope like the table
+    statuses, teams, total = property_facets(request.user, get_user_teams(request.user))
+    
+    context = {
+        'property_table': mark_safe(property_table),
+        'teams': teams,
+        'statuses': statuses,
+        'total': total,
+        'search': request.GET.get('search', '').strip(),
+        'status_filter': request.GET.get('status', ''),
+        'team_filter': request.GET.get('team', ''),
+        'paging': 'keyset' if request.GET.get('paging') == 'keyset' else '',
+        'sort': request.GET.get('sort', ''),
+    }
+    return render(request, 'properties/property_list.html', context)
+
+def property_table_context(request):
+    """Filtered, sorted page of the property list and the parameters its links carry"""
     properties = get_user_properties(request.user)
     
     # Exclude completed properties from main list
-    properties = properties.exclude(status__in=['ausbau_abgeschlossen', 'bezahlt'])
+    properties = properties.exclude(status__in=COMPLETED_STATUSES)
     
     search = request.GET.get('search', '').strip()
     status_filter = request.GET.get('status', '')
@@ -32,10 +74,11 @@ def property_list(request):
     
     # Get per_page parameter from request
     per_page = request.GET.get('per_page', '50')
+    keyset = request.GET.get('paging') == 'keyset'
     
     # Validate per_page
     if per_page == 'all':
-        per_page_int = properties.count()
+        per_page_int = KEYSET_MAX_PER_PAGE if keyset else properties.count()
     else:
         try:
             per_page_int = int(per_page)
@@ -47,14 +90,10 @@ def property_list(request):
         except (ValueError, TypeError):
             per_page_int = 50
     
+    sort = request.GET.get('sort', '')
+    rank = bool(search) and sort == 'relevance' and not keyset and supports_ranking()
     if search:
-        properties = properties.filter(
-            Q(address_id__icontains=search) |
-            Q(village__icontains=search) |
-            Q(owner_name__icontains=search) |
-            Q(owner_surname__icontains=search) |
-            Q(pop_code__icontains=search)
-        )
+        properties = search_properties(properties, search, LIST_SEARCH_FIELDS, rank=rank)
     
     if status_filter:
         properties = properties.filter(status=status_filter)
@@ -63,53 +102,49 @@ def property_list(request):
         properties = properties.filter(teams__id=team_filter)
     
     # Sort by HBG=Ja first, then by nearest ausbau_termin
-    from django.db.models import Case, When, Value, IntegerField
     properties = properties.annotate(
-        hbg_priority=Case(
-            When(hbg='Ja', then=Value(0)),
-            default=Value(1),
-            output_field=IntegerField(),
-        )
+        hbg_priority=hbg_priority_expression()
     ).order_by('hbg_priority', 'ausbau_termin')
+    if rank:
+        # ?sort=relevance: best trigram match first, then the usual priority
+        properties = properties.order_by('-search_rank', 'hbg_priority', 'ausbau_termin')
     
-    # Pagination with custom per_page parameter
-    paginator = Paginator(properties, per_page_int)
-    page = request.GET.get('page', 1)
-    properties_page = paginator.get_page(page)
-    
-    user_teams = get_user_teams(request.user)
+    # Teams are rendered for every row; load them with one query per page
+    properties = properties.prefetch_related('teams')
     
-    if request.user.is_superuser:
-        statuses = Property.objects.exclude(
-            status__in=['ausbau_abgeschlossen', 'bezahlt']
-        ).values_list('status', flat=True).distinct()
+    # Pagination with custom per_page parameter
+    if keyset:
+        paginator = KeysetPaginator(
+            properties,
+            [('hbg_priority', False), ('ausbau_termin', False), ('id', False)],
+            per_page_int,
+            count_mode=request.GET.get('count', 'approximate'),
+        )
+        properties_page = paginator.get_page(request.GET.get('cursor'))
     else:
-        statuses = Property.objects.filter(
-            teams__in=user_teams
-        ).exclude(
-            status__in=['ausbau_abgeschlossen', 'bezahlt']
-        ).values_list('status', flat=True).distinct()
+        paginator = Paginator(properties, per_page_int)
+        page = request.GET.get('page', 1)
+        properties_page = paginator.get_page(page)
     
-    context = {
+    return {
         'properties': properties_page,
-        'teams': user_teams,
-        'statuses': statuses,
         'search': search,
         'status_filter': status_filter,
         'team_filter': team_filter,
         'per_page': per_page,
+        'paging': 'keyset' if keyset else '',
+        'sort': sort,
+        'count': request.GET.get('count', ''),
     }
-    return render(request, 'properties/property_list.html', context)
+
 @login_required
 def property_detail(request, pk):
     property_obj = get_object_or_404(Property, pk=pk)
     
     # Check access
-    if not request.user.is_superuser:
-        user_teams = get_user_teams(request.user)
-        if not property_obj.teams.filter(id__in=user_teams).exists():
-            messages.error(request, 'Access denied: You do not have permission to view this property')
-            return redirect('property_list')
+    if not can_access_property(request.user, property_obj):
+        messages.error(request, 'Access denied: You do not have permission to view this property')
+        return redirect('property_list')
     
     context = {
         'property': property_obj,
@@ -145,13 +180,7 @@ def property_create(request):
             if team_ids:
                 property_obj.teams.set(team_ids)
             
-            images = request.FILES.getlist('images')
-            for image in images:
-                PropertyImage.objects.create(
-                    property=property_obj,
-                    image=image,
-                    uploaded_by=request.user
-                )
+            report_failed_uploads(request, save_uploaded_images(request, property_obj))
             
             messages.success(request, f'Property {property_obj.number} created successfully')
             return redirect('property_detail', pk=property_obj.pk)
@@ -189,13 +218,7 @@ def property_admin_edit(request, pk):
             team_ids = request.POST.getlist('teams')
             property_obj.teams.set(team_ids)
             
-            images = request.FILES.getlist('images')
-            for image in images:
-                PropertyImage.objects.create(
-                    property=property_obj,
-                    image=image,
-                    uploaded_by=request.user
-                )
+            report_failed_uploads(request, save_uploaded_images(request, property_obj))
             
             messages.success(request, 'Admin fields updated successfully')
             return redirect('property_detail', pk=pk)
@@ -219,11 +242,9 @@ def property_user_edit(request, pk):
         return redirect('property_detail', pk=pk)
     
     # Check access
-    if not request.user.is_superuser:
-        user_teams = get_user_teams(request.user)
-        if not property_obj.teams.filter(id__in=user_teams).exists():
-            messages.error(request, 'Access denied')
-            return redirect('property_list')
+    if not can_access_property(request.user, property_obj):
+        messages.error(request, 'Access denied')
+        return redirect('property_list')
     
     if request.method == 'POST':
         try:
@@ -269,17 +290,13 @@ def property_user_edit(request, pk):
             property_obj.save()
             
             # Handle image uploads - they are added, not replaced
-            images = request.FILES.getlist('images')
-            if images:
-                for image in images:
-                    PropertyImage.objects.create(
-                        property=property_obj,
-                        image=image,
-                        uploaded_by=request.user
-                    )
-                messages.success(request, f'Property updated and {len(images)} image(s) uploaded successfully')
+            results = save_uploaded_images(request, property_obj)
+            uploaded = sum(result.ok for result in results)
+            if uploaded:
+                messages.success(request, f'Property updated and {uploaded} image(s) uploaded successfully')
             else:
                 messages.success(request, 'User fields updated successfully')
+            report_failed_uploads(request, results)
             
             return redirect('property_detail', pk=pk)
         except Exception as e:
@@ -306,14 +323,12 @@ def property_delete(request, pk):
 @login_required
 def image_delete(request, pk):
     image = get_object_or_404(PropertyImage, pk=pk)
-    property_pk = image.property.pk
+    property_pk = image.property_id
     
     # Check access
-    if not request.user.is_superuser:
-        user_teams = get_user_teams(request.user)
-        if not image.property.teams.filter(id__in=user_teams).exists():
-            messages.error(request, 'Access denied')
-            return redirect('property_list')
+    if not can_access_property(request.user, image.property_id):
+        messages.error(request, 'Access denied')
+        return redirect('property_list')
     
     if request.method == 'POST':
         image.delete()
@@ -327,24 +342,17 @@ def property_upload_image(request, pk):
     property_obj = get_object_or_404(Property, pk=pk)
     
     # Check access
-    if not request.user.is_superuser:
-        user_teams = get_user_teams(request.user)
-        if not property_obj.teams.filter(id__in=user_teams).exists():
-            messages.error(request, 'Access denied')
-            return redirect('property_list')
+    if not can_access_property(request.user, property_obj):
+        messages.error(request, 'Access denied')
+        return redirect('property_list')
     
     if request.method == 'POST':
-        images = request.FILES.getlist('images')
-        if images:
-            count = 0
-            for image in images:
-                PropertyImage.objects.create(
-                    property=property_obj,
-                    image=image,
-                    uploaded_by=request.user
-                )
-                count += 1
-            messages.success(request, f'{count} image(s) uploaded successfully')
+        results = save_uploaded_images(request, property_obj)
+        if results:
+            count = sum(result.ok for result in results)
+            if count:
+                messages.success(request, f'{count} image(s) uploaded successfully')
+            report_failed_uploads(request, results)
         else:
             messages.warning(request, 'No images selected')
         
@@ -365,7 +373,7 @@ def property_completed(request):
     properties = get_user_properties(request.user)
     
     # Only show completed properties
-    properties = properties.filter(status__in=['ausbau_abgeschlossen', 'bezahlt'])
+    properties = properties.filter(status__in=COMPLETED_STATUSES)
     
     search = request.GET.get('search', '').strip()
     team_filter = request.GET.get('team', '')
@@ -373,9 +381,10 @@ def property_completed(request):
     
     # Get per_page parameter from request
     per_page = request.GET.get('per_page', '50')
+    keyset = request.GET.get('paging') == 'keyset'
     
     if per_page == 'all':
-        per_page_int = properties.count()
+        per_page_int = KEYSET_MAX_PER_PAGE if keyset else properties.count()
     else:
         try:
             per_page_int = int(per_page)
@@ -387,12 +396,7 @@ def property_completed(request):
             per_page_int = 50
     
     if search:
-        properties = properties.filter(
-            Q(number__icontains=search) |
-            Q(village__icontains=search) |
-            Q(owner_name__icontains=search) |
-            Q(owner_surname__icontains=search)
-        )
+        properties = search_properties(properties, search, COMPLETED_SEARCH_FIELDS)
     
     if team_filter:
         properties = properties.filter(teams__id=team_filter)
@@ -400,22 +404,35 @@ def property_completed(request):
     if status_filter:
         properties = properties.filter(status=status_filter)
     
-    properties = properties.order_by('-updated_at')
+    properties = properties.order_by('-updated_at').prefetch_related('teams')
     
     # ⭐ Pagination
-    paginator = Paginator(properties, per_page_int)
-    page = request.GET.get('page', 1)
-    properties_page = paginator.get_page(page)
+    if keyset:
+        paginator = KeysetPaginator(
+            properties,
+            [('updated_at', True), ('id', True)],
+            per_page_int,
+            count_mode=request.GET.get('count', 'approximate'),
+        )
+        properties_page = paginator.get_page(request.GET.get('cursor'))
+    else:
+        paginator = Paginator(properties, per_page_int)
+        page = request.GET.get('page', 1)
+        properties_page = paginator.get_page(page)
     
-    user_teams = get_user_teams(request.user)
+    statuses, teams, total = property_facets(request.user, get_user_teams(request.user), completed=True)
     
     context = {
         'properties': properties_page,
-        'teams': user_teams,
+        'teams': teams,
+        'statuses': statuses,
+        'total': total,
         'search': search,
         'team_filter': team_filter,
         'status_filter': status_filter,
         'per_page': per_page,
+        'paging': 'keyset' if keyset else '',
+        'count': request.GET.get('count', ''),
     }
     return render(request, 'properties/property_completed.html', context)
 
@@ -430,7 +447,7 @@ def property_completed_edit(request, pk):
     
     if request.method == 'POST':
         new_status = request.POST.get('status')
-        if new_status in ['ausbau_abgeschlossen', 'bezahlt']:
+        if new_status in COMPLETED_STATUSES:
             property_obj.status = new_status
             property_obj.save()
             messages.success(request, f'Status updated to {property_obj.get_status_display()}')
@@ -439,10 +456,11 @@ def property_completed_edit(request, pk):
         return redirect('property_completed')
     
     return redirect('property_completed')
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment
-from django.http import HttpResponse
-import io
+from django.http import JsonResponse
+from django.urls import reverse
+from .exporter import (
+    EXPORT_FORMATS, iter_csv, iter_export_rows, parquet_available, sample_export_rows, write_parquet, write_xlsx,
+)
 
 @login_required
 def excel_import_export(request):
@@ -452,13 +470,44 @@ def excel_import_export(request):
         return redirect('property_list')
     
     context = {
-        'total_properties': Property.objects.count(),
+        'total_properties': total_properties(),
         'teams': Team.objects.all(),
+        'import_jobs': ImportJob.objects.all()[:5],
+        'active_job': request.GET.get('job', ''),
+        'export_formats': [f for f in EXPORT_FORMATS if f != 'parquet' or parquet_available()],
     }
     return render(request, 'properties/excel_import_export.html', context)
+
+@login_required
+def property_stats(request):
+    """Dashboard of property counts per team and status, read from the PropertyStats summary table"""
+    if not request.user.is_superuser:
+        messages.error(request, 'Access denied: Admins only')
+        return redirect('property_list')
+
+    context = {
+        'statuses': [label if value else 'No status' for value, label in Property.STATUS_CHOICES],
+        'rows': summary_table(),
+        'kl_lengths': [field[3:] for field in KL_FIELDS],
+    }
+    return render(request, 'properties/property_stats.html', context)
+
+@login_required
+def cache_stats(request):
+    """Hit rates of the list fragment, facet and team membership caches in this worker process"""
+    if not request.user.is_superuser:
+        messages.error(request, 'Access denied: Admins only')
+        return redirect('property_list')
+
+    context = {
+        'pid': os.getpid(),
+        'caches': [(counters.label, counters.stats()) for counters in all_cache_counters()],
+    }
+    return render(request, 'properties/cache_stats.html', context)
+
 @login_required
 def excel_import(request):
-    """Handle Excel file import with detailed error reporting"""
+    """Queue an uploaded Excel file for the background import worker"""
     if not request.user.is_superuser:
         messages.error(request, 'Access denied: Admins only')
         return redirect('property_list')
@@ -468,277 +517,137 @@ def excel_import(request):
     
     excel_file = request.FILES.get('excel_file')
     force_replace = request.POST.get('force_replace') == 'on'
+    dry_run = request.POST.get('preview') == 'on'
     default_team_id = request.POST.get('default_team')
     
     if not excel_file:
         messages.error(request, 'Please select an Excel file')
         return redirect('excel_import_export')
     
-    if not excel_file.name.endswith(('.xlsx', '.xls')):
-        messages.error(request, 'Invalid file format. Please upload .xlsx or .xls file')
+    if not excel_file.name.lower().endswith(IMPORT_EXTENSIONS):
+        messages.error(request, 'Invalid file format. Please upload a .xlsx, .xls, .csv or .parquet file')
         return redirect('excel_import_export')
     
-    try:
-        import pandas as pd
-        from datetime import datetime
-        
-        # Read Excel file
-        df = pd.read_excel(excel_file)
-        
-        # Display available columns in the Excel file
-        available_columns = df.columns.tolist()
-        print(f"📊 Available columns in Excel: {available_columns}")
-        
-        # Clean data - replace NaN values with empty strings
-        df = df.fillna('')
-        
-        # Get default team
-        default_team = None
-        if default_team_id:
-            try:
-                default_team = Team.objects.get(id=default_team_id)
-            except Team.DoesNotExist:
-                pass
-        
-        created_count = 0
-        updated_count = 0
-        skipped_count = 0
-        error_count = 0
-        errors = []
-        
-        def clean_str(value):
-            """Convert value to string, return empty string if None/NaN"""
-            if value is None or value == '':
-                return ''
-            if pd.isna(value):
-                return ''
-            return str(value).strip()
-        
-        def parse_datetime(date_str):
-            """Parse datetime, return None if invalid/empty"""
-            if date_str is None or date_str == '':
-                return None
-            if pd.isna(date_str):
-                return None
-            try:
-                if isinstance(date_str, str):
-                    if not date_str.strip():
-                        return None
-                    dt = datetime.strptime(date_str.split()[0], '%Y-%m-%d')
-                elif hasattr(date_str, 'to_pydatetime'):
-                    dt = date_str.to_pydatetime()
-                else:
-                    return None
-                if timezone.is_naive(dt):
-                    dt = timezone.make_aware(dt)
-                return dt
-            except:
-                return None
-        
-        def safe_get(row, column_name, default=''):
-            """Safely get column value even if column doesn't exist"""
-            if column_name not in df.columns:
-                return default
-            value = row.get(column_name, default)
-            if pd.isna(value) or value == '':
-                return default
-            return value
-        
-        def safe_int(value, default=None):
-            """Safely convert to integer, return default if empty/invalid"""
-            if value is None or value == '':
-                return default
-            if pd.isna(value):
-                return default
-            try:
-                # Handle string representations
-                str_val = str(value).strip().lower()
-                if str_val in ['', 'nan', 'none', 'null']:
-                    return default
-                return int(float(value))
-            except:
-                return default
-        
-        for idx, row in df.iterrows():
-            row_number = idx + 2  # Excel row number (header is row 1)
-            try:
-                # Get Number field (required - this is the only mandatory field)
-                number = clean_str(safe_get(row, 'Number', ''))
-                if not number:
-                    error_count += 1
-                    errors.append(f"Row {row_number}: ❌ Missing 'Number' field (required)")
-                    continue
-                
-                # Check if exists
-                exists = Property.objects.filter(number=number).exists()
-                
-                if exists and not force_replace:
-                    skipped_count += 1
-                    continue
-                
-                # Prepare property data - all fields are optional except Number
-                property_data = {
-                    'address_id': clean_str(safe_get(row, 'Address ID', '')),
-                    'village': clean_str(safe_get(row, 'Village', '')),
-                    'street': clean_str(safe_get(row, 'Street', '')),
-                    'house_number': clean_str(safe_get(row, 'House number', '')),
-                    'house_number_affix': clean_str(safe_get(row, 'HNA', '')),
-                    'owner_email': clean_str(safe_get(row, 'Owner email', '')),
-                    'owner_name': clean_str(safe_get(row, 'Owner name', '')),
-                    'owner_surname': clean_str(safe_get(row, 'Owner surname', '')),
-                    'owner_phone_1': clean_str(safe_get(row, 'Owner phone 1', '')),
-                    'owner_phone_2': clean_str(safe_get(row, 'Owner phone 2', '')),
-                    'pop_code': clean_str(safe_get(row, 'PoP code', '')),
-                    'gebaute_units': safe_int(safe_get(row, 'Gebaute Units'), None),
-                    'hbg': clean_str(safe_get(row, 'HBG', '')),
-                    'hbg_termin': parse_datetime(safe_get(row, 'HBG Termin')),
-                    'ausbau_termin': parse_datetime(safe_get(row, 'Ausbau Termin')),
-                    'kl_15m': safe_int(safe_get(row, 'K.L 15M'), 0),
-                    'kl_20m': safe_int(safe_get(row, 'K.L 20M'), 0),
-                    'kl_30m': safe_int(safe_get(row, 'K.L 30M'), 0),
-                    'kl_50m': safe_int(safe_get(row, 'K.L 50M'), 0),
-                    'kl_80m': safe_int(safe_get(row, 'K.L 80M'), 0),
-                    'kl_100m': safe_int(safe_get(row, 'K.L 100M'), 0),
-                    'keller': clean_str(safe_get(row, 'keller', '')),
-                    'huep': clean_str(safe_get(row, 'HÜP', '')),
-                    'spleissen': clean_str(safe_get(row, 'spleissen', '')),
-                    'ohne_infra': safe_int(safe_get(row, 'ohne Infra'), 0),
-                    'mit_infra': safe_int(safe_get(row, 'mit Infra'), 0),
-                    'status': clean_str(safe_get(row, 'Status', '')),
-                    'comments': clean_str(safe_get(row, 'Comments', '')),
-                }
-                
-                # Create or update property
-                property_obj, created = Property.objects.update_or_create(
-                    number=number,
-                    defaults=property_data
-                )
-                
-                # Assign teams from Excel column or default team
-                team_names_str = clean_str(safe_get(row, 'Team', ''))
-                teams_assigned = []
-                
-                if team_names_str:
-                    # Clear existing teams first for updates
-                    if not created:
-                        property_obj.teams.clear()
-                    
-                    # Split by comma and find teams
-                    team_names = [name.strip() for name in team_names_str.split(',') if name.strip()]
-                    for team_name in team_names:
-                        try:
-                            team = Team.objects.get(name=team_name)
-                            property_obj.teams.add(team)
-                            teams_assigned.append(team_name)
-                        except Team.DoesNotExist:
-                            errors.append(f"Row {row_number}: ⚠️ Team '{team_name}' not found for property {number}")
-                
-                elif default_team and created:
-                    # Use default team only for new properties
-                    property_obj.teams.add(default_team)
-                    teams_assigned.append(default_team.name)
-                
-                # Success
-                action = "Created" if created else "Updated"
-                team_info = f" → Teams: {', '.join(teams_assigned)}" if teams_assigned else ""
-                print(f"✅ Row {row_number}: {action} property '{number}'{team_info}")
-                
-                if created:
-                    created_count += 1
-                else:
-                    updated_count += 1
-                    
-            except Exception as e:
-                error_count += 1
-                error_msg = f"Row {row_number} (Number: {number if 'number' in locals() else 'Unknown'}): ❌ {str(e)}"
-                errors.append(error_msg)
-                print(error_msg)
-                import traceback
-                traceback.print_exc()
-        
-        # Show detailed results
-        if created_count > 0:
-            messages.success(request, f'✅ Created {created_count} new properties')
-        if updated_count > 0:
-            messages.success(request, f'✅ Updated {updated_count} existing properties')
-        if skipped_count > 0:
-            messages.info(request, f'ℹ️ Skipped {skipped_count} existing properties (check "Force Replace" to update them)')
-        if error_count > 0:
-            messages.warning(request, f'⚠️ {error_count} rows had errors:')
-            # Show first 10 errors
-            for error in errors[:10]:
-                messages.error(request, error)
-            if len(errors) > 10:
-                messages.error(request, f'... and {len(errors) - 10} more errors (check server logs)')
-        
-        if created_count == 0 and updated_count == 0 and error_count == 0 and skipped_count > 0:
-            messages.warning(request, '⚠️ No properties were imported. All properties already exist. Check "Force Replace" to update them.')
-        
-        if created_count == 0 and updated_count == 0 and error_count == 0 and skipped_count == 0:
-            messages.warning(request, '⚠️ No valid data found in the Excel file.')
-        
-    except Exception as e:
-        messages.error(request, f'❌ Import failed: {str(e)}')
-        print(f"❌ Import exception: {str(e)}")
-        import traceback
-        traceback.print_exc()
-    
-    return redirect('excel_import_export')
+    # Reject unreadable files and missing columns before queueing
+    # (.xls has no streaming reader, the worker validates it)
+    if not excel_file.name.lower().endswith('.xls'):
+        try:
+            open_import_file(excel_file, excel_file.name).close()
+        except ImportFileError as e:
+            messages.error(request, f'❌ {excel_file.name}: {e}')
+            return redirect('excel_import_export')
+        excel_file.seek(0)
+    
+    # Get default team
+    default_team = None
+    if default_team_id:
+        try:
+            default_team = Team.objects.get(id=default_team_id)
+        except (Team.DoesNotExist, ValueError):
+            pass
+    
+    # Queue the file for the import worker instead of processing it in the request
+    job = ImportJob.objects.create(
+        file=excel_file,
+        original_name=excel_file.name,
+        force_replace=force_replace,
+        dry_run=dry_run,
+        default_team=default_team,
+        created_by=request.user,
+    )
+    if dry_run:
+        messages.info(request, f'ℹ️ Preview of {excel_file.name} queued. Review the changes once it is done.')
+    else:
+        messages.info(request, f'ℹ️ Import of {excel_file.name} queued. Progress is shown below.')
+    return redirect(f"{reverse('excel_import_export')}?job={job.pk}")
 
 @login_required
-def excel_export(request):
-    """Export filtered properties to Excel"""
+def import_job_preview(request, pk):
+    """Show the change plan of a dry-run import and apply it on POST"""
     if not request.user.is_superuser:
         messages.error(request, 'Access denied: Admins only')
         return redirect('property_list')
+    
+    job = get_object_or_404(ImportJob, pk=pk, dry_run=True)
+    
+    if request.method == 'POST':
+        if job.status != ImportJob.STATUS_DONE:
+            messages.error(request, 'The preview has not finished yet')
+            return redirect('import_job_preview', pk=job.pk)
+        # Same stored file and options, this time written to the database
+        apply_job = ImportJob.objects.create(
+            file=job.file.name,
+            original_name=job.original_name,
+            force_replace=job.force_replace,
+            default_team=job.default_team,
+            created_by=request.user,
+        )
+        messages.info(request, f'ℹ️ Import of {job.original_name} queued. Progress is shown below.')
+        return redirect(f"{reverse('excel_import_export')}?job={apply_job.pk}")
+    
+    plan = job.plan or {}
+    context = {
+        'job': job,
+        'field_changes': [
+            (Property._meta.get_field(field).verbose_name if field != 'teams' else 'teams', count)
+            for field, count in plan.get('field_changes', {}).items()
+        ],
+        'changes': plan.get('changes', []),
+        'changed_rows': plan.get('changed_rows', 0),
+    }
+    return render(request, 'properties/import_preview.html', context)
+
+@login_required
+def import_job_status(request, pk):
+    """JSON progress of an import job, polled by the import page"""
+    if not request.user.is_superuser:
+        return JsonResponse({'error': 'Access denied: Admins only'}, status=403)
+    
+    job = get_object_or_404(ImportJob, pk=pk)
+    return JsonResponse(job.to_status_dict())
+
+@login_required
+def db_metrics(request):
+    """JSON database connection counters of the worker process serving this request"""
+    if not request.user.is_superuser:
+        return JsonResponse({'error': 'Access denied: Admins only'}, status=403)
+
+    return JsonResponse(connection_stats())
+
+@async_login_required
+async def excel_export(request):
+    """
+    Export filtered properties as .xlsx, or as CSV/Parquet with ?format=csv|parquet.
+
+    Under ASGI the download is sent to the client from the event loop;
+    threads are only used for the queries and for writing the file.
+    """
+    if not request.user.is_superuser:
+        await sync_to_async(messages.error)(request, 'Access denied: Admins only')
+        return redirect('property_list')
 
     # Check if generating template mode
     is_template = request.GET.get('template', '').lower() == 'true'
+    export_format = request.GET.get('format', '').lower()
+    if export_format not in EXPORT_FORMATS:
+        export_format = 'xlsx'
+    if export_format == 'parquet' and not parquet_available():
+        await sync_to_async(messages.error)(request, 'Parquet export is not available (pyarrow is not installed)')
+        return redirect('excel_import_export')
+    extension, content_type = EXPORT_FORMATS[export_format]
 
-    # Create Excel file
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Properties"
-
-    # Define headers
-    headers = [
-        'Number', 'Team', 'Address ID', 'Village', 'Street', 'House number', 'House number affix',
-        'Owner email', 'Owner name', 'Owner surname', 'Owner phone 1', 'Owner phone 2',
-        'PoP code', 'Gebaute Units', 'HBG', 'HBG Termin', 'Ausbau Termin',
-        'K.L 15M', 'K.L 20M', 'K.L 30M', 'K.L 50M', 'K.L 80M', 'K.L 100M',
-        'keller', 'HÜP', 'spleissen', 'ohne Infra', 'mit Infra', 'Status', 'Comments'
-    ]
-
-    # Style header
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    header_font = Font(color="FFFFFF", bold=True)
-
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_num, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-
-    # Only add data rows if not a template
-    if is_template:
-        # No data rows for template - only headers
-        pass
-    else:
+    # Get properties
+    properties = Property.objects.none()
+    if not is_template:
         # Get filters from request
         search = request.GET.get('search', '').strip()
         team_filter = request.GET.get('team', '')
         status_filter = request.GET.get('status', '')
 
-        # Get properties
         properties = Property.objects.all()
 
         if search:
-            properties = properties.filter(
-                Q(number__icontains=search) |
-                Q(village__icontains=search) |
-                Q(owner_name__icontains=search) |
-                Q(owner_surname__icontains=search)
-            )
+            properties = search_properties(properties, search, EXPORT_SEARCH_FIELDS)
 
         if team_filter:
             properties = properties.filter(teams__id=team_filter)
@@ -746,68 +655,25 @@ def excel_export(request):
         if status_filter:
             properties = properties.filter(status=status_filter)
 
-        # Add data rows
-        for row_num, prop in enumerate(properties, 2):
-            ws.cell(row=row_num, column=1, value=prop.number)
-            ws.cell(row=row_num, column=2, value=prop.get_team_names())
-            ws.cell(row=row_num, column=3, value=prop.address_id)
-            ws.cell(row=row_num, column=4, value=prop.village)
-            ws.cell(row=row_num, column=5, value=prop.street)
-            ws.cell(row=row_num, column=6, value=prop.house_number)
-            ws.cell(row=row_num, column=7, value=prop.house_number_affix)
-            ws.cell(row=row_num, column=8, value=prop.owner_email)
-            ws.cell(row=row_num, column=9, value=prop.owner_name)
-            ws.cell(row=row_num, column=10, value=prop.owner_surname)
-            ws.cell(row=row_num, column=11, value=prop.owner_phone_1)
-            ws.cell(row=row_num, column=12, value=prop.owner_phone_2)
-            ws.cell(row=row_num, column=13, value=prop.pop_code)
-            ws.cell(row=row_num, column=14, value=prop.gebaute_units)
-            ws.cell(row=row_num, column=15, value=prop.hbg)
-            ws.cell(row=row_num, column=16, value=prop.hbg_termin.strftime('%Y-%m-%d %H:%M') if prop.hbg_termin else '')
-            ws.cell(row=row_num, column=17, value=prop.ausbau_termin.strftime('%Y-%m-%d %H:%M') if prop.ausbau_termin else '')
-            ws.cell(row=row_num, column=18, value=prop.kl_15m)
-            ws.cell(row=row_num, column=19, value=prop.kl_20m)
-            ws.cell(row=row_num, column=20, value=prop.kl_30m)
-            ws.cell(row=row_num, column=21, value=prop.kl_50m)
-            ws.cell(row=row_num, column=22, value=prop.kl_80m)
-            ws.cell(row=row_num, column=23, value=prop.kl_100m)
-            ws.cell(row=row_num, column=24, value=prop.keller)
-            ws.cell(row=row_num, column=25, value=prop.huep)
-            ws.cell(row=row_num, column=26, value=prop.spleissen)
-            ws.cell(row=row_num, column=27, value=prop.ohne_infra)
-            ws.cell(row=row_num, column=28, value=prop.mit_infra)
-            ws.cell(row=row_num, column=29, value=prop.get_status_display())
-            ws.cell(row=row_num, column=30, value=prop.comments)
-
-    # Auto-adjust column widths
-    for column in ws.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(cell.value)
-            except:
-                pass
-        adjusted_width = min(max_length + 2, 50)
-        ws.column_dimensions[column_letter].width = adjusted_width
-
-    # Prepare response
-    output = io.BytesIO()
-    wb.save(output)
-    output.seek(0)
-
-    response = HttpResponse(
-        output.read(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-
     # Set filename
     if is_template:
-        filename = 'techniknet_template.xlsx'
+        filename = f'techniknet_template.{extension}'
     else:
-        filename = f'techniknet_export_{timezone.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
+        filename = f'techniknet_export_{timezone.now().strftime("%Y%m%d_%H%M%S")}.{extension}'
 
-    response['Content-Disposition'] = f'attachment; filename={filename}'
+    if export_format == 'csv':
+        rows = iter_export_rows(properties)
+        response = streaming_text_response(request, iter_csv(rows), content_type)
+        response['Content-Disposition'] = f'attachment; filename={filename}'
+        return response
 
-    return response
+    # XLSX and Parquet are written to a temporary file chunk by chunk and the
+    # file is streamed back, so memory stays flat regardless of table size
+    if export_format == 'parquet':
+        # Typed timestamp columns instead of formatted text
+        output = await sync_to_async(write_parquet)(iter_export_rows(properties, format_date=lambda value: value))
+    else:
+        output = await sync_to_async(
+            lambda: write_xlsx(iter_export_rows(properties), sample_rows=sample_export_rows(properties))
+        )()
+    return file_download_response(request, output, filename, content_type)